@@ -0,0 +1,191 @@
+# api_client.py
+# Front-desk side of the booking service (api_server.py).
+#
+# When HOTEL_API_URL is set, bookings and payments are sent to the service so
+# every desk shares one booking engine. Otherwise the same calls run booking.py
+# directly against the local database, so the pages do not need to care.
+#
+#   python api_client.py bench --clients 16 --seconds 10      # measure throughput
+
+import http.client
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import date, timedelta
+from urllib.parse import urlencode, urlsplit
+import availability
+import booking
+import database
+
+API_URL = os.environ.get("HOTEL_API_URL", "").rstrip("/")
+TIMEOUT = 10
+
+
+class ServiceUnavailable(booking.BookingError):
+    """The booking service could not be reached or failed to handle the call."""
+
+
+ERRORS = {400: booking.BookingError, 404: booking.NotFound, 409: booking.Unavailable}
+
+
+def configured():
+    return bool(API_URL)
+
+
+def request(method, path, body=None, params=None, url=None):
+    """
+    Call the service and return the decoded JSON response.
+    Error responses are raised as the matching booking exception; a service
+    that is down or fails (HTTP 5xx) raises ServiceUnavailable.
+    """
+    url = (url or API_URL) + path
+    if params:
+        url += "?" + urlencode({k: v for k, v in params.items() if v is not None})
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=TIMEOUT) as resp:
+            return json.loads(resp.read())
+    except urllib.error.HTTPError as exc:
+        try:
+            message = json.loads(exc.read()).get("error", exc.reason)
+        except ValueError:
+            message = exc.reason
+        if exc.code not in ERRORS:
+            raise ServiceUnavailable(f"The booking service failed ({exc.code}): {message}")
+        raise ERRORS[exc.code](message)
+    except (urllib.error.URLError, OSError, ValueError) as exc:
+        # Refused, timed out, or an answer that is not JSON
+        reason = getattr(exc, "reason", exc)
+        raise ServiceUnavailable(f"The booking service is not responding: {reason}")
+
+
+def _local(fn, *args):
+    with database.connection() as conn:
+        return fn(conn, *args)
+
+
+# -----------------------------
+# Calls used by the pages
+# -----------------------------
+def book_room(room_no, check_in, check_out, customer=None, customer_id=None):
+    if not configured():
+        return _local(booking.book_room, room_no, check_in, check_out, customer, customer_id)
+    result = request("POST", "/reservations", {
+        "room_no": room_no, "check_in": check_in, "check_out": check_out,
+        "customer": customer, "customer_id": customer_id,
+    })
+    # The service owns the bookings; rebuild our copy of the index on next use
+    availability.invalidate()
+    return result["res_id"]
+
+
+def cancel_reservation(res_id):
+    if not configured():
+        return _local(booking.cancel_reservation, res_id)
+    request("DELETE", f"/reservations/{res_id}")
+    availability.invalidate()
+
+
+def add_payment(res_id, amount, payment_date, method):
+    if not configured():
+        return _local(booking.add_payment, res_id, amount, payment_date, method)
+    return request("POST", "/payments", {
+        "res_id": res_id, "amount": amount, "payment_date": payment_date, "method": method,
+    })["payment_id"]
+
+
+def delete_payment(payment_id):
+    if not configured():
+        return _local(booking.delete_payment, payment_id)
+    request("DELETE", f"/payments/{payment_id}")
+
+
+def free_rooms(check_in, check_out, conn=None):
+    """
+    Room numbers free for [check_in, check_out). Pass `conn` from a background query.
+    """
+    if not configured():
+        return availability.get_index(conn).free_rooms(check_in, check_out)
+    return request("GET", "/availability", params={"check_in": check_in, "check_out": check_out})["rooms"]
+
+
+# -----------------------------
+# Throughput benchmark
+# -----------------------------
+def bench(url, clients=8, seconds=10.0, book_every=0):
+    """
+    Run `clients` desks against the service for `seconds`. Each desk checks
+    availability for random stays and, with book_every=N, books every Nth
+    request. Returns (requests/sec, p50 ms, p99 ms, bookings made).
+    """
+    target = urlsplit(url)
+    deadline = time.monotonic() + seconds
+    latencies = []
+    booked = [0]
+    lock = threading.Lock()
+
+    def desk(seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection(target.hostname, target.port, timeout=TIMEOUT)
+        rooms = json.loads(_get(conn, "/rooms"))["rooms"]
+        made = 0
+        n = 0
+        while time.monotonic() < deadline:
+            n += 1
+            start = date.today() + timedelta(days=rng.randrange(365))
+            stay = {"check_in": start.isoformat(),
+                    "check_out": (start + timedelta(days=rng.randint(1, 7))).isoformat()}
+            began = time.perf_counter()
+            if book_every and n % book_every == 0 and rooms:
+                stay["room_no"] = rng.choice(rooms)["room_no"]
+                stay["customer_id"] = 1
+                conn.request("POST", "/reservations", json.dumps(stay), {"Content-Type": "application/json"})
+                resp = conn.getresponse()
+                resp.read()
+                made += resp.status == 201
+            else:
+                _get(conn, "/availability?" + urlencode(stay))
+            with lock:
+                latencies.append(time.perf_counter() - began)
+        conn.close()
+        with lock:
+            booked[0] += made
+
+    threads = [threading.Thread(target=desk, args=(i,)) for i in range(clients)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    pick = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000 if latencies else 0.0
+    return len(latencies) / elapsed, pick(0.50), pick(0.99), booked[0]
+
+
+def _get(conn, path):
+    conn.request("GET", path)
+    resp = conn.getresponse()
+    return resp.read()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Booking service client tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("bench", help="measure service throughput with many simulated desks")
+    b.add_argument("--url", default=API_URL or "http://127.0.0.1:8765")
+    b.add_argument("--clients", type=int, default=8, help="concurrent desks")
+    b.add_argument("--seconds", type=float, default=10.0)
+    b.add_argument("--book-every", type=int, default=0, help="make a booking every N requests per desk")
+    args = parser.parse_args()
+
+    rate, p50, p99, booked = bench(args.url, args.clients, args.seconds, args.book_every)
+    print(f"{args.clients} desks: {rate:,.0f} requests/sec, p50 {p50:.1f} ms, p99 {p99:.1f} ms, {booked} bookings")
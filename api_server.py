@@ -0,0 +1,385 @@
+# api_server.py
+# Headless booking service: rooms, availability, reservations and payments as JSON.
+#
+#   python api_server.py --port 8765
+#   HOTEL_API_URL=http://127.0.0.1:8765 python login.py     # desks become clients
+#
+# Every write goes through one connection behind a lock, so bookings from all
+# desks are applied one at a time by a single process. Reads use the shared
+# pool and are cached until the next write (or CACHE_SECONDS, to pick up
+# changes made by tools that bypass the service). The availability index is
+# rebuilt whenever table_versions shows rooms or reservations changed by
+# anything other than the service itself, such as the Rooms page or deleting
+# a customer.
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import availability
+import booking
+import database
+import journal
+
+HOST = "127.0.0.1"
+PORT = 8765
+CACHE_SECONDS = 2.0
+CACHE_SIZE = 1024
+LIST_LIMIT = 200       # default page size for list endpoints
+MAX_LIMIT = 5000
+
+
+def _rows(cursor):
+    columns = [d[0] for d in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+
+def _index_versions(conn):
+    versions = database.read_versions(conn)
+    return versions.get("rooms"), versions.get("reservations")
+
+
+def _int_arg(query, name, default=None):
+    value = query.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise booking.BookingError(f"{name} must be a number")
+
+
+# -----------------------------
+# Read cache
+# -----------------------------
+class ReadCache:
+    """
+    Encoded GET responses keyed by URL. clear() runs after every write.
+    """
+
+    def __init__(self, seconds=CACHE_SECONDS, size=CACHE_SIZE):
+        self.seconds = seconds
+        self.size = size
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.seconds:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key, body):
+        with self._lock:
+            if len(self._entries) >= self.size:
+                # Drop the oldest entry; dicts keep insertion order
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic(), body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# -----------------------------
+# Booking service
+# -----------------------------
+class BookingService:
+    def __init__(self):
+        self.cache = ReadCache()
+        self.requests = 0
+        self.started = time.monotonic()
+        self._write_conn = database.connect()
+        if journal.ENABLED:
+            journal.attach(self._write_conn)
+        self._write_lock = threading.Lock()
+        self._count_lock = threading.Lock()
+
+        # Bookings made before the service started
+        availability.invalidate()
+        self._index_versions = None     # rooms/reservations versions the index reflects
+        self._index_lock = threading.Lock()
+
+    def write(self, fn, *args):
+        """
+        Run `booking.<fn>(conn, *args)` on the single writer connection.
+        """
+        with self._write_lock:
+            # data_version moves only when another connection commits
+            others = self._write_conn.execute("PRAGMA data_version").fetchone()[0]
+            before = _index_versions(self._write_conn)
+            try:
+                return fn(self._write_conn, *args)
+            finally:
+                with self._index_lock:
+                    alone = self._write_conn.execute("PRAGMA data_version").fetchone()[0] == others
+                    if alone and self._index_versions == before:
+                        # booking.py kept the index in step with this write
+                        self._index_versions = _index_versions(self._write_conn)
+                self.cache.clear()
+                journal.drain(self._write_conn, database.DB_PATH)
+
+    def close(self):
+        with self._write_lock:
+            self._write_conn.close()
+
+    def count_request(self):
+        with self._count_lock:
+            self.requests += 1
+
+    # -----------------------------
+    # Reads (run on a pooled connection)
+    # -----------------------------
+    def rooms(self, conn, query):
+        sql = "SELECT room_id, room_no, room_type, bed, price, status FROM rooms WHERE 1=1"
+        params = []
+        if query.get("type"):
+            sql += " AND room_type=?"
+            params.append(query["type"])
+        if query.get("status"):
+            sql += " AND status=?"
+            params.append(query["status"])
+        return {"rooms": _rows(conn.execute(sql + " ORDER BY room_no", params))}
+
+    def availability(self, conn, query):
+        check_in, check_out = query.get("check_in"), query.get("check_out")
+        if not check_in or not check_out:
+            raise booking.BookingError("check_in and check_out are required")
+        if check_in >= check_out:
+            return {"rooms": []}
+        return {"rooms": self.availability_index(conn).free_rooms(check_in, check_out)}
+
+    def availability_index(self, conn):
+        """
+        The shared index, rebuilt first if rooms or reservations were changed
+        behind the service's back.
+        """
+        versions = _index_versions(conn)
+        with self._index_lock:
+            if versions != self._index_versions:
+                availability.invalidate()
+                index = availability.get_index(conn)
+                self._index_versions = versions
+                return index
+        return availability.get_index(conn)
+
+    def reservations(self, conn, query, res_id=None):
+        sql = """
+            SELECT r.res_id, r.customer_id, c.name AS customer, ro.room_no,
+                   r.check_in, r.check_out, r.total_days, r.total_cost, r.status
+            FROM reservations r
+            JOIN customers c ON r.customer_id = c.customer_id
+            JOIN rooms ro ON r.room_id = ro.room_id
+        """
+        if res_id is not None:
+            rows = _rows(conn.execute(sql + " WHERE r.res_id=?", (res_id,)))
+            if not rows:
+                raise booking.NotFound("Reservation not found")
+            return rows[0]
+
+        clauses, params = ["r.res_id > ?"], [_int_arg(query, "after", 0)]
+        if query.get("status"):
+            clauses.append("r.status = ?")
+            params.append(query["status"])
+        if query.get("customer_id"):
+            clauses.append("r.customer_id = ?")
+            params.append(_int_arg(query, "customer_id"))
+        params.append(min(_int_arg(query, "limit", LIST_LIMIT), MAX_LIMIT))
+        sql += " WHERE " + " AND ".join(clauses) + " ORDER BY r.res_id LIMIT ?"
+        return {"reservations": _rows(conn.execute(sql, params))}
+
+    def payments(self, conn, query, payment_id=None):
+        sql = "SELECT payment_id, res_id, amount, payment_date, method FROM payments"
+        if payment_id is not None:
+            rows = _rows(conn.execute(sql + " WHERE payment_id=?", (payment_id,)))
+            if not rows:
+                raise booking.NotFound("Payment not found")
+            return rows[0]
+
+        clauses, params = ["payment_id > ?"], [_int_arg(query, "after", 0)]
+        if query.get("res_id"):
+            clauses.append("res_id = ?")
+            params.append(_int_arg(query, "res_id"))
+        params.append(min(_int_arg(query, "limit", LIST_LIMIT), MAX_LIMIT))
+        sql += " WHERE " + " AND ".join(clauses) + " ORDER BY payment_id LIMIT ?"
+        return {"payments": _rows(conn.execute(sql, params))}
+
+    def stats(self, conn, query):
+        stats = database.read_stats(conn)
+        elapsed = time.monotonic() - self.started
+        stats["service"] = {
+            "requests": self.requests,
+            "requests_per_second": round(self.requests / elapsed, 1) if elapsed else 0.0,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+        }
+        return stats
+
+
+# -----------------------------
+# HTTP handler
+# -----------------------------
+ERROR_STATUS = (
+    (booking.NotFound, 404),
+    (booking.Unavailable, 409),
+    (booking.BookingError, 400),
+)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"     # keep-alive, so each desk reuses its socket
+    disable_nagle_algorithm = True    # headers and body go out as separate writes
+    service = None                    # set by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _route(self):
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        return parts, query
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, fn):
+        self.service.count_request()
+        try:
+            status, body = fn()
+        except booking.BookingError as exc:
+            status = next(code for cls, code in ERROR_STATUS if isinstance(exc, cls))
+            body = json.dumps({"error": str(exc)}).encode()
+        except Exception as exc:
+            status, body = 500, json.dumps({"error": f"{type(exc).__name__}: {exc}"}).encode()
+        self._send(status, body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise booking.BookingError("Request body must be JSON")
+        if not isinstance(data, dict):
+            raise booking.BookingError("Request body must be a JSON object")
+        return data
+
+    def _id(self, parts):
+        try:
+            return int(parts[1])
+        except ValueError:
+            raise booking.NotFound("Not found")
+
+    # -----------------------------
+    # Methods
+    # -----------------------------
+    def do_GET(self):
+        def get():
+            body = self.service.cache.get(self.path)
+            if body is not None:
+                return 200, body
+
+            parts, query = self._route()
+            readers = {
+                "rooms": self.service.rooms,
+                "availability": self.service.availability,
+                "reservations": self.service.reservations,
+                "payments": self.service.payments,
+                "stats": self.service.stats,
+            }
+            if not parts or parts[0] not in readers or len(parts) > 2:
+                raise booking.NotFound("Not found")
+            with database.connection() as conn:
+                if len(parts) == 2 and parts[0] in ("reservations", "payments"):
+                    result = readers[parts[0]](conn, query, self._id(parts))
+                elif len(parts) == 1:
+                    result = readers[parts[0]](conn, query)
+                else:
+                    raise booking.NotFound("Not found")
+
+            body = json.dumps(result).encode()
+            if parts[0] != "stats":
+                self.service.cache.put(self.path, body)
+            return 200, body
+
+        self._handle(get)
+
+    def do_POST(self):
+        def post():
+            parts, _ = self._route()
+            data = self._body()
+            if parts == ["reservations"]:
+                res_id = self.service.write(
+                    booking.book_room, data.get("room_no"), data.get("check_in"), data.get("check_out"),
+                    data.get("customer"), data.get("customer_id"))
+                return 201, json.dumps({"res_id": res_id}).encode()
+            if parts == ["payments"]:
+                payment_id = self.service.write(
+                    booking.add_payment, data.get("res_id"), data.get("amount"),
+                    data.get("payment_date"), data.get("method"))
+                return 201, json.dumps({"payment_id": payment_id}).encode()
+            raise booking.NotFound("Not found")
+
+        self._handle(post)
+
+    def do_DELETE(self):
+        def delete():
+            parts, _ = self._route()
+            if len(parts) == 2 and parts[0] == "reservations":
+                self.service.write(booking.cancel_reservation, self._id(parts))
+            elif len(parts) == 2 and parts[0] == "payments":
+                self.service.write(booking.delete_payment, self._id(parts))
+            else:
+                raise booking.NotFound("Not found")
+            return 200, b'{"deleted": true}'
+
+        self._handle(delete)
+
+
+def serve(host=HOST, port=PORT):
+    """
+    Build the server; call serve_forever() on the result.
+    """
+    service = BookingService()
+    handler = type("BoundHandler", (Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the hotel booking API")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--db", default=database.DB_PATH, help="database file (default: %(default)s)")
+    args = parser.parse_args()
+
+    database.DB_PATH = args.db
+    conn = database.connect()
+    database.migrate(conn)
+    conn.close()
+    journal.set_actor("api")
+    journal.enable()
+
+    server = serve(args.host, args.port)
+    print(f"Serving {args.db} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
@@ -0,0 +1,174 @@
+# availability.py
+# Date-range room availability built from the reservations table.
+# A room is free for [start, end) when no active reservation overlaps that range,
+# regardless of what rooms.status says today.
+#
+# rooms.status is "Booked" or "Available" for today's occupancy, recalculated
+# by sync_room_status on bookings, at login and at midnight. Any other status
+# (e.g. "Maintenance") is set by staff on the Rooms page and left alone until
+# they set the room back to "Available".
+
+from bisect import bisect_left, insort
+from datetime import date
+import database
+
+# Statuses sync_room_status computes; anything else was set by hand
+OCCUPANCY_STATUSES = ("Available", "Booked")
+
+
+class AvailabilityIndex:
+    """
+    Per-room interval index over active reservations.
+
+    For every room we keep the bookings sorted by check_in together with a running
+    maximum of check_out. A query for [start, end) bisects to the last booking that
+    starts before `end`; the room is free if every booking up to there ends on or
+    before `start`. That is O(log n) per room. Dates are ISO strings, which sort
+    the same way as the dates they represent.
+    """
+
+    def __init__(self):
+        self.rooms = {}           # room_id -> room_no
+        # room_id -> (sorted [(check_in, check_out), ...], running max of check_out).
+        # Each entry is replaced as a whole, so queries from a worker thread
+        # never see the two lists out of step.
+        self._intervals = {}
+
+    def load(self, conn):
+        self.rooms = dict(conn.execute("SELECT room_id, room_no FROM rooms ORDER BY room_no"))
+        bookings = {room_id: [] for room_id in self.rooms}
+
+        rows = conn.execute("""
+            SELECT room_id, check_in, check_out
+            FROM reservations
+            WHERE status='Active'
+            ORDER BY room_id, check_in
+        """)
+        for room_id, check_in, check_out in rows:
+            bookings.setdefault(room_id, []).append((check_in, check_out))
+
+        self._intervals = {room_id: (b, self._running_max(b)) for room_id, b in bookings.items()}
+        return self
+
+    @staticmethod
+    def _running_max(bookings):
+        result = []
+        best = ""
+        for _, check_out in bookings:
+            best = max(best, check_out)
+            result.append(best)
+        return result
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+    def add(self, room_id, check_in, check_out):
+        booking = (check_in, check_out)
+        bookings, max_end = self._intervals.setdefault(room_id, ([], []))
+        if not bookings or booking >= bookings[-1]:
+            # Usual case: a later stay. Growing max_end first keeps concurrent
+            # readers safe without copying the lists.
+            max_end.append(max(max_end[-1], check_out) if max_end else check_out)
+            bookings.append(booking)
+            return
+
+        bookings = list(bookings)
+        insort(bookings, booking)
+        self._intervals[room_id] = (bookings, self._running_max(bookings))
+
+    def remove(self, room_id, check_in, check_out):
+        bookings = list(self._intervals.get(room_id, ([], []))[0])
+        if (check_in, check_out) in bookings:
+            bookings.remove((check_in, check_out))
+            self._intervals[room_id] = (bookings, self._running_max(bookings))
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def is_free(self, room_id, start, end):
+        bookings, max_end = self._intervals.get(room_id, ([], []))
+        i = bisect_left(bookings, (end,))
+        return i == 0 or max_end[i - 1] <= start
+
+    def free_rooms(self, start, end):
+        """
+        Room numbers free for the whole of [start, end).
+        """
+        return [room_no for room_id, room_no in self.rooms.items() if self.is_free(room_id, start, end)]
+
+
+_index = None
+
+
+def get_index(conn=None):
+    """
+    Return the shared index, building it from the database on first use.
+    Pass `conn` when calling from a background query.
+    """
+    global _index
+    index = _index
+    if index is None:
+        if conn is None:
+            with database.connection() as conn:
+                index = AvailabilityIndex().load(conn)
+        else:
+            index = AvailabilityIndex().load(conn)
+        _index = index
+    return index
+
+
+def built_index():
+    """
+    The shared index if it has been built, else None. Code that has just
+    written a booking updates this one only: an index built after the write
+    already has it.
+    """
+    return _index
+
+
+def invalidate():
+    """
+    Drop the shared index so the next query rebuilds it (rooms changed, or
+    another terminal may have booked).
+    """
+    global _index
+    _index = None
+
+
+def has_overlap(conn, room_id, start, end):
+    """
+    Authoritative check against the database, used inside the booking transaction.
+    """
+    row = conn.execute("""
+        SELECT 1 FROM reservations
+        WHERE room_id=? AND status='Active' AND check_in < ? AND check_out > ?
+        LIMIT 1
+    """, (room_id, end, start)).fetchone()
+    return row is not None
+
+
+def sync_room_status(conn, room_id=None, today=None):
+    """
+    Keep rooms.status meaning "occupied today" for the dashboard and Rooms page.
+    With no room_id every room is updated (at login, at midnight, after a bulk
+    import). Rooms with a status set by hand are skipped, and rooms already
+    right are not written, so nothing is refreshed for no reason. Returns the
+    number of rooms changed.
+    """
+    today = today or date.today().isoformat()
+    occupied = """
+        CASE WHEN EXISTS (SELECT 1 FROM reservations r
+                          WHERE r.room_id=rooms.room_id AND r.status='Active'
+                            AND r.check_in <= :today AND r.check_out > :today)
+        THEN 'Booked' ELSE 'Available' END
+    """
+    sql = f"""
+        UPDATE rooms SET status = {occupied}
+        WHERE (status IS NULL OR status IN {OCCUPANCY_STATUSES})
+          AND status IS NOT {occupied}
+    """
+    params = {"today": today}
+    if room_id is not None:
+        sql += " AND room_id = :room_id"
+        params["room_id"] = room_id
+    return conn.execute(sql, params).rowcount
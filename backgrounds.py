@@ -0,0 +1,61 @@
+# backgrounds.py
+# Full-window background images, scaled once and cached on disk.
+#
+# The first time an image is needed at a given size it is decoded (in JPEG
+# draft mode when shrinking, so only the needed scale is decoded), resized and
+# written as a PPM file under CACHE_DIR. The file name carries the size and
+# the source file's mtime, so editing the JPEG or changing resolution builds a
+# new entry. Later loads hand the PPM straight to tk.PhotoImage and never import
+# PIL at all.
+
+import os
+import tkinter as tk
+
+CACHE_DIR = os.path.join(".cache", "backgrounds")
+
+
+def _cache_path(path, width, height):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f"{stem}-{width}x{height}-{os.stat(path).st_mtime_ns}.ppm")
+
+
+def _render(path, width, height, target):
+    from PIL import Image   # only needed on a cache miss
+
+    img = Image.open(path)
+    # Lets libjpeg decode at 1/2, 1/4 or 1/8 scale when shrinking a large photo
+    img.draft("RGB", (width, height))
+    img = img.convert("RGB").resize((width, height), Image.Resampling.LANCZOS)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Replace older renders of this image at this size
+    prefix = os.path.basename(target).rsplit("-", 1)[0] + "-"
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(prefix) and name != os.path.basename(target):
+            os.remove(os.path.join(CACHE_DIR, name))
+
+    tmp = target + ".tmp"
+    img.save(tmp, "PPM")
+    os.replace(tmp, target)
+
+
+def load(master, path, width, height):
+    """
+    Return a tk.PhotoImage of `path` scaled to width x height, or None if the
+    image does not exist. Photos are also kept on the toplevel for reuse.
+    """
+    if not os.path.exists(path) or width <= 1 or height <= 1:
+        return None
+
+    toplevel = master.winfo_toplevel()
+    photos = getattr(toplevel, "background_photos", None)
+    if photos is None:
+        photos = toplevel.background_photos = {}
+
+    target = _cache_path(path, width, height)
+    photo = photos.get(target)
+    if photo is None:
+        if not os.path.exists(target):
+            _render(path, width, height, target)
+        photo = photos[target] = tk.PhotoImage(master=toplevel, file=target)
+    return photo
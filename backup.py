@@ -0,0 +1,324 @@
+# backup.py
+# Online backups of the hotel database while the app keeps running.
+#
+#   python backup.py take                  # snapshot now into backups/
+#   python backup.py list
+#   python backup.py verify backups/hotel-20250601-180000-123456.db
+#   python backup.py restore backups/hotel-20250601-180000-123456.db
+#   python backup.py run --interval 60     # snapshot every hour until stopped
+#
+# Copying hotel.db with the file manager while desks are writing can catch
+# it half-written. Snapshots here go through SQLite's backup API on their own
+# connection: PAGES_PER_STEP pages at a time with a short pause in between,
+# so a multi-GB copy trickles along beside the front desk instead of
+# saturating the disk.
+#
+# The copying connection holds one read transaction throughout, so every step
+# reads the same snapshot of the database. With WAL this blocks no writer
+# (the WAL just grows until the copy is done). Without WAL, a write from
+# another connection makes SQLite restart the copy; after MAX_RESTARTS the
+# rest is copied in one step.
+#
+# Each snapshot is written to a .part file, checked with PRAGMA
+# integrity_check, and only then renamed into place; an existing snapshot is
+# never overwritten. Names go down to the microsecond. Retention keeps the
+# newest KEEP_LAST snapshots plus the newest one of each of the last
+# KEEP_DAILY days. The app takes a snapshot every HOTEL_BACKUP_INTERVAL
+# minutes (default 60, 0 for never) on a background thread.
+
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+import database
+
+BACKUP_DIR = os.environ.get("HOTEL_BACKUP_DIR", "backups")
+INTERVAL_MINUTES = float(os.environ.get("HOTEL_BACKUP_INTERVAL", 60))
+PAGES_PER_STEP = 256      # 1 MB per step with 4 KB pages
+STEP_PAUSE = 0.005        # seconds between steps
+MAX_RESTARTS = 3
+KEEP_LAST = 24
+KEEP_DAILY = 14
+STAMP = "%Y%m%d-%H%M%S-%f"
+OLD_STAMP = "%Y%m%d-%H%M%S"    # snapshots named before microseconds were added
+
+
+class BackupError(Exception):
+    pass
+
+
+class _Restarted(Exception):
+    pass
+
+
+def _stem(db_path):
+    return os.path.splitext(os.path.basename(db_path))[0]
+
+
+def copy_database(db_path, out, pages=PAGES_PER_STEP, pause=STEP_PAUSE, max_restarts=MAX_RESTARTS):
+    """
+    Copy the live database at `db_path` to `out` with the backup API.
+    Returns {"pages": copied, "restarts": n, "seconds": elapsed}.
+    """
+    started = time.perf_counter()
+    restarts = 0
+    state = {"remaining": None, "total": 0}
+
+    def progress(status, remaining, total):
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            nonlocal restarts
+            restarts += 1
+            if restarts > max_restarts:
+                raise _Restarted()
+        state["remaining"], state["total"] = remaining, total
+        # Let the desks have the disk for a moment
+        time.sleep(pause)
+
+    source = database.connect(db_path)
+    target = sqlite3.connect(out)
+    try:
+        if source.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            # Pin one snapshot for all the steps; writers carry on in the WAL
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        try:
+            source.backup(target, pages=pages, progress=progress)
+        except _Restarted:
+            # Busy database: copy the rest from one read snapshot
+            source.backup(target, pages=-1)
+        # The copy inherits WAL mode; a snapshot should be one self-contained file
+        target.execute("PRAGMA journal_mode = DELETE")
+        if source.in_transaction:
+            source.rollback()
+    finally:
+        target.close()
+        source.close()
+    return {"pages": state["total"], "restarts": restarts, "seconds": time.perf_counter() - started}
+
+
+def verify(path):
+    """
+    Problems PRAGMA integrity_check reports for the file at `path`; empty
+    when it is sound.
+    """
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+    return [] if rows == ["ok"] else rows
+
+
+def take(db_path=None, directory=None, prune_after=True, **options):
+    """
+    Snapshot the database into `directory`, verify it and apply retention.
+    Returns (path, copy stats). Raises BackupError when the database does not
+    exist or the copy fails the integrity check; nothing is kept in that case.
+    """
+    db_path = db_path or database.DB_PATH
+    directory = directory or BACKUP_DIR
+    if not os.path.exists(db_path):
+        # Connecting would create an empty database just to copy it
+        raise BackupError(f"{db_path} does not exist")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{_stem(db_path)}-{datetime.now().strftime(STAMP)}.db")
+    part = path + ".part"
+    if os.path.exists(path):
+        raise BackupError(f"{path} already exists")
+    if os.path.exists(part):
+        os.remove(part)
+
+    stats = copy_database(db_path, part, **options)
+    problems = verify(part)
+    if problems:
+        os.remove(part)
+        raise BackupError(f"snapshot failed integrity_check: {problems[:5]}")
+    if os.path.exists(path):
+        os.remove(part)
+        raise BackupError(f"{path} already exists")
+    os.rename(part, path)
+    if prune_after:
+        prune(db_path, directory)
+    return path, stats
+
+
+def snapshots(db_path=None, directory=None):
+    """
+    [(taken_at, path), ...] of the database's snapshots, oldest first.
+    """
+    stem = _stem(db_path or database.DB_PATH)
+    directory = directory or BACKUP_DIR
+    found = []
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    for name in names:
+        if not (name.startswith(stem + "-") and name.endswith(".db")):
+            continue
+        for stamp in (STAMP, OLD_STAMP):
+            try:
+                taken_at = datetime.strptime(name[len(stem) + 1:-3], stamp)
+            except ValueError:
+                continue
+            found.append((taken_at, os.path.join(directory, name)))
+            break
+    return sorted(found)
+
+
+def prune(db_path=None, directory=None, keep_last=KEEP_LAST, keep_daily=KEEP_DAILY, now=None):
+    """
+    Delete snapshots outside the retention policy. Returns the deleted paths.
+    """
+    found = snapshots(db_path, directory)
+    keep = {path for _, path in found[-keep_last:]} if keep_last else set()
+    since = (now or datetime.now()).date() - timedelta(days=keep_daily - 1)
+    newest_of_day = {}
+    for taken_at, path in found:
+        if taken_at.date() >= since:
+            newest_of_day[taken_at.date()] = path
+    keep.update(newest_of_day.values())
+
+    removed = []
+    for _, path in found:
+        if path not in keep:
+            os.remove(path)
+            removed.append(path)
+    return removed
+
+
+def restore(snapshot_path, db_path=None, directory=None, safety_copy=True):
+    """
+    Replace the database's contents with a verified snapshot. The current
+    contents are first saved as a snapshot of their own (unless
+    safety_copy=False). Returns the path of that safety copy, or None.
+    """
+    db_path = db_path or database.DB_PATH
+    problems = verify(snapshot_path)
+    if problems:
+        raise BackupError(f"{snapshot_path} failed integrity_check: {problems[:5]}")
+
+    # Read the snapshot before the safety copy is taken, so nothing that
+    # happens in the backup folder meanwhile can change what is restored
+    staged = db_path + ".restore"
+    source = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+    copy = sqlite3.connect(staged)
+    try:
+        source.backup(copy)
+    finally:
+        copy.close()
+        source.close()
+
+    try:
+        saved = None
+        if safety_copy and os.path.exists(db_path):
+            saved, _ = take(db_path, directory, prune_after=False)
+
+        # Through SQLite rather than over the file, so open connections and the
+        # WAL stay consistent; done in one step under the write lock
+        source = sqlite3.connect(f"file:{staged}?mode=ro", uri=True)
+        target = database.connect(db_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+    finally:
+        os.remove(staged)
+    return saved
+
+
+# -----------------------------
+# Scheduled snapshots
+# -----------------------------
+_stop = threading.Event()
+_thread = None
+
+
+def start(interval_minutes=INTERVAL_MINUTES):
+    """
+    Take a snapshot of the open database every `interval_minutes` on a
+    background thread. Does nothing when the interval is 0 or already running.
+    """
+    global _thread
+    if interval_minutes <= 0 or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_schedule, args=(interval_minutes * 60,), name="backup", daemon=True)
+    _thread.start()
+
+
+def stop():
+    _stop.set()
+
+
+def _schedule(seconds):
+    while not _stop.wait(seconds):
+        if not os.path.exists(database.DB_PATH):
+            continue
+        try:
+            take()
+        except Exception:
+            # A failed snapshot must not take the app down; try again next time
+            traceback.print_exc()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Online snapshots of the hotel database")
+    parser.add_argument("--db", default=database.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--dir", default=BACKUP_DIR, help="snapshot folder (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("take", help="snapshot now")
+    commands.add_parser("list", help="list snapshots, oldest first")
+    commands.add_parser("prune", help="apply the retention policy")
+    check = commands.add_parser("verify", help="run integrity_check on a snapshot")
+    check.add_argument("snapshot")
+    back = commands.add_parser("restore", help="replace the database with a snapshot")
+    back.add_argument("snapshot")
+    back.add_argument("--no-safety-copy", action="store_true", help="do not snapshot the current contents first")
+    loop = commands.add_parser("run", help="take snapshots on a schedule until interrupted")
+    loop.add_argument("--interval", type=float, default=INTERVAL_MINUTES or 60, help="minutes between snapshots")
+    args = parser.parse_args()
+
+    database.DB_PATH = args.db
+    if args.command == "take":
+        try:
+            path, stats = take(args.db, args.dir)
+        except BackupError as exc:
+            raise SystemExit(str(exc))
+        print(f"{path}: {stats['pages']} pages in {stats['seconds']:.1f}s ({stats['restarts']} restarts), verified")
+    elif args.command == "list":
+        for taken_at, path in snapshots(args.db, args.dir):
+            print(f"{taken_at:%Y-%m-%d %H:%M:%S}  {os.path.getsize(path) / 1e6:9.1f} MB  {path}")
+    elif args.command == "prune":
+        for path in prune(args.db, args.dir):
+            print(f"removed {path}")
+    elif args.command == "verify":
+        problems = verify(args.snapshot)
+        print("ok" if not problems else "\n".join(problems))
+        if problems:
+            raise SystemExit(1)
+    elif args.command == "restore":
+        try:
+            saved = restore(args.snapshot, args.db, args.dir, safety_copy=not args.no_safety_copy)
+        except BackupError as exc:
+            raise SystemExit(str(exc))
+        if saved:
+            print(f"Previous contents saved as {saved}")
+        print(f"Restored {args.db} from {args.snapshot}")
+    else:
+        print(f"Snapshotting {args.db} every {args.interval:g} minutes into {args.dir}")
+        try:
+            while True:
+                try:
+                    path, stats = take(args.db, args.dir)
+                    print(f"{path}: {stats['seconds']:.1f}s, verified")
+                except Exception:
+                    traceback.print_exc()
+                time.sleep(args.interval * 60)
+        except KeyboardInterrupt:
+            pass
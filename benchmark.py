@@ -0,0 +1,251 @@
+# benchmark.py
+# Times the queries behind the busiest screens against synthetic datasets.
+#
+#   python benchmark.py --sizes 10k 100k                  # writes benchmark-results/<timestamp>.json
+#   python benchmark.py --sizes 100k --compare benchmark-results/previous.json
+#
+# Datasets come from datagen.py and are cached under bench-data/ (same seed,
+# same data). Each benchmark runs the same SQL the page issues, on a pooled
+# connection, without Tk, so the numbers are the database cost a desk waits on.
+
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import time
+from datetime import date, timedelta
+import availability
+import booking
+import database
+import datagen
+import kpi
+import rollup
+import queries
+import search
+from queries import PAYMENTS_SELECT, RESERVATIONS_SELECT
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+DATA_DIR = "bench-data"
+RESULTS_DIR = "benchmark-results"
+REPEAT = 30
+WARMUP = 3
+ANCHOR = date(2025, 6, 1)   # fixed "today" so every run sees the same data
+
+
+# -----------------------------
+# Benchmarks
+# -----------------------------
+# Each takes a connection and returns a callable that does one run.
+def _page(select, key, table=None):
+    def setup(conn):
+        # With `table`, start half way through it: paging cost should not grow with depth
+        after = conn.execute(f"SELECT MAX(rowid) / 2 FROM {table}").fetchone()[0] if table else None
+        sql, params = queries.page_query(select, key, after=after)
+        return lambda: conn.execute(sql, params).fetchall()
+    return setup
+
+
+def _search(table, text):
+    return lambda conn: lambda: search.search(conn, table, text)
+
+
+def _dashboard(conn):
+    return lambda: database.read_stats(conn)
+
+
+def _dashboard_full_scan(conn):
+    # What the counters cost before they were trigger-maintained
+    return lambda: [conn.execute(sql).fetchone() for sql in database.STATS_QUERIES.values()]
+
+
+def _availability_build(conn):
+    return lambda: availability.AvailabilityIndex().load(conn)
+
+
+def _free_rooms(conn):
+    index = availability.AvailabilityIndex().load(conn)
+    stay = (ANCHOR + timedelta(days=7)).isoformat(), (ANCHOR + timedelta(days=10)).isoformat()
+    return lambda: index.free_rooms(*stay)
+
+
+def _add_reservation(conn):
+    # Book distinct nights far past the generated data so every run succeeds
+    room_no = conn.execute("SELECT room_no FROM rooms ORDER BY room_id LIMIT 1").fetchone()[0]
+    nights = iter(range(10_000))
+    first = ANCHOR + timedelta(days=3650)
+
+    def run():
+        day = first + timedelta(days=next(nights))
+        booking.book_room(conn, room_no, day.isoformat(), (day + timedelta(days=1)).isoformat(), customer_id=1)
+    return run
+
+
+def _kpi_year(conn):
+    # Cold: reload the stays every run, as after a booking
+    def run():
+        kpi.clear_cache()
+        kpi.compute(conn, (ANCHOR - timedelta(days=365)).isoformat(), ANCHOR.isoformat(), "month")
+    return run
+
+
+def _revenue_by_method(conn):
+    year = (ANCHOR - timedelta(days=365)).isoformat(), ANCHOR.isoformat()
+    return lambda: rollup.revenue_by_method(conn, *year)
+
+
+def _revenue_by_method_scan(conn):
+    # The same report straight from the payments table
+    year = (ANCHOR - timedelta(days=365)).isoformat(), ANCHOR.isoformat()
+    return lambda: conn.execute("""
+        SELECT method, SUM(amount), COUNT(*) FROM payments
+        WHERE payment_date BETWEEN ? AND ? GROUP BY method ORDER BY 2 DESC
+    """, year).fetchall()
+
+
+# typeahead.py holds the picker widget too, so it is only imported (with
+# tkinter) when these benchmarks run
+def _typeahead_build(conn):
+    import typeahead
+    return lambda: typeahead.GuestIndex().load(conn)
+
+
+def _typeahead_search(text):
+    def setup(conn):
+        import typeahead
+        index = typeahead.GuestIndex().load(conn)
+        return lambda: index.search(text)
+    return setup
+
+
+BENCHMARKS = {
+    "load_reservations": _page(RESERVATIONS_SELECT, "r.res_id"),
+    "load_reservations_deep_page": _page(RESERVATIONS_SELECT, "r.res_id", "reservations"),
+    "load_payments": _page(PAYMENTS_SELECT, "p.payment_id"),
+    "load_payments_deep_page": _page(PAYMENTS_SELECT, "p.payment_id", "payments"),
+    "search_rooms": _search("rooms", "deluxe"),
+    "search_staff": _search("staff", "recep"),
+    "search_customers": _search("customers", "ali kh"),
+    "dashboard_stats": _dashboard,
+    "dashboard_full_scan": _dashboard_full_scan,
+    "availability_index_build": _availability_build,
+    "availability_free_rooms": _free_rooms,
+    "add_reservation": _add_reservation,
+    "kpi_year_by_month": _kpi_year,
+    "revenue_by_method_rollup": _revenue_by_method,
+    "revenue_by_method_scan": _revenue_by_method_scan,
+    "typeahead_build": _typeahead_build,
+    "typeahead_name": _typeahead_search("ali kh"),
+    "typeahead_phone": _typeahead_search("0300 12"),
+}
+
+
+def measure(fn, repeat=REPEAT, warmup=WARMUP):
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return {
+        "runs": repeat,
+        "min_ms": round(times[0], 3),
+        "median_ms": round(statistics.median(times), 3),
+        "p95_ms": round(times[min(int(0.95 * repeat), repeat - 1)], 3),
+    }
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+def dataset(size, seed=datagen.SEED, regenerate=False):
+    """
+    Path to the database for `size` (a SIZES key), generating it if needed.
+    """
+    path = os.path.join(DATA_DIR, f"hotel-{size}-{seed}.db")
+    if regenerate or not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        datagen.generate(path, SIZES[size], seed, ANCHOR, progress=lambda msg: print(f"  [{size}] {msg}"))
+    else:
+        # Cached datasets may predate newer migrations
+        conn = database.connect(path)
+        try:
+            database.migrate(conn)
+        finally:
+            conn.close()
+    return path
+
+
+def run_size(size, names, repeat=REPEAT, seed=datagen.SEED, regenerate=False):
+    path = dataset(size, seed, regenerate)
+    database.DB_PATH = path
+    availability.invalidate()
+    results = {}
+
+    try:
+        with database.connection() as conn:
+            counts = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+                      for t in ("customers", "rooms", "reservations", "payments", "staff")}
+            for name in names:
+                results[name] = measure(BENCHMARKS[name](conn), repeat)
+                print(f"  {size:>5} {name:<30} {results[name]['median_ms']:>10.3f} ms")
+            # Leave the cached dataset as generated
+            conn.execute("DELETE FROM reservations WHERE check_in >= ?",
+                         ((ANCHOR + timedelta(days=3650)).isoformat(),))
+    finally:
+        database.close_pool()
+    return {"counts": counts, "results": results}
+
+
+def compare(current, previous):
+    """
+    Print median changes against an earlier results file.
+    """
+    for size, data in current["datasets"].items():
+        old = previous.get("datasets", {}).get(size, {}).get("results", {})
+        for name, result in data["results"].items():
+            if name not in old:
+                continue
+            before, after = old[name]["median_ms"], result["median_ms"]
+            change = (after - before) / before * 100 if before else 0.0
+            # Sub-0.05 ms differences are timer noise
+            flag = "  <-- slower" if change > 20 and after - before > 0.05 else ""
+            print(f"  {size:>5} {name:<30} {before:>10.3f} -> {after:>10.3f} ms ({change:+.0f}%){flag}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark page queries on synthetic data")
+    parser.add_argument("--sizes", nargs="+", choices=sorted(SIZES), default=["10k", "100k"])
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run just these benchmarks")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--seed", type=int, default=datagen.SEED)
+    parser.add_argument("--regenerate", action="store_true", help="rebuild cached datasets")
+    parser.add_argument("--out", help="results file (default: benchmark-results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    names = args.only or list(BENCHMARKS)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+        "datasets": {},
+    }
+    for size in args.sizes:
+        report["datasets"][size] = run_size(size, names, args.repeat, args.seed, args.regenerate)
+
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
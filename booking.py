@@ -0,0 +1,182 @@
+# booking.py
+# Booking rules shared by the Tk pages and the API service (api_server.py).
+# Nothing here touches widgets: functions take a connection, commit their own
+# transaction, and raise BookingError for anything the user has to fix.
+#
+# Every write runs in BEGIN IMMEDIATE, which takes the write lock before the
+# availability check. Two desks booking the same room are therefore serialized:
+# the second one re-checks after the first commits and gets Unavailable. If the
+# lock cannot be had within busy_timeout we back off with jitter and try again.
+
+import random
+import sqlite3
+import time
+from datetime import date
+import availability
+import rollup
+
+BUSY_RETRIES = 6
+BACKOFF_BASE = 0.01    # seconds; doubles per attempt, with full jitter
+BACKOFF_MAX = 0.5
+
+
+class BookingError(Exception):
+    """Invalid request (bad dates, missing fields)."""
+
+
+class NotFound(BookingError):
+    """The customer, room, reservation or payment does not exist."""
+
+
+class Unavailable(BookingError):
+    """The room is already booked for some of the requested dates."""
+
+
+class Busy(BookingError):
+    """Other desks held the write lock for too long; nothing was changed."""
+
+
+def _parse_date(value, field):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise BookingError(f"{field} must be YYYY-MM-DD")
+
+
+def _is_busy(exc):
+    return isinstance(exc, sqlite3.OperationalError) and ("locked" in str(exc) or "busy" in str(exc))
+
+
+def write_transaction(conn, fn, *args, retries=BUSY_RETRIES):
+    """
+    Run `fn(conn, *args)` inside BEGIN IMMEDIATE and commit. On SQLITE_BUSY the
+    transaction is rolled back and retried after a jittered backoff, so `fn`
+    must do all of its checks inside the transaction.
+    """
+    if conn.in_transaction:
+        conn.commit()
+
+    for attempt in range(retries + 1):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            result = fn(conn, *args)
+            conn.commit()
+            return result
+        except Exception as exc:
+            if conn.in_transaction:
+                conn.rollback()
+            if not _is_busy(exc):
+                raise
+            if attempt == retries:
+                raise Busy("The database is busy; please try again")
+            time.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)))
+
+
+# -----------------------------
+# Reservations
+# -----------------------------
+def book_room(conn, room_no, check_in, check_out, customer=None, customer_id=None):
+    """
+    Reserve `room_no` for [check_in, check_out) and return the new res_id.
+    The guest is given by customer_id, or by name when the name is unique.
+    """
+    days = (_parse_date(check_out, "check_out") - _parse_date(check_in, "check_in")).days
+    if days <= 0:
+        raise BookingError("Check-out must be after check-in")
+
+    def insert(conn):
+        guest = customer_id
+        if guest is None:
+            rows = conn.execute("SELECT customer_id FROM customers WHERE name=? LIMIT 2", (customer,)).fetchall()
+            if len(rows) > 1:
+                raise BookingError(f"More than one customer is named {customer!r}")
+            guest = rows[0][0] if rows else None
+        elif conn.execute("SELECT 1 FROM customers WHERE customer_id=?", (guest,)).fetchone() is None:
+            guest = None
+        if guest is None:
+            raise NotFound("Customer not found")
+
+        room = conn.execute("SELECT room_id, price FROM rooms WHERE room_no=?", (room_no,)).fetchone()
+        if room is None:
+            raise NotFound("Room not found")
+        room_id, price = room
+
+        # Authoritative check, made while we hold the write lock
+        if availability.has_overlap(conn, room_id, check_in, check_out):
+            raise Unavailable("Room not available for the selected dates")
+
+        cursor = conn.execute("""
+            INSERT INTO reservations
+            (customer_id, room_id, check_in, check_out, total_days, total_cost, status, booked_on)
+            VALUES (?, ?, ?, ?, ?, ?, 'Active', ?)
+        """, (guest, room_id, check_in, check_out, days, days * price, date.today().isoformat()))
+        # Room status reflects today's occupancy only
+        availability.sync_room_status(conn, room_id)
+        rollup.advance(conn)
+        return cursor.lastrowid, room_id
+
+    # The index only fills in the room lists; it never refuses a booking,
+    # since other desks do not tell it when they cancel
+    index = availability.built_index()
+    res_id, room_id = write_transaction(conn, insert)
+    if index is not None:
+        index.add(room_id, check_in, check_out)
+    return res_id
+
+
+def cancel_reservation(conn, res_id):
+    """
+    Delete a reservation and free its dates.
+    """
+    def delete(conn):
+        row = conn.execute("SELECT room_id, check_in, check_out, status FROM reservations WHERE res_id=?",
+                           (res_id,)).fetchone()
+        if row is None:
+            raise NotFound("Reservation not found")
+
+        # Delete reservation, then free the room if nobody else is in it today
+        conn.execute("DELETE FROM reservations WHERE res_id=?", (res_id,))
+        availability.sync_room_status(conn, row[0])
+        return row
+
+    index = availability.built_index()
+    room_id, check_in, check_out, status = write_transaction(conn, delete)
+    if status == "Active" and index is not None:
+        index.remove(room_id, check_in, check_out)
+
+
+# -----------------------------
+# Payments
+# -----------------------------
+def add_payment(conn, res_id, amount, payment_date, method):
+    """
+    Record a payment against a reservation and return the new payment_id.
+    """
+    try:
+        amount = float(amount)
+    except (TypeError, ValueError):
+        raise BookingError("Amount must be a number")
+    if not method:
+        raise BookingError("Payment method is required")
+    if payment_date:
+        _parse_date(payment_date, "payment_date")
+
+    def insert(conn):
+        if conn.execute("SELECT 1 FROM reservations WHERE res_id=?", (res_id,)).fetchone() is None:
+            raise NotFound("Reservation not found")
+        payment_id = conn.execute(
+            "INSERT INTO payments(res_id, amount, payment_date, method) VALUES(?,?,?,?)",
+            (res_id, amount, payment_date, method)
+        ).lastrowid
+        rollup.advance(conn)
+        return payment_id
+
+    return write_transaction(conn, insert)
+
+
+def delete_payment(conn, payment_id):
+    def delete(conn):
+        if conn.execute("DELETE FROM payments WHERE payment_id=?", (payment_id,)).rowcount == 0:
+            raise NotFound("Payment not found")
+
+    write_transaction(conn, delete)
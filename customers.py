@@ -1,8 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
-
-DB_NAME = "hotel.db"
+import database
+import events
+import search
+import virtual_table
 
 # -------------------------------------------
 # Function to load the CUSTOMER PAGE inside main_area
@@ -15,6 +16,13 @@ def customer_page(frame):
     # Page title
     tk.Label(frame, text="Customer Management", font=("Arial", 20, "bold"), bg="#ecf0f1").pack(pady=15)
 
+    # Search Frame (name, phone, nationality or address; filters as you type)
+    search_frame = tk.Frame(frame, bg="#ecf0f1")
+    search_frame.pack(pady=5)
+    tk.Label(search_frame, text="Search:", bg="#ecf0f1").grid(row=0, column=0, padx=5)
+    search_var = tk.Entry(search_frame, width=30)
+    search_var.grid(row=0, column=1, padx=5)
+
     # Table Frame
     table_frame = tk.Frame(frame, bg="#ecf0f1")
     table_frame.pack(pady=10)
@@ -31,6 +39,7 @@ def customer_page(frame):
 
     # Load data initially
     load_customers(tree)
+    search.debounce(search_var, lambda: search_customers(tree, search_var))
 
     # Buttons Frame
     btn_frame = tk.Frame(frame, bg="#ecf0f1")
@@ -41,23 +50,32 @@ def customer_page(frame):
     tk.Button(btn_frame, text="Delete Customer", width=15, command=lambda: delete_customer(tree)).grid(row=0, column=2, padx=10)
     tk.Button(btn_frame, text="Refresh", width=15, command=lambda: load_customers(tree)).grid(row=0, column=3, padx=10)
 
+    # Called by the page manager when customers changed while the page was hidden
+    return lambda: search_customers(tree, search_var)
+
 
 # -------------------------------------------
 # FETCH ALL CUSTOMERS
 # -------------------------------------------
-def load_customers(tree):
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
+def customers_table(tree):
+    return virtual_table.attach(tree, "SELECT * FROM customers", "customer_id")
 
-    cur.execute("SELECT * FROM customers")
-    rows = cur.fetchall()
 
-    tree.delete(*tree.get_children())  # Clear table
+def load_customers(tree):
+    # Only the visible window is fetched; more pages load while scrolling
+    customers_table(tree).load()
 
-    for row in rows:
-        tree.insert("", "end", values=row)
 
-    conn.close()
+# -------------------------------------------
+# SEARCH CUSTOMERS
+# -------------------------------------------
+def search_customers(tree, search_var):
+    val = search_var.get()
+    if not val.strip():
+        load_customers(tree)
+        return
+
+    customers_table(tree).show_query(lambda conn: search.search(conn, "customers", val))
 
 
 # -------------------------------------------
@@ -80,18 +98,19 @@ def add_customer(tree):
     def save_customer():
         values = [e.get() for e in entries]
 
-        conn = sqlite3.connect(DB_NAME)
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO customers (name, phone, nationality, gender, dob, address)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, values)
-        conn.commit()
-        conn.close()
+        table = customers_table(tree)
+        with database.connection() as conn:
+            cur = conn.execute("""
+                INSERT INTO customers (name, phone, nationality, gender, dob, address)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, values)
+            customer_id = cur.lastrowid
+            row = table.fetch_row(conn, customer_id)
 
+        events.publish("customers", customer_id)
         messagebox.showinfo("Success", "Customer added successfully!")
         add_win.destroy()
-        load_customers(tree)
+        table.apply(customer_id, row)
 
     tk.Button(add_win, text="Save", width=20, command=save_customer).pack(pady=20)
 
@@ -125,21 +144,19 @@ def edit_customer(tree):
     def update_customer():
         updated_vals = [e.get() for e in entries]
 
-        conn = sqlite3.connect(DB_NAME)
-        cur = conn.cursor()
-
-        cur.execute("""
-            UPDATE customers
-            SET name=?, phone=?, nationality=?, gender=?, dob=?, address=?
-            WHERE customer_id=?
-        """, updated_vals + [customer_id])
-
-        conn.commit()
-        conn.close()
+        table = customers_table(tree)
+        with database.connection() as conn:
+            conn.execute("""
+                UPDATE customers
+                SET name=?, phone=?, nationality=?, gender=?, dob=?, address=?
+                WHERE customer_id=?
+            """, updated_vals + [customer_id])
+            row = table.fetch_row(conn, customer_id)
 
+        events.publish("customers", customer_id)
         messagebox.showinfo("Success", "Customer updated successfully!")
         edit_win.destroy()
-        load_customers(tree)
+        table.apply(customer_id, row)
 
     tk.Button(edit_win, text="Update", width=20, command=update_customer).pack(pady=20)
 
@@ -160,11 +177,10 @@ def delete_customer(tree):
     if not confirm:
         return
 
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("DELETE FROM customers WHERE customer_id=?", (customer_id,))
-    conn.commit()
-    conn.close()
+    with database.connection() as conn:
+        conn.execute("DELETE FROM customers WHERE customer_id=?", (customer_id,))
+    events.publish("customers", customer_id)
+    events.publish("reservations")   # their bookings go with them (ON DELETE CASCADE)
 
     messagebox.showinfo("Deleted", "Customer deleted successfully!")
-    load_customers(tree)
+    customers_table(tree).apply(customer_id, None)
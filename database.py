@@ -2,100 +2,514 @@
 # Step 2: Full Database Setup for Hotel Management System
 # Author: You
 # Description: Connects to SQLite, creates tables, and inserts sample data.
+#              Also owns the shared connection pool used by every page module.
 
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
+import passwords
+import query_trace
+
+DB_PATH = "hotel.db"
+POOL_SIZE = 4
+
+# Applied to every connection we open. WAL lets readers and the writer work
+# side by side; synchronous=NORMAL is safe with WAL and avoids an fsync per commit.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA cache_size = -16000",      # ~16 MB page cache per connection
+    "PRAGMA mmap_size = 268435456",    # 256 MB memory-mapped reads
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
 
 # -----------------------------
 # Step 1: Connect to SQLite DB
 # -----------------------------
-def connect():
+def _open(path):
+    conn = sqlite3.connect(path, timeout=5, check_same_thread=False, factory=query_trace.factory())
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def connect(path=None):
+    """
+    Connect to SQLite database (hotel.db, or `path`).
+    Returns a standalone connection object with the tuned PRAGMAs applied.
     """
-    Connect to SQLite database (hotel.db).
-    Returns the connection object.
+    return _open(path or DB_PATH)
+
+
+def connect_readonly(path=None):
+    """
+    Read-only connection to the database (hotel.db, or `path`), for reports
+    that must not take the write lock or change anything.
     """
-    conn = sqlite3.connect("hotel.db")
-    # Enable foreign key support in SQLite
-    conn.execute("PRAGMA foreign_keys = ON;")
+    conn = sqlite3.connect(f"file:{path or DB_PATH}?mode=ro", uri=True, timeout=5,
+                           check_same_thread=False, factory=query_trace.factory())
+    for pragma in PRAGMAS:
+        if "journal_mode" not in pragma:    # switching modes would write
+            conn.execute(pragma)
     return conn
 
+
+# Called as hook(conn, path) for each pooled connection: open hooks right
+# after it is opened, release hooks whenever it goes back to the pool, once
+# its work has been committed or rolled back. journal.py uses them.
+POOL_OPEN_HOOKS = []
+POOL_RELEASE_HOOKS = []
+
+
+class ConnectionPool:
+    """
+    Small pool of long-lived connections.
+    Connections are opened lazily up to `size`; callers block when all are busy.
+    """
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._created < self.size
+            if can_open:
+                self._created += 1
+
+        if not can_open:
+            return self._idle.get()
+
+        conn = None
+        try:
+            conn = _open(self.path)
+            for hook in POOL_OPEN_HOOKS:
+                hook(conn, self.path)
+            return conn
+        except Exception:
+            if conn is not None:
+                conn.close()
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        for hook in POOL_RELEASE_HOOKS:
+            hook(conn, self.path)
+        self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Return the process-wide pool for DB_PATH, creating it on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+
+def close_pool():
+    """
+    Close the pool's idle connections and forget it; the next use opens a new
+    pool for the current DB_PATH.
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+@contextmanager
+def connection():
+    """
+    Borrow a pooled connection.
+    Commits when the block finishes normally, rolls back if it raises.
+
+        with database.connection() as conn:
+            conn.execute("UPDATE rooms SET status=? WHERE room_id=?", (status, room_id))
+    """
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        pool.release(conn)
+
 # -----------------------------
-# Step 2: Create Tables
+# Step 2: Schema Migrations
 # -----------------------------
+# Ground truth for the dashboard counters stored in the stats table
+STATS_QUERIES = {
+    "customers": "SELECT COUNT(*) FROM customers",
+    "available_rooms": "SELECT COUNT(*) FROM rooms WHERE status='Available'",
+    "active_reservations": "SELECT COUNT(*) FROM reservations WHERE status='Active'",
+    "total_payments": "SELECT COALESCE(SUM(amount), 0) FROM payments",
+}
+
+
+def _stats_trigger(table, event, stat, delta):
+    """
+    DDL for a trigger that adds `delta` to stats[`stat`] after `event` on `table`.
+    """
+    name = f"stats_{table}_{event.split()[0].lower()}"
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} BEGIN
+            UPDATE stats SET value = value + ({delta}) WHERE name = '{stat}';
+        END"""
+
+
+def _fts_statements(table, key, columns):
+    """
+    DDL for an external-content FTS5 index over `table`, kept in sync by triggers.
+    """
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new_vals = ", ".join(f"new.{c}" for c in columns)
+    old_vals = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{table}', content_rowid='{key}', prefix='2 3'
+        )""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.{key}, {new_vals});
+        END""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{key}, {old_vals});
+        END""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{key}, {old_vals});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.{key}, {new_vals});
+        END""",
+        # Index rows that existed before the triggers
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _version_triggers(table):
+    """
+    DDL for triggers that bump table_versions[`table`] on every change to it.
+    """
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS version_{table}_{event.lower()} AFTER {event} ON {table} BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+        END"""
+        for event in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+
+VERSIONED_TABLES = ("customers", "rooms", "reservations", "payments", "staff")
+
+
+def _rollup_statements():
+    """
+    DDL for the daily rollups (see rollup.py). New rows are folded in by
+    rollup.advance() up to a high-water mark; these triggers correct the
+    rollups when a row at or below the mark is updated or deleted.
+    """
+    paid = "(SELECT last_id FROM rollup_marks WHERE name = 'payments')"
+    booked = "(SELECT last_id FROM rollup_marks WHERE name = 'reservations')"
+
+    def unpay(row):
+        return f"""
+            UPDATE daily_revenue SET amount = amount - COALESCE({row}.amount, 0), payments = payments - 1
+            WHERE day = COALESCE({row}.payment_date, '') AND method = COALESCE({row}.method, '');"""
+
+    def pay(row):
+        return f"""
+            INSERT INTO daily_revenue (day, method, amount, payments)
+            VALUES (COALESCE({row}.payment_date, ''), COALESCE({row}.method, ''), COALESCE({row}.amount, 0), 1)
+            ON CONFLICT (day, method) DO UPDATE
+            SET amount = amount + excluded.amount, payments = payments + excluded.payments;"""
+
+    def unbook(row):
+        return f"""
+            UPDATE daily_reservations SET arrivals = arrivals - ({row}.status IS NOT 'Cancelled')
+            WHERE day = {row}.check_in;
+            UPDATE daily_reservations SET departures = departures - ({row}.status IS NOT 'Cancelled')
+            WHERE day = {row}.check_out;
+            UPDATE daily_reservations SET booked = booked - 1 WHERE day = {row}.booked_on;"""
+
+    def book(row):
+        return f"""
+            INSERT INTO daily_reservations (day, arrivals) VALUES ({row}.check_in, {row}.status IS NOT 'Cancelled')
+            ON CONFLICT (day) DO UPDATE SET arrivals = arrivals + excluded.arrivals;
+            INSERT INTO daily_reservations (day, departures) VALUES ({row}.check_out, {row}.status IS NOT 'Cancelled')
+            ON CONFLICT (day) DO UPDATE SET departures = departures + excluded.departures;
+            INSERT INTO daily_reservations (day, booked) SELECT {row}.booked_on, 1 WHERE {row}.booked_on IS NOT NULL
+            ON CONFLICT (day) DO UPDATE SET booked = booked + excluded.booked;"""
+
+    return [
+        "ALTER TABLE reservations ADD COLUMN booked_on TEXT",
+        """
+        CREATE TABLE IF NOT EXISTS daily_revenue (
+            day TEXT NOT NULL,
+            method TEXT NOT NULL,
+            amount NUMERIC NOT NULL DEFAULT 0,
+            payments INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, method)
+        ) WITHOUT ROWID""",
+        """
+        CREATE TABLE IF NOT EXISTS daily_reservations (
+            day TEXT PRIMARY KEY,
+            arrivals INTEGER NOT NULL DEFAULT 0,
+            departures INTEGER NOT NULL DEFAULT 0,
+            booked INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID""",
+        """
+        CREATE TABLE IF NOT EXISTS rollup_marks (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0
+        )""",
+        "INSERT OR IGNORE INTO rollup_marks (name) VALUES ('payments'), ('reservations')",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS rollup_payments_delete AFTER DELETE ON payments
+        WHEN old.payment_id <= {paid} BEGIN {unpay("old")}
+        END""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS rollup_payments_update AFTER UPDATE OF amount, payment_date, method ON payments
+        WHEN old.payment_id <= {paid} BEGIN {unpay("old")} {pay("new")}
+        END""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS rollup_reservations_delete AFTER DELETE ON reservations
+        WHEN old.res_id <= {booked} BEGIN {unbook("old")}
+        END""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS rollup_reservations_update
+        AFTER UPDATE OF check_in, check_out, status, booked_on ON reservations
+        WHEN old.res_id <= {booked} BEGIN {unbook("old")} {book("new")}
+        END""",
+    ]
+
+
+# Each entry upgrades the schema by one version. PRAGMA user_version stores the
+# last version applied, so startup only runs DDL when the file is out of date.
+# Append new migrations at the end; never edit one that has shipped.
+MIGRATIONS = [
+    # 1: base tables
+    [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS customers (
+            customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone TEXT,
+            nationality TEXT,
+            gender TEXT,
+            dob TEXT,
+            address TEXT
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS rooms (
+            room_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            room_no TEXT UNIQUE NOT NULL,
+            room_type TEXT,
+            bed TEXT,
+            price INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'Available'
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS reservations (
+            res_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER NOT NULL,
+            room_id INTEGER NOT NULL,
+            check_in TEXT NOT NULL,
+            check_out TEXT NOT NULL,
+            total_days INTEGER,
+            total_cost INTEGER,
+            status TEXT DEFAULT 'Active',
+            FOREIGN KEY (customer_id) REFERENCES customers(customer_id) ON DELETE CASCADE,
+            FOREIGN KEY (room_id) REFERENCES rooms(room_id) ON DELETE CASCADE
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS staff (
+            staff_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            phone TEXT,
+            role TEXT,
+            salary INTEGER
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS payments (
+            payment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            res_id INTEGER,
+            amount INTEGER,
+            payment_date TEXT,
+            method TEXT,
+            FOREIGN KEY (res_id) REFERENCES reservations(res_id) ON DELETE SET NULL
+        )""",
+    ],
+    # 2: secondary indexes for joins, availability checks and lookups
+    [
+        "CREATE INDEX IF NOT EXISTS idx_reservations_room_dates ON reservations(room_id, check_in, check_out)",
+        "CREATE INDEX IF NOT EXISTS idx_reservations_customer ON reservations(customer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_res ON payments(res_id)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_date ON payments(payment_date)",
+        "CREATE INDEX IF NOT EXISTS idx_customers_name ON customers(name)",
+        "CREATE INDEX IF NOT EXISTS idx_customers_phone ON customers(phone)",
+        # Only active bookings matter for availability and the dashboard count
+        """
+        CREATE INDEX IF NOT EXISTS idx_reservations_active
+        ON reservations(room_id, check_in, check_out) WHERE status='Active'
+        """,
+        "ANALYZE",
+    ],
+    # 3: full-text search (see search.py)
+    _fts_statements("customers", "customer_id", ("name", "phone", "nationality", "address"))
+    + _fts_statements("rooms", "room_id", ("room_no", "room_type"))
+    + _fts_statements("staff", "staff_id", ("name", "role")),
+    # 4: dashboard counters kept current by triggers (see read_stats/rebuild_stats)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS stats (
+            name TEXT PRIMARY KEY,
+            value NUMERIC NOT NULL DEFAULT 0
+        )""",
+        f"""
+        INSERT OR REPLACE INTO stats (name, value) VALUES
+            ('customers', ({STATS_QUERIES["customers"]})),
+            ('available_rooms', ({STATS_QUERIES["available_rooms"]})),
+            ('active_reservations', ({STATS_QUERIES["active_reservations"]})),
+            ('total_payments', ({STATS_QUERIES["total_payments"]}))
+        """,
+        _stats_trigger("customers", "INSERT", "customers", "1"),
+        _stats_trigger("customers", "DELETE", "customers", "-1"),
+        _stats_trigger("rooms", "INSERT", "available_rooms", "(new.status='Available')"),
+        _stats_trigger("rooms", "DELETE", "available_rooms", "-(old.status='Available')"),
+        _stats_trigger("rooms", "UPDATE OF status", "available_rooms",
+                       "(new.status='Available') - (old.status='Available')"),
+        _stats_trigger("reservations", "INSERT", "active_reservations", "(new.status='Active')"),
+        _stats_trigger("reservations", "DELETE", "active_reservations", "-(old.status='Active')"),
+        _stats_trigger("reservations", "UPDATE OF status", "active_reservations",
+                       "(new.status='Active') - (old.status='Active')"),
+        _stats_trigger("payments", "INSERT", "total_payments", "COALESCE(new.amount, 0)"),
+        _stats_trigger("payments", "DELETE", "total_payments", "-COALESCE(old.amount, 0)"),
+        _stats_trigger("payments", "UPDATE OF amount", "total_payments",
+                       "COALESCE(new.amount, 0) - COALESCE(old.amount, 0)"),
+    ],
+    # 5: per-table change counters, so open pages know when to refresh (see pages.py)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )""",
+        "INSERT OR IGNORE INTO table_versions (name) VALUES "
+        + ", ".join(f"('{table}')" for table in VERSIONED_TABLES),
+    ]
+    + [statement for table in VERSIONED_TABLES for statement in _version_triggers(table)],
+    # 6: daily revenue and arrivals/departures/bookings rollups (see rollup.py)
+    _rollup_statements(),
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn):
+    """
+    Bring the schema up to SCHEMA_VERSION.
+    Every migration runs in its own transaction together with its user_version bump.
+    Returns the version the database is at afterwards.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    for number in range(version + 1, SCHEMA_VERSION + 1):
+        conn.execute("BEGIN")
+        try:
+            for statement in MIGRATIONS[number - 1]:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = number
+
+    return version
+
+
 def create_tables(conn):
     """
     Create all required tables for Hotel Management System.
     """
-    cursor = conn.cursor()
+    version = migrate(conn)
+    print(f"Tables created successfully (schema version {version}).")
 
-    # Users table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL
-    )""")
+# -----------------------------
+# Dashboard Counters
+# -----------------------------
+def read_stats(conn):
+    """
+    Return the precomputed dashboard counters as {name: value}.
+    """
+    return dict(conn.execute("SELECT name, value FROM stats"))
 
-    # Customers table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS customers (
-        customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        phone TEXT,
-        nationality TEXT,
-        gender TEXT,
-        dob TEXT,
-        address TEXT
-    )""")
-
-    # Rooms table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS rooms (
-        room_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        room_no TEXT UNIQUE NOT NULL,
-        room_type TEXT,
-        bed TEXT,
-        price INTEGER NOT NULL,
-        status TEXT NOT NULL DEFAULT 'Available'
-    )""")
-
-    # Reservations table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS reservations (
-        res_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        customer_id INTEGER NOT NULL,
-        room_id INTEGER NOT NULL,
-        check_in TEXT NOT NULL,
-        check_out TEXT NOT NULL,
-        total_days INTEGER,
-        total_cost INTEGER,
-        status TEXT DEFAULT 'Active',
-        FOREIGN KEY (customer_id) REFERENCES customers(customer_id) ON DELETE CASCADE,
-        FOREIGN KEY (room_id) REFERENCES rooms(room_id) ON DELETE CASCADE
-    )""")
-
-    # Staff table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS staff (
-        staff_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        phone TEXT,
-        role TEXT,
-        salary INTEGER
-    )""")
-
-    # Payments table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS payments (
-        payment_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        res_id INTEGER,
-        amount INTEGER,
-        payment_date TEXT,
-        method TEXT,
-        FOREIGN KEY (res_id) REFERENCES reservations(res_id) ON DELETE SET NULL
-    )""")
 
+def read_versions(conn):
+    """
+    Return {table: version}; a table's version goes up whenever its rows change.
+    """
+    return dict(conn.execute("SELECT name, version FROM table_versions"))
+
+
+def rebuild_stats(conn):
+    """
+    Recompute every counter from the base tables.
+    Returns {name: (stored, actual)} for counters that had drifted.
+    """
+    stored = read_stats(conn)
+    drift = {}
+    for name, query in STATS_QUERIES.items():
+        actual = conn.execute(query).fetchone()[0]
+        if stored.get(name) != actual:
+            drift[name] = (stored.get(name), actual)
+        conn.execute("INSERT OR REPLACE INTO stats (name, value) VALUES (?, ?)", (name, actual))
     conn.commit()
-    print("Tables created successfully.")
+    return drift
+
 
 # -----------------------------
 # Step 3: Insert Sample Data
@@ -107,12 +521,9 @@ def insert_sample_data(conn):
     cursor = conn.cursor()
 
     # Sample Users
-    cursor.execute("""
-        INSERT OR IGNORE INTO users (username, password)
-        VALUES 
-        ('admin', 'admin123'),
-        ('staff', 'staff123')
-    """)
+    cursor.executemany("INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)",
+                       [("admin", passwords.hash_password("admin123")),
+                        ("staff", passwords.hash_password("staff123"))])
 
     # Sample Rooms
     cursor.execute("""
@@ -153,12 +564,27 @@ def insert_sample_data(conn):
 # Step 4: Initialize Database
 # -----------------------------
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Set up or maintain hotel.db")
+    parser.add_argument("--rebuild-stats", action="store_true",
+                        help="recompute the dashboard counters and report any drift")
+    args = parser.parse_args()
+
     # Connect to DB
     conn = connect()
 
     # Create tables
     create_tables(conn)
 
+    if args.rebuild_stats:
+        drift = rebuild_stats(conn)
+        for name, (stored, actual) in drift.items():
+            print(f"{name}: stored {stored}, actual {actual}")
+        print(f"Stats rebuilt ({len(drift)} counter(s) had drifted).")
+        conn.close()
+        raise SystemExit(0)
+
     # Insert sample/demo data
     insert_sample_data(conn)
 
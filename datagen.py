@@ -0,0 +1,236 @@
+# datagen.py
+# Deterministic synthetic hotel data for benchmarks and load testing.
+#
+#   python datagen.py bench-100k.db --reservations 100000 --seed 42
+#
+# The same seed and anchor date always produce the same database. Sizes scale
+# from the reservation count: about one customer per two stays, one room per
+# 250 stays (20 to 5000), 1.2 payments per stay and one staff member per 500.
+#
+# Each room gets its own timeline of non-overlapping stays, busier in summer and
+# December and starting more often on Fridays, running from a few years back to
+# a few months past the anchor. Stays that ended are Completed, about 4% are
+# Cancelled, the rest Active.
+
+import os
+import random
+import time
+from datetime import date, timedelta
+import availability
+import database
+import import_data
+import rollup
+
+SEED = 42
+BATCH_SIZE = 50000
+OCCUPANCY = 0.7          # share of room-nights booked over the generated span
+FUTURE_DAYS = 120        # how far past the anchor bookings run
+ROOMS_PER_FLOOR = 40
+FRIDAY_SHARE = 0.3       # stays moved to start on the next Friday
+
+FIRST_NAMES = ["Ali", "Sara", "Ahmed", "Fatima", "Usman", "Ayesha", "Bilal", "Zainab", "Hassan", "Maryam",
+               "Omar", "Hira", "Imran", "Sana", "Kamran", "Nadia", "Faisal", "Amna", "Tariq", "Mehwish",
+               "John", "Emma", "David", "Olivia", "Wei", "Mei", "Raj", "Priya", "Carlos", "Lucia"]
+LAST_NAMES = ["Khan", "Ahmed", "Malik", "Hussain", "Sheikh", "Qureshi", "Butt", "Chaudhry", "Raza", "Siddiqui",
+              "Smith", "Brown", "Wang", "Li", "Patel", "Sharma", "Garcia", "Lopez", "Rossi", "Muller"]
+NATIONALITIES = [("Pakistani", 70), ("British", 6), ("American", 5), ("Chinese", 5), ("Indian", 4),
+                 ("Emirati", 4), ("Saudi", 3), ("German", 3)]
+CITIES = ["Lahore", "Karachi", "Islamabad", "Rawalpindi", "Faisalabad", "Multan", "Peshawar", "Quetta",
+          "London", "Dubai", "New York", "Beijing"]
+ROOM_TYPES = [("Single", "Single", 3000, 40), ("Double", "Double", 4500, 40), ("Deluxe", "King", 7000, 20)]
+STAY_NIGHTS = [(1, 30), (2, 25), (3, 18), (4, 10), (5, 6), (7, 6), (10, 3), (14, 2)]
+METHODS = [("Card", 55), ("Cash", 25), ("Online", 20)]
+STAFF_ROLES = [("Receptionist", 45000, 30), ("Housekeeping", 32000, 35), ("Maintenance", 38000, 10),
+               ("Chef", 60000, 10), ("Security", 35000, 10), ("Manager", 120000, 5)]
+HIGH_SEASON = {6, 7, 8, 12}
+
+
+def _weighted(rng, choices):
+    """Build a sampler over [(value..., weight)] tuples."""
+    values = [c[:-1] if len(c) > 2 else c[0] for c in choices]
+    weights = [c[-1] for c in choices]
+    return lambda: rng.choices(values, weights)[0]
+
+
+def sizes(reservations):
+    return {
+        "customers": max(reservations // 2, 10),
+        "rooms": min(max(reservations // 250, 20), 5000),
+        "reservations": reservations,
+        "staff": max(reservations // 500, 10),
+    }
+
+
+# -----------------------------
+# Row generators
+# -----------------------------
+def customers(rng, count):
+    nationality = _weighted(rng, NATIONALITIES)
+    for _ in range(count):
+        born = date(1950, 1, 1) + timedelta(days=rng.randrange(20000))
+        yield (f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+               f"03{rng.randrange(10 ** 9):09d}", nationality(),
+               rng.choice(("Male", "Female")), born.isoformat(), rng.choice(CITIES))
+
+
+def rooms(rng, count):
+    room_type = _weighted(rng, ROOM_TYPES)
+    for i in range(count):
+        kind, bed, price = room_type()
+        room_no = f"{i // ROOMS_PER_FLOOR + 1}{i % ROOMS_PER_FLOOR + 1:02d}"
+        yield (room_no, kind, bed, price + rng.randrange(-5, 6) * 100, "Available")
+
+
+def staff(rng, count):
+    role = _weighted(rng, STAFF_ROLES)
+    for _ in range(count):
+        title, salary = role()
+        yield (f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"03{rng.randrange(10 ** 9):09d}",
+               title, salary + rng.randrange(-10, 11) * 500)
+
+
+def stays(rng, count, room_prices, customer_count, anchor):
+    """
+    Return `count` stays as (booked_on, room_id, check_in, nights, customer_id, status),
+    ordered by booking date so res_id grows the way it would in real use.
+    Dates are ordinals to keep a million rows small in memory. A busy room
+    may run a little past the end of the span rather than overlap itself.
+    """
+    nights = _weighted(rng, STAY_NIGHTS)
+    room_ids = list(room_prices)
+    mean_nights = sum(n * w for n, w in STAY_NIGHTS) / sum(w for _, w in STAY_NIGHTS)
+    per_room = count / len(room_ids)
+    span = int(per_room * mean_nights / OCCUPANCY) + 1
+    # The Friday nudge adds about three days on average; take it out of the gap
+    mean_gap = max(span / per_room - mean_nights - FRIDAY_SHARE * 3, 0.5)
+
+    end = anchor.toordinal() + FUTURE_DAYS
+    start = end - span
+    today = anchor.toordinal()
+    result = []
+
+    for i, room_id in enumerate(room_ids):
+        # Spread the remainder so the total comes out exact
+        quota = int(per_room * (i + 1)) - int(per_room * i)
+        day = start + rng.randrange(max(int(mean_gap), 1) + 1)
+        for _ in range(quota):
+            stay = nights()
+            if rng.random() < FRIDAY_SHARE:
+                day += (4 - date.fromordinal(day).weekday()) % 7      # nudge to Friday
+            booked_on = day - int(rng.expovariate(1 / 21))          # lead time, mean 3 weeks
+            status = "Cancelled" if rng.random() < 0.04 else ("Completed" if day + stay <= today else "Active")
+            result.append((booked_on, room_id, day, stay, int(customer_count * rng.random() ** 1.6) + 1, status))
+
+            # Shorter gaps in high season; the factors average to 1 over a year
+            gap = mean_gap * (0.5 if date.fromordinal(day).month in HIGH_SEASON else 1.25)
+            day += stay + round(rng.expovariate(1 / gap))
+
+    result.sort()
+    return result
+
+
+def reservation_rows(stay_list, room_prices):
+    for booked_on, room_id, day, stay, customer_id, status in stay_list:
+        yield (customer_id, room_id, date.fromordinal(day).isoformat(),
+               date.fromordinal(day + stay).isoformat(), stay, stay * room_prices[room_id], status,
+               date.fromordinal(booked_on).isoformat())
+
+
+def payment_rows(rng, stay_list, room_prices, anchor):
+    """
+    Completed stays are paid in full (sometimes split), current stays have a
+    deposit, and most future stays a smaller one. Cancelled stays pay nothing.
+    """
+    method = _weighted(rng, METHODS)
+    today = anchor.toordinal()
+    for res_id, (booked_on, room_id, day, stay, _, status) in enumerate(stay_list, 1):
+        total = stay * room_prices[room_id]
+        if status == "Cancelled":
+            continue
+        if status == "Completed":
+            if rng.random() < 0.15:
+                deposit = total * 3 // 10
+                yield (res_id, deposit, date.fromordinal(booked_on).isoformat(), method())
+                yield (res_id, total - deposit, date.fromordinal(day + stay).isoformat(), method())
+            else:
+                yield (res_id, total, date.fromordinal(day + stay).isoformat(), method())
+        elif day <= today:
+            yield (res_id, total // 2, date.fromordinal(day).isoformat(), method())
+        elif rng.random() < 0.6:
+            yield (res_id, total * 3 // 10, date.fromordinal(min(booked_on, today)).isoformat(), method())
+
+
+# -----------------------------
+# Writer
+# -----------------------------
+def _write(conn, table, columns, rows, batch_size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            import_data.insert_batch(conn, table, columns, batch)
+            batch = []
+    if batch:
+        import_data.insert_batch(conn, table, columns, batch)
+
+
+def generate(path, reservations, seed=SEED, anchor=None, progress=print):
+    """
+    Create a fresh database at `path` (replacing any file there) and fill it.
+    Returns the row counts per table.
+    """
+    anchor = anchor or date.today()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    conn = database.connect(path)
+    database.migrate(conn)
+    counts = sizes(reservations)
+    started = time.perf_counter()
+
+    # Separate streams per table, so changing one size leaves the others alone
+    progress(f"customers: {counts['customers']}")
+    _write(conn, "customers", import_data.CustomerImporter.columns,
+           customers(random.Random(f"{seed}-customers"), counts["customers"]))
+
+    progress(f"rooms: {counts['rooms']}")
+    _write(conn, "rooms", import_data.RoomImporter.columns, rooms(random.Random(f"{seed}-rooms"), counts["rooms"]))
+    room_prices = dict(conn.execute("SELECT room_id, price FROM rooms"))
+
+    progress(f"staff: {counts['staff']}")
+    _write(conn, "staff", ("name", "phone", "role", "salary"), staff(random.Random(f"{seed}-staff"), counts["staff"]))
+
+    progress(f"reservations: {reservations}")
+    stay_list = stays(random.Random(f"{seed}-stays"), reservations, room_prices, counts["customers"], anchor)
+    _write(conn, "reservations", import_data.ReservationImporter.columns, reservation_rows(stay_list, room_prices))
+
+    progress("payments")
+    _write(conn, "payments", import_data.PaymentImporter.columns,
+           payment_rows(random.Random(f"{seed}-payments"), stay_list, room_prices, anchor))
+    del stay_list
+
+    availability.sync_room_status(conn, today=anchor.isoformat())
+    conn.execute("ANALYZE")
+    conn.commit()
+    rollup.catch_up(conn)
+
+    counts["payments"] = conn.execute("SELECT COUNT(*) FROM payments").fetchone()[0]
+    conn.close()
+    progress(f"done in {time.perf_counter() - started:.1f}s")
+    return counts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic hotel database")
+    parser.add_argument("path", help="database file to create (replaced if it exists)")
+    parser.add_argument("--reservations", type=int, default=10000, help="dataset size, e.g. 10000, 100000, 1000000")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--anchor", type=date.fromisoformat, help="treat this date as today (default: today)")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.path) == os.path.abspath(database.DB_PATH):
+        parser.error("refusing to overwrite the live database")
+    print(generate(args.path, args.reservations, args.seed, args.anchor))
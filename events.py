@@ -0,0 +1,101 @@
+# events.py
+# In-process change notifications between pages.
+#
+# Code that writes to the database calls publish(table, key) for each row it
+# changed (key=None when it cannot say which rows). Pages call
+# subscribe(owner, tables, callback) for the tables they display. Events are
+# collected until Tk is next idle and then delivered once per subscriber as
+#
+#   {table: frozenset of keys, or None for "any row"}
+#
+# so a booking that touches a reservation, a room and the counters causes one
+# refresh per interested view, not one per statement. Subscriptions end when
+# their owner widget is destroyed.
+#
+# publish() and subscribe() must be called on the Tk thread. Changes made by
+# other processes (another desk, the booking service) are not seen here; the
+# page manager's table_versions check covers those.
+
+import tkinter as tk
+import traceback
+
+
+class Subscription:
+    def __init__(self, owner, tables, callback):
+        self.owner = owner
+        self.tables = frozenset(tables)
+        self.callback = callback
+
+
+_subscriptions = []
+_pending = {}          # table -> set of keys, or None once any-row was published
+_scheduled_on = None   # widget whose after_idle will deliver _pending
+
+
+def _exists(widget):
+    try:
+        return bool(widget.winfo_exists())
+    except tk.TclError:
+        return False
+
+
+def subscribe(owner, tables, callback):
+    """
+    Call callback(changes) after any of `tables` changed, while `owner` exists.
+    """
+    subscription = Subscription(owner, tables, callback)
+    _subscriptions.append(subscription)
+    return subscription
+
+
+def unsubscribe(subscription):
+    if subscription in _subscriptions:
+        _subscriptions.remove(subscription)
+
+
+def publish(table, key=None):
+    """
+    Record that row `key` of `table` (or, with no key, any of its rows) changed.
+    """
+    if key is None:
+        _pending[table] = None
+    else:
+        keys = _pending.setdefault(table, set())
+        if keys is not None:
+            keys.add(key)
+    _schedule()
+
+
+def _schedule():
+    global _scheduled_on
+    if _scheduled_on is not None and _exists(_scheduled_on):
+        return
+    _scheduled_on = None
+    for subscription in list(_subscriptions):
+        if _exists(subscription.owner):
+            # The toplevel outlives any one page, so the callback is not lost
+            _scheduled_on = subscription.owner.winfo_toplevel()
+            _scheduled_on.after_idle(_flush)
+            return
+        _subscriptions.remove(subscription)
+    # Nobody is listening (e.g. a command-line tool)
+    _pending.clear()
+
+
+def _flush():
+    global _scheduled_on
+    _scheduled_on = None
+    changes = {table: None if keys is None else frozenset(keys) for table, keys in _pending.items()}
+    _pending.clear()
+
+    for subscription in list(_subscriptions):
+        if not _exists(subscription.owner):
+            unsubscribe(subscription)
+            continue
+        mine = {table: keys for table, keys in changes.items() if table in subscription.tables}
+        if mine:
+            # One failing view must not keep the others stale
+            try:
+                subscription.callback(mine)
+            except Exception:
+                traceback.print_exc()
@@ -0,0 +1,162 @@
+# export_data.py
+# Streaming export of payments, reservations and customers to CSV or JSON Lines.
+#
+#   python export_data.py payments payments-2025.csv --from 2025-01-01 --to 2025-12-31
+#   python export_data.py reservations - --status Active --format jsonl
+#
+# Rows are pulled with cursor.fetchmany and written as they arrive, so memory
+# use stays flat however many rows match.
+
+import csv
+import json
+import sys
+import time
+import database
+
+FETCH_SIZE = 5000
+
+# dataset -> (query, date column, status column, ORDER BY)
+EXPORTS = {
+    "payments": ("""
+        SELECT p.payment_id, p.res_id, c.customer_id, c.name AS customer,
+               p.amount, p.payment_date, p.method, r.status AS reservation_status
+        FROM payments p
+        LEFT JOIN reservations r ON p.res_id = r.res_id
+        LEFT JOIN customers c ON r.customer_id = c.customer_id
+    """, "p.payment_date", "r.status", "p.payment_date, p.payment_id"),
+    "reservations": ("""
+        SELECT r.res_id, r.customer_id, c.name AS customer, ro.room_no, ro.room_type,
+               r.check_in, r.check_out, r.total_days, r.total_cost, r.status, r.booked_on
+        FROM reservations r
+        JOIN customers c ON r.customer_id = c.customer_id
+        JOIN rooms ro ON r.room_id = ro.room_id
+    """, "r.check_in", "r.status", "r.check_in, r.res_id"),
+    "customers": ("SELECT * FROM customers", None, None, "customer_id"),
+}
+
+
+class ExportReport:
+    def __init__(self, rows, seconds):
+        self.rows = rows
+        self.seconds = seconds
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return f"{self.rows} rows in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/sec)"
+
+
+def iter_rows(cursor, size=FETCH_SIZE):
+    """
+    Yield rows from `cursor` one fetchmany() batch at a time.
+    """
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+def query(conn, dataset, date_from=None, date_to=None, status=None):
+    """
+    Run the export query for `dataset` with optional filters.
+    Returns (column names, row iterator).
+    """
+    sql, date_column, status_column, order = EXPORTS[dataset]
+    clauses = []
+    params = []
+
+    if date_from or date_to:
+        if date_column is None:
+            raise ValueError(f"{dataset} cannot be filtered by date")
+        if date_from:
+            clauses.append(f"{date_column} >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append(f"{date_column} <= ?")
+            params.append(date_to)
+    if status:
+        if status_column is None:
+            raise ValueError(f"{dataset} cannot be filtered by status")
+        clauses.append(f"{status_column} = ?")
+        params.append(status)
+
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {order}"
+
+    cursor = conn.execute(sql, params)
+    columns = [d[0] for d in cursor.description]
+    return columns, iter_rows(cursor)
+
+
+def write_csv(out, columns, rows):
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_jsonl(out, columns, rows):
+    count = 0
+    for row in rows:
+        out.write(json.dumps(dict(zip(columns, row))))
+        out.write("\n")
+        count += 1
+    return count
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl}
+
+
+def export(conn, dataset, out, fmt="csv", date_from=None, date_to=None, status=None):
+    """
+    Stream `dataset` to the open text file `out`.
+    """
+    started = time.perf_counter()
+    columns, rows = query(conn, dataset, date_from, date_to, status)
+    count = WRITERS[fmt](out, columns, rows)
+    return ExportReport(count, time.perf_counter() - started)
+
+
+def export_file(conn, dataset, path, fmt=None, date_from=None, date_to=None, status=None):
+    """
+    Export to `path` ("-" for stdout). Format defaults to the file extension.
+    """
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    if path == "-":
+        return export(conn, dataset, sys.stdout, fmt, date_from, date_to, status)
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        return export(conn, dataset, out, fmt, date_from, date_to, status)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export hotel data for accounting")
+    parser.add_argument("dataset", choices=sorted(EXPORTS))
+    parser.add_argument("path", help="output file, or - for stdout")
+    parser.add_argument("--format", choices=sorted(WRITERS), help="default: from the file extension")
+    parser.add_argument("--from", dest="date_from", help="first date to include (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", help="last date to include (YYYY-MM-DD)")
+    parser.add_argument("--status", help="reservation status, e.g. Active")
+    parser.add_argument("--db", default=database.DB_PATH, help="database file (default: %(default)s)")
+    args = parser.parse_args()
+
+    database.DB_PATH = args.db
+    conn = database.connect()
+    try:
+        report = export_file(conn, args.dataset, args.path, args.format,
+                             args.date_from, args.date_to, args.status)
+    except ValueError as exc:
+        parser.error(str(exc))
+    finally:
+        conn.close()
+
+    # Keep stdout clean for piping
+    print(f"{args.dataset}: {report}", file=sys.stderr)
@@ -0,0 +1,171 @@
+# group_report.py
+# Group-wide dashboard and revenue figures across every property database.
+#
+#   python group_report.py --from 2025-01-01 --to 2025-12-31
+#   python group_report.py --dir /srv/hotels --workers 8 --by-property
+#
+# Each property is reported on by a worker process with its own connection,
+# from the same sources its dashboard uses: the trigger-maintained counters,
+# the daily revenue rollups (rollup.py) and occupancy from kpi.py. Workers do
+# the SQLite and NumPy work side by side, one per core, and hand back a few
+# small rows that are merged here, so the wall time grows with properties per
+# core rather than with the number of properties.
+#
+# Databases are opened read-only: a report never takes a property's write
+# lock, migrates it, or folds in rollups. A property whose schema is older
+# than this build is reported as failed; opening it in the app (or python
+# properties.py add <name>) brings it up to date.
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+import database
+import kpi
+import properties
+import rollup
+
+
+class OutdatedSchema(Exception):
+    pass
+
+
+def property_report(path, date_from, date_to):
+    """
+    One property's figures for [date_from, date_to]:
+
+        {"stats": {counter: value},
+         "revenue": [(method, amount, payments), ...],
+         "kpi": [kpi row per room type, plus kpi.ALL_TYPES]}
+    """
+    conn = database.connect_readonly(path)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < database.SCHEMA_VERSION:
+            raise OutdatedSchema(f"schema version {version}, this build needs {database.SCHEMA_VERSION}")
+        return {
+            "stats": database.read_stats(conn),
+            "revenue": rollup.revenue_by_method(conn, date_from, date_to, fold=False),
+            "kpi": kpi.compute(conn, date_from, date_to, "total"),
+        }
+    finally:
+        conn.close()
+
+
+def merge(reports, date_from, date_to):
+    """
+    Add up per-property reports into one of the same shape. Rates (occupancy,
+    ADR, RevPAR) are recomputed from the summed nights and revenue, not averaged.
+    """
+    stats = {}
+    revenue = {}
+    totals = {}    # room_type -> [rooms, sold, revenue]
+    for report in reports:
+        for name, value in report["stats"].items():
+            stats[name] = stats.get(name, 0) + value
+        for method, amount, payments in report["revenue"]:
+            row = revenue.setdefault(method, [0, 0])
+            row[0] += amount or 0
+            row[1] += payments or 0
+        for row in report["kpi"]:
+            total = totals.setdefault(row["room_type"], [0, 0, 0.0])
+            total[0] += row["rooms"]
+            total[1] += row["sold"]
+            total[2] += row["revenue"]
+
+    days = (date.fromisoformat(date_to) - date.fromisoformat(date_from)).days + 1
+    period = f"{date_from} to {date_to}"
+    kpis = []
+    for room_type in sorted(totals, key=lambda t: (t == kpi.ALL_TYPES, t)):
+        rooms, sold, earned = totals[room_type]
+        kpis.append(kpi.kpi_row(period, room_type, rooms, days, sold, earned))
+    return {
+        "stats": stats,
+        "revenue": sorted(((method, round(amount, 2), payments) for method, (amount, payments) in revenue.items()),
+                          key=lambda row: row[1], reverse=True),
+        "kpi": kpis,
+    }
+
+
+def run(paths, date_from, date_to, workers=None):
+    """
+    Report on every database in `paths` ({name: path}) in parallel.
+    Returns ({name: report}, {name: error message}) for the properties that
+    worked and those that failed; one bad database does not stop the rest.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    reports, errors = {}, {}
+    if workers <= 1:
+        # Not worth starting processes for
+        for name, path in paths.items():
+            try:
+                reports[name] = property_report(path, date_from, date_to)
+            except Exception as exc:
+                errors[name] = str(exc)
+        return reports, errors
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(property_report, path, date_from, date_to): name for name, path in paths.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                reports[name] = future.result()
+            except Exception as exc:
+                errors[name] = str(exc)
+    return reports, errors
+
+
+def _all_types(report):
+    return next(row for row in report["kpi"] if row["room_type"] == kpi.ALL_TYPES)
+
+
+def format_report(report):
+    stats = report["stats"]
+    lines = [
+        f"Customers            {stats.get('customers', 0)}",
+        f"Available rooms      {stats.get('available_rooms', 0)}",
+        f"Active reservations  {stats.get('active_reservations', 0)}",
+        f"Total payments       {stats.get('total_payments', 0):.2f}",
+        "",
+        f"{'method':<20} {'amount':>14} {'payments':>9}",
+    ]
+    lines += [f"{method or '-':<20} {amount:>14.2f} {payments:>9}" for method, amount, payments in report["revenue"]]
+    lines += ["", kpi.format_rows(report["kpi"])]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    today = date.today()
+    parser = argparse.ArgumentParser(description="Dashboard and revenue figures across all properties")
+    parser.add_argument("--from", dest="date_from", default=today.replace(month=1, day=1).isoformat(),
+                        help="first day, YYYY-MM-DD (default: start of this year)")
+    parser.add_argument("--to", dest="date_to", default=today.isoformat(), help="last day (default: today)")
+    parser.add_argument("--dir", default=properties.PROPERTIES_DIR, help="property databases (default: %(default)s)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--by-property", action="store_true", help="also show each property's headline figures")
+    args = parser.parse_args()
+
+    paths = properties.list_properties(args.dir)
+    started = time.perf_counter()
+    reports, errors = run(paths, args.date_from, args.date_to, args.workers)
+    elapsed = time.perf_counter() - started
+
+    if args.by_property:
+        print(f"{'property':<20} {'revenue':>14} {'occupancy':>9} {'ADR':>10} {'RevPAR':>10}")
+        for name in sorted(reports):
+            row = _all_types(reports[name])
+            revenue = sum(amount or 0 for _, amount, _ in reports[name]["revenue"])
+            adr = f"{row['adr']:.2f}" if row["adr"] is not None else "-"
+            revpar = f"{row['revpar']:.2f}" if row["revpar"] is not None else "-"
+            print(f"{name:<20} {revenue:>14.2f} {row['occupancy']:>8.1%} {adr:>10} {revpar:>10}")
+        print()
+
+    print(format_report(merge(reports.values(), args.date_from, args.date_to)))
+    print(f"\nReported on {len(reports)} of {len(paths)} properties in {elapsed:.2f}s")
+    for name, message in sorted(errors.items()):
+        print(f"{name}: failed: {message}", file=sys.stderr)
+    if errors:
+        raise SystemExit(1)
@@ -0,0 +1,375 @@
+# import_data.py
+# Bulk import of customers, rooms, reservations and payments from CSV or JSON Lines.
+#
+#   python import_data.py customers guests.csv
+#   python import_data.py reservations bookings.jsonl --batch-size 100000
+#
+# Rows are streamed, validated, and written with executemany in large
+# transactions. Each batch lands in a TEMP staging table first and is moved
+# with a single INSERT ... SELECT, so the FTS and stats triggers run inside one
+# statement per batch instead of one per row. Foreign keys (customer name,
+# room_no, res_id) are resolved against lookups loaded once per run.
+# Rejected rows are written next to the input with a reason column; a JSON
+# line that cannot be read as an object is rejected the same way, its text in
+# the `line` column.
+
+import csv
+import json
+import os
+import time
+from datetime import date
+import availability
+import database
+import rollup
+
+BATCH_SIZE = 50000
+
+
+# -----------------------------
+# Readers
+# -----------------------------
+def _format(path, fmt=None):
+    return fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+
+
+def read_rows(path, fmt=None):
+    """
+    Yield one row per input row: a dict for CSV, the line's text for JSON
+    Lines (parsed by import_rows, so one bad line only rejects that row).
+    Format is taken from the extension unless given.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if _format(path, fmt) == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield line.strip()
+
+
+def _as_dict(row):
+    """
+    `row` as a dict, parsing it first when it is a line of JSON.
+    """
+    if isinstance(row, str):
+        try:
+            row = json.loads(row)
+        except ValueError as exc:
+            raise ValueError(f"not valid JSON: {exc}")
+    if not isinstance(row, dict):
+        raise ValueError("row must be a JSON object")
+    return row
+
+
+# -----------------------------
+# Field helpers
+# -----------------------------
+def _text(row, field, required=False):
+    value = row.get(field)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise ValueError(f"{field} is required")
+    return value or None
+
+
+def _int(row, field, required=False):
+    value = _text(row, field, required)
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        raise ValueError(f"{field} must be a number")
+
+
+def _number(row, field, required=False):
+    value = _text(row, field, required)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{field} must be a number")
+
+
+def _date(row, field, required=False):
+    value = _text(row, field, required)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"{field} must be YYYY-MM-DD")
+
+
+# -----------------------------
+# Table importers
+# -----------------------------
+class Importer:
+    """
+    Validates rows for one table and turns them into INSERT parameters.
+    Subclasses set `table`/`columns` and implement `convert(row)`, returning
+    values in `columns` order; lookups are loaded in `prepare`.
+    """
+
+    table = None
+    columns = ()
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def prepare(self):
+        pass
+
+    def convert(self, row):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+
+class CustomerImporter(Importer):
+    table = "customers"
+    columns = ("name", "phone", "nationality", "gender", "dob", "address")
+
+    def convert(self, row):
+        return (_text(row, "name", True), _text(row, "phone"), _text(row, "nationality"),
+                _text(row, "gender"), _date(row, "dob"), _text(row, "address"))
+
+
+class RoomImporter(Importer):
+    table = "rooms"
+    columns = ("room_no", "room_type", "bed", "price", "status")
+
+    def prepare(self):
+        self.room_nos = {r[0] for r in self.conn.execute("SELECT room_no FROM rooms")}
+
+    def convert(self, row):
+        room_no = _text(row, "room_no", True)
+        if room_no in self.room_nos:
+            raise ValueError(f"room {room_no} already exists")
+        values = (room_no, _text(row, "room_type"), _text(row, "bed"), _int(row, "price", True),
+                  _text(row, "status") or "Available")
+        self.room_nos.add(room_no)
+        return values
+
+    def finish(self):
+        availability.invalidate()
+
+
+class ReservationImporter(Importer):
+    table = "reservations"
+    columns = ("customer_id", "room_id", "check_in", "check_out", "total_days", "total_cost", "status", "booked_on")
+
+    def prepare(self):
+        # name -> customer_id, or None when two guests share the name
+        self.customers = {}
+        self.customer_ids = set()
+        for customer_id, name in self.conn.execute("SELECT customer_id, name FROM customers"):
+            self.customers[name] = None if name in self.customers else customer_id
+            self.customer_ids.add(customer_id)
+
+        self.rooms = {room_no: (room_id, price)
+                      for room_id, room_no, price in self.conn.execute("SELECT room_id, room_no, price FROM rooms")}
+        # Reject double bookings, including ones within the file itself
+        self.index = availability.AvailabilityIndex().load(self.conn)
+
+    def _customer_id(self, row):
+        customer_id = _int(row, "customer_id")
+        if customer_id is not None:
+            if customer_id not in self.customer_ids:
+                raise ValueError(f"customer_id {customer_id} not found")
+            return customer_id
+
+        name = _text(row, "customer", True)
+        if name not in self.customers:
+            raise ValueError(f"customer {name!r} not found")
+        if self.customers[name] is None:
+            raise ValueError(f"customer {name!r} is ambiguous; give customer_id")
+        return self.customers[name]
+
+    def convert(self, row):
+        customer_id = self._customer_id(row)
+
+        room_no = _text(row, "room_no", True)
+        if room_no not in self.rooms:
+            raise ValueError(f"room {room_no} not found")
+        room_id, price = self.rooms[room_no]
+
+        check_in = _date(row, "check_in", True)
+        check_out = _date(row, "check_out", True)
+        total_days = (date.fromisoformat(check_out) - date.fromisoformat(check_in)).days
+        if total_days <= 0:
+            raise ValueError("check_out must be after check_in")
+
+        total_cost = _int(row, "total_cost")
+        if total_cost is None:
+            total_cost = total_days * price
+        booked_on = _date(row, "booked_on")
+
+        status = _text(row, "status") or "Active"
+        if status == "Active":
+            if not self.index.is_free(room_id, check_in, check_out):
+                raise ValueError(f"room {room_no} already booked for these dates")
+            # Last, so a row rejected for any other field holds no dates
+            self.index.add(room_id, check_in, check_out)
+        return (customer_id, room_id, check_in, check_out, total_days, total_cost, status, booked_on)
+
+    def finish(self):
+        availability.sync_room_status(self.conn)
+        availability.invalidate()
+
+
+class PaymentImporter(Importer):
+    table = "payments"
+    columns = ("res_id", "amount", "payment_date", "method")
+
+    def prepare(self):
+        self.res_ids = {r[0] for r in self.conn.execute("SELECT res_id FROM reservations")}
+
+    def convert(self, row):
+        res_id = _int(row, "res_id", True)
+        if res_id not in self.res_ids:
+            raise ValueError(f"reservation {res_id} not found")
+        return (res_id, _number(row, "amount", True), _date(row, "payment_date"), _text(row, "method"))
+
+
+IMPORTERS = {
+    "customers": CustomerImporter,
+    "rooms": RoomImporter,
+    "reservations": ReservationImporter,
+    "payments": PaymentImporter,
+}
+
+
+# -----------------------------
+# Import Driver
+# -----------------------------
+class ImportReport:
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return (self.accepted + self.rejected) / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"{self.accepted} imported, {self.rejected} rejected in {self.seconds:.2f}s "
+                f"({self.rows_per_second:,.0f} rows/sec)")
+
+
+def insert_batch(conn, table, columns, batch):
+    """
+    Insert `batch` (tuples in `columns` order) into `table` in one transaction,
+    via a TEMP staging table so triggers run in a single INSERT ... SELECT.
+    """
+    names = ", ".join(columns)
+    placeholders = ", ".join("?" * len(columns))
+    conn.execute("BEGIN")
+    try:
+        conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS import_stage ({names})")
+        conn.execute("DELETE FROM temp.import_stage")
+        conn.executemany(f"INSERT INTO temp.import_stage VALUES ({placeholders})", batch)
+        conn.execute(f"INSERT INTO {table} ({names}) SELECT {names} FROM temp.import_stage")
+        conn.execute("DROP TABLE temp.import_stage")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def import_rows(conn, table, rows, batch_size=BATCH_SIZE, on_reject=None):
+    """
+    Validate and insert `rows` (an iterable of dicts, or JSON text per row)
+    into `table`. `on_reject(row, reason)` is called for every row that fails
+    validation; a row that is not a JSON object is passed as {"line": text}.
+    """
+    importer = IMPORTERS[table](conn)
+    report = ImportReport()
+    started = time.perf_counter()
+    importer.prepare()
+
+    def flush(batch):
+        insert_batch(conn, importer.table, importer.columns, batch)
+        report.accepted += len(batch)
+
+    batch = []
+    for raw in rows:
+        try:
+            row = _as_dict(raw)
+        except ValueError as exc:
+            report.rejected += 1
+            if on_reject is not None:
+                on_reject({"line": raw if isinstance(raw, str) else json.dumps(raw)}, str(exc))
+            continue
+        try:
+            batch.append(importer.convert(row))
+        except ValueError as exc:
+            report.rejected += 1
+            if on_reject is not None:
+                on_reject(row, str(exc))
+            continue
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    importer.finish()
+    conn.commit()
+    # Fold the new rows into the daily rollups in one pass
+    rollup.catch_up(conn)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def import_file(conn, table, path, fmt=None, batch_size=BATCH_SIZE, rejects_path=None):
+    """
+    Import one file; rejected rows go to `rejects_path` (CSV with a `reason` column).
+    """
+    rejects_path = rejects_path or os.path.splitext(path)[0] + ".rejects.csv"
+    rejects = {"file": None, "writer": None}
+    # JSON lines that are not objects are kept as text
+    extra = ["line"] if _format(path, fmt) == "jsonl" else []
+
+    def on_reject(row, reason):
+        if rejects["writer"] is None:
+            rejects["file"] = open(rejects_path, "w", newline="", encoding="utf-8")
+            fields = list(row) + [f for f in extra if f not in row] + ["reason"]
+            rejects["writer"] = csv.DictWriter(rejects["file"], fieldnames=fields, extrasaction="ignore")
+            rejects["writer"].writeheader()
+        rejects["writer"].writerow({**row, "reason": reason})
+
+    try:
+        report = import_rows(conn, table, read_rows(path, fmt), batch_size, on_reject)
+    finally:
+        if rejects["file"] is not None:
+            rejects["file"].close()
+    report.rejects_path = rejects_path if report.rejected else None
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bulk import data into hotel.db")
+    parser.add_argument("table", choices=sorted(IMPORTERS))
+    parser.add_argument("path", help="CSV or JSON Lines file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per transaction")
+    parser.add_argument("--db", default=database.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--rejects", help="where to write rejected rows")
+    args = parser.parse_args()
+
+    database.DB_PATH = args.db
+    conn = database.connect()
+    database.migrate(conn)
+
+    report = import_file(conn, args.table, args.path, args.format, args.batch_size, args.rejects)
+    conn.close()
+
+    print(f"{args.table}: {report}")
+    if report.rejects_path:
+        print(f"Rejected rows written to {report.rejects_path}")
@@ -0,0 +1,453 @@
+# journal.py
+# Append-only journal of every change to the hotel's tables.
+#
+#   python journal.py log --table rooms --key 12          # history of room 12
+#   python journal.py snapshot --out snapshots/base.db    # base for replays
+#   python journal.py replay snapshots/base.db --until "2025-06-01 18:00" --out then.db
+#
+# Each entry records when (UTC), who (the logged-in user, or "api"), the
+# table, the row's key, and the whole row before and after the change.
+#
+# Capture: every pooled connection gets TEMP triggers that copy the old and
+# new row into an in-memory buffer table. The buffer is part of the write's
+# own transaction, so a rolled-back change leaves no entry and the writer pays
+# no extra commit. When the connection goes back to the pool the buffer is
+# handed to a background writer.
+#
+# Group commit: the writer appends whatever arrived within FLUSH_MS in one
+# transaction to a sidecar database next to the main one (hotel.db ->
+# hotel.journal.db), so audit writes never wait on or hold the hotel's write
+# lock. A crash can lose at most the last FLUSH_MS of entries.
+#
+# Replay: a snapshot is a copy of the database (taken online, as backup.py
+# does) plus the journal position it was taken at. Replaying applies the later entries, in order, up to the time
+# asked for. Entries are whole-row images, so applying one that the snapshot
+# already contains changes nothing.
+#
+# Bulk loads (import_data.py, datagen.py) use their own connections and are
+# not journaled; take a new snapshot after them. users is not journaled
+# (password hashes).
+
+import atexit
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+from datetime import datetime
+import backup
+import database
+
+ENABLED = os.environ.get("HOTEL_JOURNAL", "1") != "0"
+TABLES = database.VERSIONED_TABLES
+FLUSH_MS = 50          # how long the writer gathers a group before committing it
+SUFFIX = ".journal.db"
+
+BUFFER_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS journal_buffer (
+        id INTEGER PRIMARY KEY,
+        at TEXT NOT NULL,
+        tbl TEXT NOT NULL,
+        op TEXT NOT NULL,
+        row_key INTEGER,
+        before TEXT,
+        after TEXT
+    )
+"""
+
+JOURNAL_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS journal (
+        seq INTEGER PRIMARY KEY,
+        at TEXT NOT NULL,
+        actor TEXT,
+        tbl TEXT NOT NULL,
+        op TEXT NOT NULL,
+        row_key INTEGER,
+        before TEXT,
+        after TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS journal_at ON journal (at)",
+    "CREATE INDEX IF NOT EXISTS journal_row ON journal (tbl, row_key)",
+    """
+    CREATE TRIGGER IF NOT EXISTS journal_no_update BEFORE UPDATE ON journal BEGIN
+        SELECT RAISE(ABORT, 'the journal is append-only');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS journal_no_delete BEFORE DELETE ON journal BEGIN
+        SELECT RAISE(ABORT, 'the journal is append-only');
+    END
+    """,
+)
+
+actor = os.environ.get("USER") or "system"
+
+_writers = {}          # journal path -> JournalWriter
+_writers_lock = threading.Lock()
+
+
+def journal_path(db_path):
+    return os.path.splitext(db_path)[0] + SUFFIX
+
+
+def set_actor(name):
+    """
+    Record `name` as the author of the changes that follow.
+    """
+    global actor
+    actor = name
+
+
+# -----------------------------
+# Capture
+# -----------------------------
+def _columns(conn, table):
+    """
+    (key column, [columns]) of `table` as it is in this database.
+    """
+    info = conn.execute(f"PRAGMA main.table_info({table})").fetchall()
+    key = next(name for _, name, _, _, _, pk in info if pk == 1)
+    return key, [name for _, name, *_ in info]
+
+
+def _trigger_sql(table, key, columns, op):
+    def image(row):
+        return "json_object(" + ", ".join(f"'{c}', {row}.{c}" for c in columns) + ")"
+
+    before = "NULL" if op == "insert" else image("old")
+    after = "NULL" if op == "delete" else image("new")
+    row = "new" if op == "insert" else "old"
+    return f"""
+        CREATE TEMP TRIGGER IF NOT EXISTS journal_{table}_{op} AFTER {op.upper()} ON main.{table} BEGIN
+            INSERT INTO journal_buffer (at, tbl, op, row_key, before, after)
+            VALUES (strftime('%Y-%m-%d %H:%M:%f', 'now'), '{table}', '{op}', {row}.{key}, {before}, {after});
+        END"""
+
+
+def attach(conn, path=None):
+    """
+    Start capturing this connection's changes into its journal buffer. Until
+    the schema is migrated this does nothing and drain() tries again.
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] < database.SCHEMA_VERSION:
+        return
+    conn.execute(BUFFER_SQL)
+    for table in TABLES:
+        key, columns = _columns(conn, table)
+        for op in ("insert", "update", "delete"):
+            conn.execute(_trigger_sql(table, key, columns, op))
+    conn.commit()
+
+
+def drain(conn, path=None):
+    """
+    Hand this connection's committed entries to the writer for the journal
+    of `path` (the connection's database). Returns how many there were.
+    """
+    if conn.in_transaction:
+        # Still uncommitted; they go with a later drain, or vanish on rollback
+        return 0
+    try:
+        try:
+            rows = conn.execute("""
+                DELETE FROM temp.journal_buffer RETURNING id, at, tbl, op, row_key, before, after
+            """).fetchall()
+        except sqlite3.OperationalError:
+            # Opened before the schema was migrated
+            attach(conn)
+            return 0
+        conn.commit()
+        if not rows:
+            return 0
+        rows.sort()
+        path = path or conn.execute("PRAGMA database_list").fetchone()[2]
+        who = actor
+        _writer(journal_path(path)).put([(at, who, *rest) for _, at, *rest in rows])
+        return len(rows)
+    except sqlite3.Error:
+        # Never fail the page's work over the audit trail
+        traceback.print_exc()
+        return 0
+
+
+def enable():
+    """
+    Journal every pooled connection from now on. Connections already open are
+    closed so they reopen with the triggers.
+    """
+    if not ENABLED or attach in database.POOL_OPEN_HOOKS:
+        return
+    database.POOL_OPEN_HOOKS.append(attach)
+    database.POOL_RELEASE_HOOKS.append(drain)
+    database.close_pool()
+    atexit.register(flush)
+
+
+# -----------------------------
+# Group commit
+# -----------------------------
+def open_journal(path):
+    conn = database.connect(path)
+    for statement in JOURNAL_SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    return conn
+
+
+class JournalWriter:
+    """
+    Appends entries to one journal file from a background thread. The first
+    entry of a group wakes the writer, which waits FLUSH_MS for the rest and
+    writes them all in one transaction: one commit per group, not per change.
+    Handing over entries is just a list append.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.batches = 0
+        self.entries = 0
+        self._lock = threading.Lock()
+        self._pending = []
+        self._waiters = []
+        self._wake = threading.Event()     # something to write
+        self._now = threading.Event()      # someone is waiting: do not linger
+        self._thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, entries):
+        with self._lock:
+            first = not self._pending
+            self._pending.extend(entries)
+        if first:
+            self._wake.set()
+
+    def flush(self, timeout=None):
+        """
+        Wait until everything put so far is committed to the journal.
+        """
+        done = threading.Event()
+        with self._lock:
+            self._waiters.append(done)
+        self._now.set()
+        self._wake.set()
+        return done.wait(timeout)
+
+    def _run(self):
+        conn = open_journal(self.path)
+        while True:
+            self._wake.wait()
+            # Let the rest of the group arrive
+            self._now.wait(FLUSH_MS / 1000)
+            with self._lock:
+                self._wake.clear()
+                self._now.clear()
+                batch, self._pending = self._pending, []
+                waiters, self._waiters = self._waiters, []
+
+            if batch:
+                try:
+                    with conn:
+                        conn.executemany("""
+                            INSERT INTO journal (at, actor, tbl, op, row_key, before, after)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)
+                        """, batch)
+                    self.batches += 1
+                    self.entries += len(batch)
+                except sqlite3.Error:
+                    # Put back in front and retry with the next group
+                    traceback.print_exc()
+                    with self._lock:
+                        self._pending[:0] = batch
+                    self._wake.set()
+                    time.sleep(FLUSH_MS / 1000)
+            for waiter in waiters:
+                waiter.set()
+
+
+def _writer(path):
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = _writers[path] = JournalWriter(path)
+        return writer
+
+
+def flush(timeout=5.0):
+    """
+    Wait until every entry handed over so far is in its journal.
+    """
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.flush(timeout)
+
+
+# -----------------------------
+# Reading and replay
+# -----------------------------
+def _instant(text):
+    """
+    An ISO date or date-time as the journal stores times.
+    """
+    return datetime.fromisoformat(text).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+def history(conn, table=None, key=None, since=None, until=None, limit=100):
+    """
+    Journal entries, newest first, as (seq, at, actor, tbl, op, row_key, before, after).
+    """
+    clauses, params = [], []
+    if table:
+        clauses.append("tbl = ?")
+        params.append(table)
+    if key is not None:
+        clauses.append("row_key = ?")
+        params.append(key)
+    if since:
+        clauses.append("at >= ?")
+        params.append(_instant(since))
+    if until:
+        clauses.append("at <= ?")
+        params.append(_instant(until))
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    params.append(limit)
+    return conn.execute(f"""
+        SELECT seq, at, actor, tbl, op, row_key, before, after FROM journal{where}
+        ORDER BY seq DESC LIMIT ?
+    """, params).fetchall()
+
+
+def snapshot(out, db_path=None):
+    """
+    Copy the database to `out` as a base for replay, noting the journal
+    position it includes. Returns that position.
+    """
+    db_path = db_path or database.DB_PATH
+    flush()
+    jconn = open_journal(journal_path(db_path))
+    seq = jconn.execute("SELECT COALESCE(MAX(seq), 0) FROM journal").fetchone()[0]
+    jconn.close()
+
+    # Read the position first: anything journaled later is replayed on top,
+    # which is harmless for changes the copy already has
+    backup.copy_database(db_path, out)
+    target = sqlite3.connect(out)
+    try:
+        target.execute("CREATE TABLE journal_base (seq INTEGER, journal TEXT, taken_at TEXT)")
+        target.execute("INSERT INTO journal_base VALUES (?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now'))",
+                       (seq, os.path.abspath(journal_path(db_path))))
+        target.commit()
+    finally:
+        target.close()
+    return seq
+
+
+def _apply(conn, layouts, table, op, row_key, after):
+    key, columns = layouts[table]
+    if op == "delete":
+        conn.execute(f"DELETE FROM {table} WHERE {key} = ?", (row_key,))
+        return
+    # Columns the row had then and this schema still has
+    row = {c: v for c, v in json.loads(after).items() if c in columns}
+    names = list(row)
+    assignments = ", ".join(f"{c} = ?" for c in names)
+    if conn.execute(f"UPDATE {table} SET {assignments} WHERE {key} = ?",
+                    [*row.values(), row_key]).rowcount == 0:
+        conn.execute(f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                     list(row.values()))
+
+
+def replay(snapshot_path, out, until=None, journal=None):
+    """
+    Rebuild the database as of `until` (UTC; everything when None) into `out`,
+    from a snapshot and the journal entries after it. Returns the number of
+    entries applied.
+    """
+    import rollup
+
+    if os.path.abspath(out) in (os.path.abspath(snapshot_path), os.path.abspath(database.DB_PATH)):
+        raise ValueError("replay writes a new database; choose another --out")
+    shutil.copyfile(snapshot_path, out)
+
+    # A plain connection: the replay itself is not journaled
+    conn = database.connect(out)
+    try:
+        database.migrate(conn)
+        base, recorded = conn.execute("SELECT seq, journal FROM journal_base").fetchone()
+        jconn = database.connect(journal or recorded)
+        params = [base]
+        sql = "SELECT seq, tbl, op, row_key, after FROM journal WHERE seq > ?"
+        if until:
+            sql += " AND at <= ?"
+            params.append(_instant(until))
+        entries = jconn.execute(sql + " ORDER BY at, seq", params)
+
+        layouts = {table: _columns(conn, table) for table in TABLES}
+        applied = last = 0
+        conn.execute("BEGIN")
+        for seq, table, op, row_key, after in entries:
+            _apply(conn, layouts, table, op, row_key, after)
+            applied += 1
+            last = max(last, seq)
+        if applied:
+            conn.execute("UPDATE journal_base SET seq = ?", (last,))
+        conn.commit()
+        jconn.close()
+        rollup.catch_up(conn)
+        return applied
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Audit journal: history, snapshots and point-in-time replay")
+    parser.add_argument("--db", default=database.DB_PATH, help="database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    log = commands.add_parser("log", help="show journal entries, newest first")
+    log.add_argument("--table", choices=TABLES)
+    log.add_argument("--key", type=int, help="row key (customer_id, room_id, ...)")
+    log.add_argument("--since", help="UTC date or date-time")
+    log.add_argument("--until", help="UTC date or date-time")
+    log.add_argument("--limit", type=int, default=50)
+
+    snap = commands.add_parser("snapshot", help="copy the database as a base for replay")
+    snap.add_argument("--out", help="snapshot file (default: snapshots/<db>-<time>.db)")
+
+    rep = commands.add_parser("replay", help="rebuild the database as of a point in time")
+    rep.add_argument("snapshot")
+    rep.add_argument("--until", help="UTC date or date-time (default: everything journaled)")
+    rep.add_argument("--out", required=True, help="database to write (replaced if it exists)")
+    rep.add_argument("--journal", help="journal file (default: the one the snapshot was taken with)")
+    args = parser.parse_args()
+
+    database.DB_PATH = args.db
+    if args.command == "log":
+        conn = open_journal(journal_path(args.db))
+        for seq, at, who, table, op, row_key, before, after in history(
+                conn, args.table, args.key, args.since, args.until, args.limit):
+            print(f"#{seq} {at} {who} {op} {table} {row_key}")
+            if before:
+                print(f"    before: {before}")
+            if after:
+                print(f"    after:  {after}")
+        conn.close()
+    elif args.command == "snapshot":
+        out = args.out or os.path.join(
+            "snapshots", f"{os.path.splitext(os.path.basename(args.db))[0]}-{time.strftime('%Y%m%d-%H%M%S')}.db")
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        seq = snapshot(out, args.db)
+        print(f"Snapshot {out} at journal entry {seq}")
+    else:
+        started = time.perf_counter()
+        try:
+            applied = replay(args.snapshot, args.out, args.until, args.journal)
+        except ValueError as exc:
+            parser.error(str(exc))
+        print(f"Applied {applied} entries to {args.out} in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,250 @@
+# kpi.py
+# Occupancy, ADR and RevPAR by room type, computed with NumPy.
+#
+#   python kpi.py --from 2024-01-01 --to 2025-12-31 --by month
+#
+#   occupancy = room-nights sold / room-nights available
+#   ADR       = room revenue / room-nights sold        (average daily rate)
+#   RevPAR    = room revenue / room-nights available
+#
+# Every stay that is not Cancelled counts, including future ones (business on
+# the books). A stay's total_cost is spread evenly over its nights. Available
+# nights are today's rooms of each type for every day in the range.
+#
+# Stays are loaded once into arrays (day numbers, nightly rate, room type) and
+# kept until table_versions shows reservations or rooms changed, or another
+# database is opened. Nights per day come from difference arrays: +1 on the
+# check-in day and -1 on the check-out day, summed with cumsum. Each range
+# costs O(stays + days), however long the stays are.
+
+import threading
+import time
+from datetime import date, timedelta
+import numpy as np
+import database
+
+FREQS = ("day", "month", "total")
+ALL_TYPES = "All"
+RANGES = ("This month", "Last 30 days", "Year to date", "Last 12 months")
+
+# Day numbers as date.toordinal() gives them (julianday of 0001-01-01 is 1721425.5)
+_STAYS_SQL = """
+    SELECT CAST(julianday(r.check_in) - 1721424.5 AS INTEGER),
+           CAST(julianday(r.check_out) - 1721424.5 AS INTEGER),
+           COALESCE(r.total_cost, 0),
+           r.room_id
+    FROM reservations r
+    WHERE r.status != 'Cancelled' AND r.check_in IS NOT NULL AND r.check_out IS NOT NULL
+"""
+
+_lock = threading.Lock()
+_stays = None        # ((database, versions), Stays)
+_results = {}        # (versions, start, end, freq) -> rows; emptied when versions change
+
+
+class Stays:
+    """
+    Non-cancelled stays as parallel arrays, plus room counts per type.
+    `rows` are (check_in, check_out, total_cost, room_id); `rooms` are
+    (room_id, room_type).
+    """
+
+    def __init__(self, rows, rooms):
+        self.types = sorted({room_type for _, room_type in rooms})
+        index = {t: i for i, t in enumerate(self.types)}
+        room_ids = np.array([room_id for room_id, _ in rooms], dtype=np.int64)
+        room_types = np.array([index[room_type] for _, room_type in rooms], dtype=np.int64)
+        self.room_counts = np.bincount(room_types, minlength=len(self.types))
+
+        # Type of each room by id; stays in rooms that no longer exist get -1
+        type_of = np.full(int(room_ids.max(initial=0)) + 1, -1, dtype=np.int64)
+        type_of[room_ids] = room_types
+
+        data = np.array(rows, dtype=np.float64).reshape(-1, 4)
+        check_in, check_out = data[:, 0].astype(np.int64), data[:, 1].astype(np.int64)
+        room_id = data[:, 3].astype(np.int64)
+        nights = check_out - check_in
+        valid = (nights > 0) & (room_id >= 0) & (room_id < len(type_of))
+        self.check_in, self.check_out = check_in[valid], check_out[valid]
+        self.rate = data[valid, 2] / nights[valid]
+        self.type = type_of[room_id[valid]]
+
+    def daily(self, start, end):
+        """
+        (nights sold, revenue) as arrays of shape (types, days) for day
+        numbers start <= day < end.
+        """
+        days = end - start
+        ntypes = len(self.types)
+        first = np.clip(self.check_in, start, end) - start
+        last = np.clip(self.check_out, start, end) - start
+        keep = (first < last) & (self.type >= 0)
+        first, last, rate, row = first[keep], last[keep], self.rate[keep], self.type[keep]
+
+        # One extra column takes the -1 of stays that run past `end`
+        width = days + 1
+        at_in = row * width + first
+        at_out = row * width + last
+        size = ntypes * width
+        sold = np.bincount(at_in, minlength=size) - np.bincount(at_out, minlength=size)
+        revenue = (np.bincount(at_in, rate, minlength=size) - np.bincount(at_out, rate, minlength=size))
+        sold = np.cumsum(sold.reshape(ntypes, width), axis=1)[:, :days]
+        revenue = np.cumsum(revenue.reshape(ntypes, width), axis=1)[:, :days]
+        return sold, revenue
+
+
+def _load(conn):
+    global _stays
+    versions = database.read_versions(conn)
+    # Counters alone cannot tell two property databases apart
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    versions = (path, versions.get("reservations"), versions.get("rooms"))
+    with _lock:
+        if _stays is not None and _stays[0] == versions:
+            return versions, _stays[1]
+
+    rooms = conn.execute("SELECT room_id, COALESCE(room_type, 'Other') FROM rooms").fetchall()
+    stays = Stays(conn.execute(_STAYS_SQL).fetchall(), rooms)
+    with _lock:
+        _stays = (versions, stays)
+        for key in [k for k in _results if k[0] != versions]:
+            del _results[key]
+    return versions, stays
+
+
+def _periods(start, end, freq):
+    """
+    [(label, first day, end day), ...] covering [start, end).
+    """
+    if freq == "total":
+        return [(f"{date.fromordinal(start)} to {date.fromordinal(end - 1)}", start, end)]
+    if freq == "day":
+        return [(date.fromordinal(d).isoformat(), d, d + 1) for d in range(start, end)]
+
+    periods = []
+    day = start
+    while day < end:
+        d = date.fromordinal(day)
+        following = date(d.year + d.month // 12, d.month % 12 + 1, 1).toordinal()
+        periods.append((f"{d.year}-{d.month:02d}", day, min(following, end)))
+        day = following
+    return periods
+
+
+def compute(conn, date_from, date_to, freq="month"):
+    """
+    KPI rows for the nights date_from <= night <= date_to (ISO dates), by
+    `freq` ("day", "month" or "total"), each room type plus ALL_TYPES:
+
+        {"period", "room_type", "rooms", "available", "sold", "revenue",
+         "occupancy", "adr", "revpar"}
+
+    occupancy is a fraction; adr and revpar are None when nothing was sold or
+    available. Results are cached until reservations or rooms change.
+    """
+    if freq not in FREQS:
+        raise ValueError(f"freq must be one of {FREQS}")
+    start = date.fromisoformat(date_from).toordinal()
+    end = date.fromisoformat(date_to).toordinal() + 1
+    if end <= start:
+        return []
+
+    versions, stays = _load(conn)
+    key = (versions, start, end, freq)
+    with _lock:
+        if key in _results:
+            return _results[key]
+
+    sold, revenue = stays.daily(start, end)
+    periods = _periods(start, end, freq)
+    # Sum the daily columns into periods in one call
+    bounds = np.array([first - start for _, first, _ in periods], dtype=np.int64)
+    sold = np.add.reduceat(sold, bounds, axis=1)
+    revenue = np.add.reduceat(revenue, bounds, axis=1)
+    lengths = np.array([stop - first for _, first, stop in periods], dtype=np.int64)
+
+    rows = []
+    for p, (label, _, _) in enumerate(periods):
+        for t, room_type in enumerate(stays.types):
+            rows.append(kpi_row(label, room_type, int(stays.room_counts[t]), int(lengths[p]),
+                                int(sold[t, p]), float(revenue[t, p])))
+        rows.append(kpi_row(label, ALL_TYPES, int(stays.room_counts.sum()), int(lengths[p]),
+                            int(sold[:, p].sum()), float(revenue[:, p].sum())))
+
+    with _lock:
+        _results[key] = rows
+    return rows
+
+
+def kpi_row(period, room_type, rooms, days, sold, revenue):
+    """
+    One KPI row from its totals; also used to merge rows from several hotels.
+    """
+    available = rooms * days
+    return {
+        "period": period,
+        "room_type": room_type,
+        "rooms": rooms,
+        "available": available,
+        "sold": sold,
+        "revenue": round(revenue, 2),
+        "occupancy": sold / available if available else 0.0,
+        "adr": round(revenue / sold, 2) if sold else None,
+        "revpar": round(revenue / available, 2) if available else None,
+    }
+
+
+def date_range(name, today=None):
+    """
+    (date_from, date_to) ISO strings for one of RANGES.
+    """
+    today = today or date.today()
+    if name == "This month":
+        first = today.replace(day=1)
+        following = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+        return first.isoformat(), (following - timedelta(days=1)).isoformat()
+    if name == "Last 30 days":
+        return (today - timedelta(days=29)).isoformat(), today.isoformat()
+    if name == "Year to date":
+        return today.replace(month=1, day=1).isoformat(), today.isoformat()
+    if name == "Last 12 months":
+        return date(today.year - 1, today.month, 1).isoformat(), today.isoformat()
+    raise ValueError(f"range must be one of {RANGES}")
+
+
+def clear_cache():
+    global _stays
+    with _lock:
+        _stays = None
+        _results.clear()
+
+
+def format_rows(rows):
+    lines = [f"{'period':<25} {'room type':<10} {'occupancy':>9} {'ADR':>10} {'RevPAR':>10} {'sold':>9}"]
+    for r in rows:
+        adr = f"{r['adr']:.2f}" if r["adr"] is not None else "-"
+        revpar = f"{r['revpar']:.2f}" if r["revpar"] is not None else "-"
+        lines.append(f"{r['period']:<25} {r['room_type']:<10} {r['occupancy']:>8.1%} "
+                     f"{adr:>10} {revpar:>10} {r['sold']:>9}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Occupancy, ADR and RevPAR by room type")
+    parser.add_argument("--from", dest="date_from", required=True, help="first night, YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", required=True, help="last night, YYYY-MM-DD")
+    parser.add_argument("--by", choices=FREQS, default="month")
+    parser.add_argument("--db", default=database.DB_PATH)
+    args = parser.parse_args()
+
+    database.DB_PATH = args.db
+    with database.connection() as conn:
+        database.migrate(conn)
+        started = time.perf_counter()
+        rows = compute(conn, args.date_from, args.date_to, args.by)
+        elapsed = time.perf_counter() - started
+
+    print(format_rows(rows))
+    print(f"{len(rows)} rows in {elapsed * 1000:.1f} ms")
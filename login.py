@@ -1,43 +1,51 @@
+import startup  # first, so its clock starts before the other imports
 import tkinter as tk
 from tkinter import messagebox, ttk
-from PIL import Image, ImageTk
 import sqlite3
-import main  # your main.py dashboard
+import availability
+import backgrounds
+import backup
+import database
+import journal
+import passwords
+import properties
+import query_executor
+# main.py (PIL, the dashboard) is imported after login; startup.prefetch warms it up
 
-DB = "hotel.db"
+startup.mark("imports done")
 
 # -----------------------------
 # Database Initialization
 # -----------------------------
 def init_db():
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL
-        )
-    """)
-    cursor.execute("INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)", ("admin", "admin123"))
-    conn.commit()
-    conn.close()
-
-def check_login(username, password):
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE username=? AND password=?", (username, password))
-    result = cursor.fetchone()
-    conn.close()
-    return result is not None
-
-def register_user(username, password):
+    with database.connection() as conn:
+        # No-op unless the schema is older than this build
+        database.migrate(conn)
+        # Guests arrived and left since the app last ran
+        availability.sync_room_status(conn)
+        if conn.execute("SELECT 1 FROM users WHERE username='admin'").fetchone() is None:
+            conn.execute("INSERT INTO users (username, password) VALUES (?, ?)",
+                         ("admin", passwords.hash_password("admin123")))
+
+# Both run on a query_executor worker: hashing takes a few hundred ms by design
+def check_login(conn, username, password):
+    row = conn.execute("SELECT user_id, password FROM users WHERE username=?", (username,)).fetchone()
+    if row is None:
+        return passwords.dummy_verify(password)
+
+    user_id, stored = row
+    if not passwords.verify(password, stored):
+        return False
+    if passwords.needs_rehash(stored):
+        # Upgrade plaintext or weaker hashes now that we know the password
+        conn.execute("UPDATE users SET password=? WHERE user_id=? AND password=?",
+                     (passwords.hash_password(password), user_id, stored))
+    return True
+
+def register_user(conn, username, password):
     try:
-        conn = sqlite3.connect(DB)
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
-        conn.commit()
-        conn.close()
+        conn.execute("INSERT INTO users (username, password) VALUES (?, ?)",
+                     (username, passwords.hash_password(password)))
         return True
     except sqlite3.IntegrityError:
         return False
@@ -60,20 +68,22 @@ def login_register_page(root):
     screen_width = root.winfo_screenwidth()
     screen_height = root.winfo_screenheight()
     
-    # Background Image
-    bg_img = Image.open("bg.jpg")  
- 
-    bg_img = bg_img.resize((screen_width, screen_height), Image.Resampling.LANCZOS)
-    bg_photo = ImageTk.PhotoImage(bg_img)
-    bg_label = tk.Label(root, image=bg_photo)
-    bg_label.place(x=0, y=0, relwidth=1, relheight=1)
-    root.bg_photo = bg_photo
+    # Background Image (pre-scaled copy from the on-disk cache)
+    bg_photo = backgrounds.load(root, "bg.jpg", screen_width, screen_height)
+    if bg_photo is not None:
+        bg_label = tk.Label(root, image=bg_photo)
+        bg_label.place(x=0, y=0, relwidth=1, relheight=1)
+        root.bg_photo = bg_photo
+
+    # A property picker is shown when the group has more than one hotel
+    hotels = properties.list_properties()
+    picker_height = 50 if len(hotels) > 1 else 0
 
     # -----------------------------
     # Card Frame (rounded corners effect)
     # -----------------------------
     card_width = 400
-    card_height = 400
+    card_height = 400 + picker_height
     card_x = screen_width // 2 - card_width // 2
     card_y = screen_height // 2 - card_height // 2
 
@@ -118,8 +128,27 @@ def login_register_page(root):
     register_btn = tk.Button(tab_frame, text="Register", bg="#bdc3c7", fg="white", bd=0, font=("Arial", 12, "bold"))
     register_btn.place(x=card_width//2, y=0, width=card_width//2, height=40)
 
+    # -----------------------------
+    # Property
+    # -----------------------------
+    hotel_var = tk.StringVar(value=properties.current if properties.current in hotels else next(iter(hotels)))
+    if picker_height:
+        hotel_frame = tk.Frame(canvas, bg="#ffffff")
+        hotel_frame.place(x=20, y=65, width=card_width-40, height=35)
+        tk.Label(hotel_frame, text="Property", bg="#ffffff").pack(side="left", padx=(0, 10))
+        ttk.Combobox(hotel_frame, textvariable=hotel_var, values=list(hotels),
+                     state="readonly").pack(side="left", fill="x", expand=True)
+
+    def use_property():
+        # Users and data are per property, so switch before checking anything
+        name = hotel_var.get()
+        properties.select(name, hotels[name])
+        init_db()
+        # Snapshots of the open database every HOTEL_BACKUP_INTERVAL minutes
+        backup.start()
+
     form_frame = tk.Frame(canvas, bg="#ffffff")
-    form_frame.place(x=20, y=70, width=card_width-40, height=card_height-100)
+    form_frame.place(x=20, y=70 + picker_height, width=card_width-40, height=card_height-100-picker_height)
 
     # -----------------------------
     # Login Form
@@ -135,15 +164,36 @@ def login_register_page(root):
     login_pass.pack(pady=5, fill="x")
 
     def login_action():
-        if check_login(login_user.get(), login_pass.get()):
-            messagebox.showinfo("Success", f"Welcome {login_user.get()}!")
-            for widget in root.winfo_children():
-                widget.destroy()
-            main.open_main_window(root)
-        else:
-            messagebox.showerror("Error", "Invalid username or password")
+        username, password = login_user.get(), login_pass.get()
+        login_button.config(state="disabled")
+
+        def done(ok):
+            if ok:
+                journal.set_actor(username)
+                messagebox.showinfo("Success", f"Welcome {username}!")
+                import main  # usually already loaded by startup.prefetch
+                for widget in root.winfo_children():
+                    widget.destroy()
+                main.open_main_window(root)
+            else:
+                login_button.config(state="normal")
+                messagebox.showerror("Error", "Invalid username or password")
 
-    styled_button(login_frame, "Login", login_action, bg="#27ae60").pack(pady=20, fill="x")
+        def failed(exc):
+            login_button.config(state="normal")
+            messagebox.showerror("Error", f"Could not log in:\n{exc}")
+
+        try:
+            use_property()
+        except Exception as exc:
+            failed(exc)
+            return
+
+        # Verified off the Tk thread so the window keeps painting
+        query_executor.submit(login_frame, lambda conn: check_login(conn, username, password), done, failed)
+
+    login_button = styled_button(login_frame, "Login", login_action, bg="#27ae60")
+    login_button.pack(pady=20, fill="x")
 
     # -----------------------------
     # Register Form
@@ -167,13 +217,31 @@ def login_register_page(root):
         if reg_pass.get() != reg_confirm.get():
             messagebox.showerror("Error", "Passwords do not match")
             return
-        if register_user(reg_user.get(), reg_pass.get()):
-            messagebox.showinfo("Success", "User registered! Please login.")
-            show_login()
-        else:
-            messagebox.showerror("Error", "Username already exists")
+        username, password = reg_user.get(), reg_pass.get()
+        register_button.config(state="disabled")
+
+        def done(ok):
+            register_button.config(state="normal")
+            if ok:
+                messagebox.showinfo("Success", "User registered! Please login.")
+                show_login()
+            else:
+                messagebox.showerror("Error", "Username already exists")
+
+        def failed(exc):
+            register_button.config(state="normal")
+            messagebox.showerror("Error", f"Could not register:\n{exc}")
+
+        try:
+            use_property()
+        except Exception as exc:
+            failed(exc)
+            return
+
+        query_executor.submit(register_frame, lambda conn: register_user(conn, username, password), done, failed)
 
-    styled_button(register_frame, "Register", register_action, bg="#27ae60").pack(pady=15, fill="x")
+    register_button = styled_button(register_frame, "Register", register_action, bg="#27ae60")
+    register_button.pack(pady=15, fill="x")
 
     # -----------------------------
     # Switch Tabs
@@ -197,7 +265,15 @@ def login_register_page(root):
 # Open App
 # -----------------------------
 def open_app():
-    init_db()
+    # Every change made from here on is recorded with the user who made it
+    journal.enable()
+    # With several properties the database is opened once one is picked
+    hotels = properties.list_properties()
+    if len(hotels) == 1:
+        properties.select(*next(iter(hotels.items())))
+        init_db()
+        backup.start()
+        startup.mark("database ready")
     root = tk.Tk()
     root.title("Hotel Management System")
     screen_width = root.winfo_screenwidth()
@@ -205,6 +281,10 @@ def open_app():
     root.geometry(f"{screen_width}x{screen_height}+0+0")
     root.resizable(False, False)
     login_register_page(root)
+    startup.mark("login page built")
+    startup.when_painted(root, "login window shown", "time to first window")
+    # Load the dashboard's modules while the user types
+    startup.prefetch("main")
     root.mainloop()
 
 if __name__ == "__main__":
@@ -1,44 +1,79 @@
 # main.py
 import tkinter as tk
-from PIL import Image, ImageTk, ImageDraw
-import sqlite3
-import os
-
-DB = "hotel.db"
+from tkinter import ttk
+from datetime import date
+from functools import lru_cache, partial
+from PIL import Image, ImageTk, ImageDraw, ImageColor
+import availability
+import backgrounds
+import database
+import events
+import kpi
+import properties
+import query_executor
+import startup
+from pages import PageManager
 
 # -----------------------------
 # Modern Card Creator
 # -----------------------------
-def create_modern_card(master, title, value, width=300, height=180, colors=("lightblue", "#3498db")):
+CARD_RADIUS = 20
+SHADOW_OFFSET = 6
+SHADOW_COLOR = (0, 0, 0, 60)
+
+
+def _rgb(master, color):
     """
-    Creates a modern card with rounded corners, shadow, and gradient colors.
-    colors: tuple(light_color, dark_color)
+    Resolve a colour name or hex string to an (r, g, b) tuple, asking Tk only
+    for names PIL does not know.
+    """
+    try:
+        return ImageColor.getrgb(color)[:3]
+    except ValueError:
+        return tuple(c // 257 for c in master.winfo_rgb(color))
+
+
+@lru_cache(maxsize=32)
+def render_card(width, height, top_rgb, bottom_rgb):
     """
-    # Create image with RGBA
-    img = Image.new("RGBA", (width, height), (0,0,0,0))
-    draw = ImageDraw.Draw(img)
+    Build the card bitmap (drop shadow + rounded vertical gradient) with whole-image
+    operations. Cached by size and colours, so repeat visits skip the drawing.
+    """
+    card_w, card_h = width - SHADOW_OFFSET, height - SHADOW_OFFSET
 
     # Shadow
-    shadow_color = (0,0,0,60)
-    offset = 6
-    draw.rounded_rectangle([offset, offset, width, height], radius=20, fill=shadow_color)
-
-    # Gradient card
-    for i in range(height):
-        r1, g1, b1 = master.winfo_rgb(colors[0])
-        r2, g2, b2 = master.winfo_rgb(colors[1])
-        r = int(r1/256 + (r2/256 - r1/256) * i / height)
-        g = int(g1/256 + (g2/256 - g1/256) * i / height)
-        b = int(b1/256 + (b2/256 - b1/256) * i / height)
-        draw.line([(0, i), (width, i)], fill=(r,g,b,255))
+    img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    ImageDraw.Draw(img).rounded_rectangle([SHADOW_OFFSET, SHADOW_OFFSET, width - 1, height - 1],
+                                          radius=CARD_RADIUS, fill=SHADOW_COLOR)
+
+    # Gradient card: blend the two colours through a 0..255 vertical ramp
+    ramp = Image.linear_gradient("L").resize((card_w, card_h))
+    card = Image.composite(Image.new("RGB", (card_w, card_h), bottom_rgb),
+                           Image.new("RGB", (card_w, card_h), top_rgb), ramp)
 
     # Rounded corners mask
-    mask = Image.new("L", (width, height), 0)
-    mask_draw = ImageDraw.Draw(mask)
-    mask_draw.rounded_rectangle([0,0,width,height], radius=20, fill=255)
-    img.putalpha(mask)
+    mask = Image.new("L", (card_w, card_h), 0)
+    ImageDraw.Draw(mask).rounded_rectangle([0, 0, card_w - 1, card_h - 1], radius=CARD_RADIUS, fill=255)
+    img.paste(card, (0, 0), mask)
+    return img
+
+
+def create_modern_card(master, title, value, width=300, height=180, colors=("lightblue", "#3498db")):
+    """
+    Creates a modern card with rounded corners, shadow, and gradient colors.
+    colors: tuple(light_color, dark_color)
+    """
+    key = (width, height, _rgb(master, colors[0]), _rgb(master, colors[1]))
+
+    # PhotoImages belong to one Tk interpreter, so they are cached on the toplevel
+    toplevel = master.winfo_toplevel()
+    photos = getattr(toplevel, "card_photos", None)
+    if photos is None:
+        photos = toplevel.card_photos = {}
+    tk_img = photos.get(key)
+    if tk_img is None:
+        tk_img = photos[key] = ImageTk.PhotoImage(render_card(*key))
 
-    tk_img = ImageTk.PhotoImage(img)
     canvas = tk.Canvas(master, width=width, height=height, bd=0, highlightthickness=0, bg=master['bg'])
     canvas.create_image(0, 0, anchor="nw", image=tk_img)
     canvas.image = tk_img
@@ -49,6 +84,81 @@ def create_modern_card(master, title, value, width=300, height=180, colors=("lig
 
     return canvas
 
+# -----------------------------
+# KPI Panel
+# -----------------------------
+KPI_COLUMNS = ("Room type", "Occupancy", "ADR", "RevPAR", "Nights sold", "Revenue")
+
+
+def _money(value):
+    return "-" if value is None else f"${value:,.2f}"
+
+
+def create_kpi_panel(master, is_shown):
+    """
+    Occupancy, ADR and RevPAR by room type for a chosen range (see kpi.py).
+    Returns (panel, changed); call changed() when bookings or rooms may have
+    changed. Figures are recomputed only while is_shown() is true, otherwise
+    on the page's next <<PageShown>>.
+    """
+    panel = tk.Frame(master, bg="#ffffff")
+
+    header = tk.Frame(panel, bg="#ffffff")
+    header.pack(fill="x", padx=10, pady=5)
+    tk.Label(header, text="Occupancy & Revenue", font=("Arial", 16, "bold"),
+             bg="#ffffff", fg="#2c3e50").pack(side="left")
+    range_var = ttk.Combobox(header, values=kpi.RANGES, state="readonly", width=16)
+    range_var.current(0)
+    range_var.pack(side="right")
+
+    tree = ttk.Treeview(panel, columns=KPI_COLUMNS, show="headings", height=5)
+    for col in KPI_COLUMNS:
+        tree.heading(col, text=col)
+        tree.column(col, width=120, anchor="w" if col == "Room type" else "e")
+    tree.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+    state = {"stale": True}
+
+    def show(rows):
+        tree.delete(*tree.get_children())
+        for r in rows:
+            tree.insert("", "end", values=(r["room_type"], f"{r['occupancy']:.1%}", _money(r["adr"]),
+                                           _money(r["revpar"]), r["sold"], f"${r['revenue']:,.0f}"))
+
+    def load():
+        state["stale"] = False
+        date_from, date_to = kpi.date_range(range_var.get())
+        query_executor.submit(tree, lambda conn: kpi.compute(conn, date_from, date_to, "total"), show)
+
+    def changed():
+        state["stale"] = True
+        if is_shown():
+            load()
+
+    range_var.bind("<<ComboboxSelected>>", lambda event: load())
+    master.bind("<<PageShown>>", lambda event: load() if state["stale"] else None, add="+")
+    return panel, changed
+
+# -----------------------------
+# Room Statuses
+# -----------------------------
+STATUS_CHECK_MS = 60_000    # how often to look for a new day
+
+
+def keep_room_status(root, synced_on=None):
+    """
+    Recompute every room's "Booked"/"Available" status now and again each
+    time the day changes while the app is open, so guests checking in and out
+    show on the Rooms page and the dashboard.
+    """
+    today = date.today()
+    if today != synced_on:
+        with database.connection() as conn:
+            changed = availability.sync_room_status(conn)
+        if changed:
+            events.publish("rooms")
+    root.after(STATUS_CHECK_MS, keep_room_status, root, today)
+
 # -----------------------------
 # Main Window
 # -----------------------------
@@ -64,6 +174,8 @@ def open_main_window(root=None):
         screen_width = root.winfo_screenwidth()
         screen_height = root.winfo_screenheight()
         root.geometry(f"{screen_width}x{screen_height}+0+0")
+    if properties.current:
+        root.title(f"Hotel Management System - {properties.current}")
 
     # -----------------------------
     # Sidebar
@@ -77,51 +189,34 @@ def open_main_window(root=None):
     main_area.pack(side="right", expand=True, fill="both")
 
     # -----------------------------
-    # Change Page Function
+    # Pages
     # -----------------------------
-    def change_page(page_name):
-        for widget in main_area.winfo_children():
-            widget.destroy()
-
-        if page_name == "Dashboard":
-            # Background
-            bg_path = "dashboard_bg.jpg"
-            if os.path.exists(bg_path):
-                img = Image.open(bg_path)
-                main_area.update()
-                main_width = main_area.winfo_width() or screen_width - 250
-                main_height = main_area.winfo_height() or screen_height
-                img = img.resize((main_width, main_height), Image.Resampling.LANCZOS)
-                bg_img = ImageTk.PhotoImage(img)
-                bg_label = tk.Label(main_area, image=bg_img)
-                bg_label.image = bg_img
-                bg_label.place(x=0, y=0, relwidth=1, relheight=1)
-
-            # Database queries
-            conn = sqlite3.connect(DB)
-            cursor = conn.cursor()
-
-            cursor.execute("SELECT COUNT(*) FROM customers")
-            total_customers = cursor.fetchone()[0]
-
-            cursor.execute("SELECT COUNT(*) FROM rooms WHERE status='Available'")
-            available_rooms = cursor.fetchone()[0]
-
-            cursor.execute("SELECT COUNT(*) FROM reservations WHERE status='Active'")
-            active_reservations = cursor.fetchone()[0]
-
-            cursor.execute("SELECT SUM(amount) FROM payments")
-            total_payments = cursor.fetchone()[0] or 0
-
-            conn.close()
-
-            # Welcome Label
-            tk.Label(main_area, text=" Welcome to Hotel Management System ",
-                     font=("Arial", 32, "bold"), bg="#ffffff", fg="#2c3e50").place(relx=0.05, rely=0.02)
-
-            # -----------------------------
-            # Dashboard Cards
-            # -----------------------------
+    def dashboard_page(page):
+        # Background (scaled once per size, then read from the disk cache)
+        main_area.update_idletasks()
+        main_width = main_area.winfo_width() or screen_width - 250
+        main_height = main_area.winfo_height() or screen_height
+        bg_img = backgrounds.load(page, "dashboard_bg.jpg", main_width, main_height)
+        if bg_img is not None:
+            bg_label = tk.Label(page, image=bg_img)
+            bg_label.image = bg_img
+            bg_label.place(x=0, y=0, relwidth=1, relheight=1)
+
+        # Welcome Label
+        tk.Label(page, text=" Welcome to Hotel Management System ",
+                 font=("Arial", 32, "bold"), bg="#ffffff", fg="#2c3e50").place(relx=0.05, rely=0.02)
+
+        # -----------------------------
+        # Dashboard Cards
+        # -----------------------------
+        cards = []
+
+        def show_cards(stats):
+            total_customers = stats.get("customers", 0)
+            available_rooms = stats.get("available_rooms", 0)
+            active_reservations = stats.get("active_reservations", 0)
+            total_payments = stats.get("total_payments", 0)
+
             card_data = [
                 ("Total Customers 👥", total_customers, ("#85c1e9", "#3498db")),
                 ("Rooms 🛏️", available_rooms, ("#82e0aa", "#2ecc71")),
@@ -135,36 +230,67 @@ def open_main_window(root=None):
             card_width = 300
             card_height = 180
 
+            for card in cards:
+                card.destroy()
+            cards.clear()
             for i, (title, value, colors) in enumerate(card_data):
-                card = create_modern_card(main_area, title, value, width=card_width, height=card_height, colors=colors)
+                card = create_modern_card(page, title, value, width=card_width, height=card_height, colors=colors)
                 card.place(relx=x_start + i*x_spacing, rely=y_start)
+                cards.append(card)
 
-        else:
-            # Placeholder pages
-            try:
-                if page_name == "Customers":
-                    from customers import customer_page
-                    customer_page(main_area)
-                elif page_name == "Rooms":
-                    from rooms import rooms_page
-                    rooms_page(main_area)
-                elif page_name == "Reservations":
-                    from reservations import reservations_page
-                    reservations_page(main_area)
-                elif page_name == "Staff":
-                    from staff import staff_page
-                    staff_page(main_area)
-                elif page_name == "Payments":
-                    from payments import payments_page
-                    payments_page(main_area)
-            except:
-                tk.Label(main_area, text=f"{page_name} Module Placeholder",
-                         bg="#ecf0f1", font=("Arial", 16)).pack(pady=20)
+        # Occupancy, ADR and RevPAR below the cards; cached until bookings change
+        panel, kpis_changed = create_kpi_panel(page, lambda: pages.current == "Dashboard")
+        panel.place(relx=0.03, rely=0.42, relwidth=0.94, relheight=0.4)
 
+        # Counters are maintained by triggers; read them off the UI thread
+        def refresh():
+            query_executor.submit(page, database.read_stats, show_cards)
+            kpis_changed()
+
+        refresh()
+        events.subscribe(page, ("customers", "rooms", "reservations", "payments"), lambda changes: refresh())
+        return refresh
+
+    def module_page(page_name, page):
+        try:
+            if page_name == "Customers":
+                from customers import customer_page
+                return customer_page(page)
+            elif page_name == "Rooms":
+                from rooms import rooms_page
+                return rooms_page(page)
+            elif page_name == "Reservations":
+                from reservations import reservations_page
+                return reservations_page(page)
+            elif page_name == "Staff":
+                from staff import staff_page
+                return staff_page(page)
+            elif page_name == "Payments":
+                from payments import payments_page
+                return payments_page(page)
+        except:
+            tk.Label(page, text=f"{page_name} Module Placeholder",
+                     bg="#ecf0f1", font=("Arial", 16)).pack(pady=20)
+
+    # Built on first visit, then kept and raised; each page is refreshed only
+    # when one of the tables listed here has changed since it was last shown
+    pages = PageManager(main_area)
+    pages.register("Dashboard", dashboard_page, ("customers", "rooms", "reservations", "payments"))
+    pages.register("Customers", partial(module_page, "Customers"), ("customers",))
+    pages.register("Rooms", partial(module_page, "Rooms"), ("rooms",))
+    pages.register("Reservations", partial(module_page, "Reservations"), ("reservations", "customers", "rooms"))
+    pages.register("Staff", partial(module_page, "Staff"), ("staff",))
+    pages.register("Payments", partial(module_page, "Payments"), ("payments", "reservations"))
+
+    def change_page(page_name):
         if page_name == "Logout":
             root.destroy()
+            database.get_pool().close()
             import login
             login.open_app()
+            return
+
+        pages.show(page_name)
 
     # -----------------------------
     # Sidebar Buttons
@@ -176,6 +302,8 @@ def open_main_window(root=None):
         b.pack(fill="x", pady=10, padx=10)
 
     change_page("Dashboard")
+    keep_room_status(root)
+    startup.when_painted(root, "dashboard shown", "time to dashboard")
     return root
 
 # -----------------------------
@@ -0,0 +1,106 @@
+# pages.py
+# Keeps the main window's pages alive between visits.
+#
+# Each page is built the first time it is opened and afterwards only raised,
+# so switching tabs does no widget work and no queries. A page names the
+# tables it shows; when it is hidden the manager notes their versions
+# (database.read_versions, bumped by triggers) and on the next visit calls the
+# page's refresh only if one of them has changed since.
+#
+#   HOTEL_MAX_PAGES=3 python login.py      # keep at most 3 pages built
+#
+# With a cap, the least recently used pages beyond it are destroyed and simply
+# rebuilt the next time they are opened. Every time a page comes to the front
+# its frame gets a <<PageShown>> event, for work a page defers while hidden.
+
+import os
+import tkinter as tk
+from collections import OrderedDict
+import database
+import events
+import query_executor
+
+MAX_PAGES = int(os.environ.get("HOTEL_MAX_PAGES", 0)) or None   # None keeps every page
+PAGE_BG = "#ecf0f1"
+
+
+class Page:
+    def __init__(self, frame, refresh, tables):
+        self.frame = frame
+        self.refresh = refresh
+        self.tables = tables
+        self.versions = None    # versions of `tables` when the page was last hidden
+
+
+class PageManager:
+    """
+    Stacks page frames inside `container` and raises the one being shown.
+
+    register(name, builder, tables) adds a page; builder(frame) fills the frame
+    and returns a callable that reloads the page's data (or None if the page
+    has nothing to reload).
+    """
+
+    def __init__(self, container, max_pages=MAX_PAGES):
+        self.container = container
+        self.max_pages = max_pages
+        self.builders = {}
+        self.pages = OrderedDict()    # name -> Page, least recently shown first
+        self.current = None
+
+    def register(self, name, builder, tables=()):
+        self.builders[name] = (builder, tuple(tables))
+
+    def show(self, name):
+        if name == self.current:
+            return
+        previous = self.pages.get(self.current)
+        if previous is not None:
+            previous.versions = self._versions(previous.tables)
+
+        page = self.pages.get(name)
+        if page is None:
+            page = self._build(name)
+        elif page.refresh is not None and page.tables and self._versions(page.tables) != page.versions:
+            page.refresh()
+
+        page.frame.tkraise()
+        self.pages.move_to_end(name)
+        self.current = name
+        self._evict()
+        page.frame.event_generate("<<PageShown>>")
+
+    def _build(self, name):
+        builder, tables = self.builders[name]
+        frame = tk.Frame(self.container, bg=PAGE_BG)
+        frame.place(x=0, y=0, relwidth=1, relheight=1)
+        page = self.pages[name] = Page(frame, builder(frame), tables)
+        if tables:
+            events.subscribe(frame, tables, lambda changes: self._caught_up(page))
+        return page
+
+    def _caught_up(self, page):
+        # The page has just refreshed itself from in-app change events, so only
+        # changes made after this point should trigger a refresh on its next visit
+        if page is not self.pages.get(self.current) and page.versions is not None:
+            page.versions = self._versions(page.tables)
+
+    def _evict(self):
+        if self.max_pages is None:
+            return
+        while len(self.pages) > self.max_pages:
+            name, page = next(iter(self.pages.items()))
+            if name == self.current:
+                break
+            del self.pages[name]
+            # Results still on their way for the evicted page are dropped
+            query_executor.cancel(page.frame)
+            page.frame.destroy()
+
+    @staticmethod
+    def _versions(tables):
+        if not tables:
+            return None
+        with database.connection() as conn:
+            versions = database.read_versions(conn)
+        return tuple(versions.get(table) for table in tables)
@@ -0,0 +1,145 @@
+# passwords.py
+# Salted password hashing for the users table.
+#
+# Hashes are stored as self-describing strings, so the cost can be raised later
+# and old rows upgraded as their owners log in:
+#
+#   scrypt$<n>$<r>$<p>$<salt>$<hash>
+#   pbkdf2_sha256$<iterations>$<salt>$<hash>     (when OpenSSL lacks scrypt)
+#
+# Anything else in the column is a password from before hashing; it still
+# verifies once and needs_rehash() reports it so login can replace it.
+#
+#   python passwords.py --target-ms 250          # pick a cost for this machine
+#
+# Hashing is deliberately slow (SCRYPT_N is tuned for ~100-250 ms), so callers
+# on the Tk thread must run it through query_executor, never directly.
+
+import base64
+import hashlib
+import hmac
+import os
+import time
+
+SCRYPT_N = 2 ** 15      # CPU/memory cost; 32 MB of memory at r=8
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600_000
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+HAS_SCRYPT = hasattr(hashlib, "scrypt")
+
+
+def _b64(data):
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _scrypt(password, salt, n, r, p):
+    # OpenSSL refuses anything over maxmem; scrypt needs 128 * r * n bytes
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=128 * r * n * 2, dklen=HASH_BYTES)
+
+
+def hash_password(password, n=None):
+    """
+    Return the encoded hash of `password` with a fresh random salt.
+    """
+    salt = os.urandom(SALT_BYTES)
+    if HAS_SCRYPT:
+        n = n or SCRYPT_N
+        digest = _scrypt(password, salt, n, SCRYPT_R, SCRYPT_P)
+        return f"scrypt${n}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PBKDF2_ITERATIONS, HASH_BYTES)
+    return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${_b64(salt)}${_b64(digest)}"
+
+
+def verify(password, stored):
+    """
+    True if `password` matches the stored value (hashed or legacy plaintext).
+    """
+    if stored is None:
+        return False
+    parts = stored.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            digest = _scrypt(password, _unb64(parts[4]), n, r, p)
+            return hmac.compare_digest(digest, _unb64(parts[5]))
+        if parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            digest = hashlib.pbkdf2_hmac("sha256", password.encode(), _unb64(parts[2]), int(parts[1]), HASH_BYTES)
+            return hmac.compare_digest(digest, _unb64(parts[3]))
+    except ValueError:
+        return False
+    # Stored before passwords were hashed
+    return hmac.compare_digest(password.encode(), stored.encode())
+
+
+def needs_rehash(stored):
+    """
+    True for plaintext rows and hashes made with weaker settings than today's.
+    """
+    parts = (stored or "").split("$")
+    try:
+        if HAS_SCRYPT and parts[0] == "scrypt" and len(parts) == 6:
+            return int(parts[1]) < SCRYPT_N or int(parts[2]) < SCRYPT_R or int(parts[3]) < SCRYPT_P
+        if not HAS_SCRYPT and parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            return int(parts[1]) < PBKDF2_ITERATIONS
+    except ValueError:
+        pass
+    return True
+
+
+# Compared against when the username does not exist, so a wrong username takes
+# as long as a wrong password and does not reveal which accounts exist
+_DUMMY = None
+
+
+def dummy_verify(password):
+    global _DUMMY
+    if _DUMMY is None:
+        _DUMMY = hash_password("not a real password")
+    verify(password, _DUMMY)
+    return False
+
+
+# -----------------------------
+# Cost calibration
+# -----------------------------
+def calibrate(target_ms=250, max_n=2 ** 20):
+    """
+    Time scrypt at increasing n and return [(n, ms), ...] up to the first cost
+    that exceeds `target_ms`. The last entry within target is the one to use.
+    """
+    results = []
+    n = 2 ** 12
+    while n <= max_n:
+        started = time.perf_counter()
+        _scrypt("calibration", os.urandom(SALT_BYTES), n, SCRYPT_R, SCRYPT_P)
+        ms = (time.perf_counter() - started) * 1000
+        results.append((n, ms))
+        if ms > target_ms:
+            break
+        n *= 2
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Choose a password hashing cost for this machine")
+    parser.add_argument("--target-ms", type=float, default=250, help="acceptable login delay")
+    args = parser.parse_args()
+
+    if not HAS_SCRYPT:
+        parser.exit(message=f"scrypt unavailable; using PBKDF2 with {PBKDF2_ITERATIONS} iterations\n")
+
+    results = calibrate(args.target_ms)
+    for n, ms in results:
+        print(f"n=2**{n.bit_length() - 1:<3} {ms:8.1f} ms")
+    within = [n for n, ms in results if ms <= args.target_ms] or [results[0][0]]
+    print(f"Suggested SCRYPT_N = 2 ** {within[-1].bit_length() - 1} (currently 2 ** {SCRYPT_N.bit_length() - 1})")
@@ -1,32 +1,26 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from tkcalendar import DateEntry
-import sqlite3
 from datetime import datetime
-
-DB = "hotel.db"
+import api_client
+import booking
+import database
+import events
+import export_data
+import query_executor
+import virtual_table
+from queries import PAYMENTS_SELECT
 
 # -----------------------------
 # Load Payments
 # -----------------------------
+def payments_table(tree):
+    return virtual_table.attach(tree, PAYMENTS_SELECT, "p.payment_id")
+
+
 def load_payments(tree):
-    for row in tree.get_children():
-        tree.delete(row)
-
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT p.payment_id, r.res_id, c.name, p.amount, p.payment_date, p.method
-        FROM payments p
-        JOIN reservations r ON p.res_id=r.res_id
-        JOIN customers c ON r.customer_id=c.customer_id
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-
-    for i, r in enumerate(rows):
-        tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-        tree.insert("", "end", values=r, tags=(tag,))
+    # Windowed: fetches the first page now, the rest while scrolling
+    payments_table(tree).load()
 
 # -----------------------------
 # Add Payment
@@ -52,27 +46,19 @@ def add_payment(tree, res_var, amount_var, date_var, method_var):
         messagebox.showerror("Error", "Amount must be a number")
         return
 
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-
-    # Check reservation exists
-    cursor.execute("SELECT res_id FROM reservations WHERE res_id=?", (res_id,))
-    res = cursor.fetchone()
-    if not res:
-        messagebox.showerror("Error", "Reservation not found")
-        conn.close()
+    try:
+        payment_id = api_client.add_payment(res_id, amount, payment_date, method_var.get())
+    except booking.BookingError as exc:
+        messagebox.showerror("Error", str(exc))
         return
 
-    # Insert payment
-    cursor.execute(
-        "INSERT INTO payments(res_id, amount, payment_date, method) VALUES(?,?,?,?)",
-        (res_id, amount, payment_date, method_var.get())
-    )
-    conn.commit()
-    conn.close()
+    table = payments_table(tree)
+    with database.connection() as conn:
+        row = table.fetch_row(conn, payment_id)
 
+    events.publish("payments", payment_id)
     messagebox.showinfo("Success", "Payment added successfully")
-    load_payments(tree)  # Refresh table immediately
+    table.apply(payment_id, row)  # Show just the new row
 
 # -----------------------------
 # Delete Payment
@@ -88,13 +74,36 @@ def delete_payment(tree):
     if not messagebox.askyesno("Confirm", "Delete this payment?"):
         return
 
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM payments WHERE payment_id=?", (payment_id,))
-    conn.commit()
-    conn.close()
+    try:
+        api_client.delete_payment(payment_id)
+    except booking.NotFound:
+        pass  # already gone
+    except booking.BookingError as exc:
+        messagebox.showerror("Error", str(exc))
+        return
+    events.publish("payments", payment_id)
     messagebox.showinfo("Deleted", "Payment deleted successfully")
-    load_payments(tree)  # Refresh table
+    payments_table(tree).apply(payment_id, None)
+
+# -----------------------------
+# Export Payments
+# -----------------------------
+def export_payments(tree):
+    path = filedialog.asksaveasfilename(
+        title="Export Payments",
+        defaultextension=".csv",
+        filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")],
+    )
+    if not path:
+        return
+
+    # Streams on a worker thread; the page stays usable while it writes
+    query_executor.submit(
+        tree,
+        lambda conn: export_data.export_file(conn, "payments", path),
+        lambda report: messagebox.showinfo("Exported", f"Exported {report.rows} payments to\n{path}"),
+        on_error=lambda exc: messagebox.showerror("Error", f"Export failed:\n{exc}"),
+    )
 
 # -----------------------------
 # Payments Page UI
@@ -111,20 +120,24 @@ def payments_page(frame):
     form_frame = tk.Frame(frame, bg="#ecf0f1")
     form_frame.pack(pady=5, padx=20)
 
-    # Fetch reservations
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("SELECT res_id FROM reservations")
-    reservations = [r[0] for r in cursor.fetchall()]
-    conn.close()
-
     # ---------------------
     # Form fields
     # ---------------------
     tk.Label(form_frame, text="Reservation ID:", bg="#ecf0f1").grid(row=0, column=0, padx=5, pady=5)
-    res_var = ttk.Combobox(form_frame, values=reservations, width=25)
+    res_var = ttk.Combobox(form_frame, width=25)
     res_var.grid(row=0, column=1, padx=5, pady=5)
 
+    # Reservation IDs load in the background
+    def load_reservation_ids():
+        query_executor.submit(
+            res_var,
+            lambda conn: [r[0] for r in conn.execute("SELECT res_id FROM reservations")],
+            lambda reservations: res_var.configure(values=reservations),
+            busy=False,
+        )
+
+    load_reservation_ids()
+
     tk.Label(form_frame, text="Amount:", bg="#ecf0f1").grid(row=1, column=0, padx=5, pady=5)
     amount_var = tk.Entry(form_frame, width=27)
     amount_var.grid(row=1, column=1, padx=5, pady=5)
@@ -159,6 +172,27 @@ def payments_page(frame):
               command=lambda: add_payment(tree, res_var, amount_var, date_var, method_var)).grid(row=0, column=0, padx=5)
     tk.Button(btn_frame, text="Delete Payment", bg="#c0392b", fg="white",
               command=lambda: delete_payment(tree)).grid(row=0, column=1, padx=5)
+    tk.Button(btn_frame, text="Export", bg="#2980b9", fg="white",
+              command=lambda: export_payments(tree)).grid(row=0, column=2, padx=5)
 
     # Load initial data
     load_payments(tree)
+
+    def on_change(changes):
+        res_ids = changes.get("reservations", ())
+        if "reservations" in changes:
+            load_reservation_ids()
+        # Payments of a deleted reservation drop out of the joined rows
+        shown = {str(tree.item(iid, "values")[1]) for iid in tree.get_children()} if res_ids else set()
+        if "customers" in changes or res_ids is None or shown & {str(r) for r in res_ids}:
+            payments_table(tree).reload()
+
+    events.subscribe(tree, ("customers", "reservations"), on_change)
+
+    # Called by the page manager when payments or reservations changed while
+    # the page was hidden
+    def refresh():
+        load_reservation_ids()
+        payments_table(tree).reload()
+
+    return refresh
@@ -0,0 +1,99 @@
+# properties.py
+# One database file per property (hotel) of the group.
+#
+# Each property keeps its own <name>.db in PROPERTIES_DIR:
+#
+#   properties/
+#       lahore.db
+#       islamabad.db
+#
+#   HOTEL_PROPERTIES=/srv/hotels python login.py
+#   python properties.py add karachi      # create and migrate karachi.db
+#   python properties.py list
+#
+# The login window lists the properties and every page, pool and cache then
+# works on the chosen one. Users are per property, as is everything else.
+# Without a properties folder the app runs on hotel.db alone, as before.
+# group_report.py reports across all of them at once.
+
+import os
+import sys
+import database
+
+PROPERTIES_DIR = os.environ.get("HOTEL_PROPERTIES", "properties")
+SUFFIX = ".db"
+DEFAULT_DB = database.DB_PATH
+
+# Modules holding data from the open database, and how to drop it. Only
+# modules already imported can hold any, so none is imported here.
+_CACHES = (("availability", "invalidate"), ("typeahead", "invalidate"), ("kpi", "clear_cache"))
+
+current = None    # name of the property the app has open
+
+
+def list_properties(directory=None):
+    """
+    {name: database path}, sorted by name. Without property databases this is
+    just the default database.
+    """
+    directory = directory or PROPERTIES_DIR
+    try:
+        files = sorted(f for f in os.listdir(directory) if f.endswith(SUFFIX))
+    except FileNotFoundError:
+        files = []
+    if not files:
+        return {os.path.splitext(os.path.basename(DEFAULT_DB))[0]: DEFAULT_DB}
+    return {f[:-len(SUFFIX)]: os.path.join(directory, f) for f in files}
+
+
+def select(name, path):
+    """
+    Open property `name`: every connection from here on goes to `path`.
+    """
+    global current
+    if os.path.abspath(path) != os.path.abspath(database.DB_PATH):
+        database.close_pool()
+        database.DB_PATH = path
+        for module, reset in _CACHES:
+            if module in sys.modules:
+                getattr(sys.modules[module], reset)()
+    current = name
+
+
+def add(name, directory=None):
+    """
+    Create (or bring up to date) the database for property `name`.
+    Returns its path.
+    """
+    directory = directory or PROPERTIES_DIR
+    if not name or os.sep in name or name != name.strip() or name.startswith("."):
+        raise ValueError(f"invalid property name: {name!r}")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name + SUFFIX)
+    conn = database.connect(path)
+    try:
+        database.migrate(conn)
+    finally:
+        conn.close()
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the group's property databases")
+    parser.add_argument("command", choices=["list", "add"])
+    parser.add_argument("name", nargs="?", help="property to add")
+    parser.add_argument("--dir", default=PROPERTIES_DIR, help="property databases (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        if not args.name:
+            parser.error("add needs a property name")
+        try:
+            print(f"{args.name}: {add(args.name, args.dir)}")
+        except ValueError as exc:
+            parser.error(str(exc))
+    else:
+        for name, path in list_properties(args.dir).items():
+            print(f"{name}\t{path}")
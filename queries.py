@@ -0,0 +1,51 @@
+# queries.py
+# SQL shared by the Tk pages and the headless tools (benchmark.py). Nothing
+# here imports Tk, so the benchmark runs without tkinter or tkcalendar.
+
+PAGE_SIZE = 200        # rows fetched per query
+
+# What the Reservations and Payments pages list
+RESERVATIONS_SELECT = """
+    SELECT r.res_id,
+           c.name,
+           ro.room_no,
+           r.check_in,
+           r.check_out,
+           r.total_days,
+           r.total_cost,
+           r.status
+    FROM reservations r
+    JOIN customers c ON r.customer_id = c.customer_id
+    JOIN rooms ro ON r.room_id = ro.room_id
+"""
+
+PAYMENTS_SELECT = """
+    SELECT p.payment_id, r.res_id, c.name, p.amount, p.payment_date, p.method
+    FROM payments p
+    JOIN reservations r ON p.res_id=r.res_id
+    JOIN customers c ON r.customer_id=c.customer_id
+"""
+
+
+def page_query(select, key, where="", params=(), after=None, before=None, limit=PAGE_SIZE):
+    """
+    SQL and parameters for one keyset page of `select`: rows after `after` in
+    key order, or the rows just before `before` (newest first).
+    """
+    clauses = []
+    params = list(params)
+    if where:
+        clauses.append(f"({where})")
+    if after is not None:
+        clauses.append(f"{key} > ?")
+        params.append(after)
+    if before is not None:
+        clauses.append(f"{key} < ?")
+        params.append(before)
+
+    sql = select
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {key} {'DESC' if before is not None else 'ASC'} LIMIT ?"
+    params.append(limit)
+    return sql, params
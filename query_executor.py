@@ -0,0 +1,169 @@
+# query_executor.py
+# Runs database reads on worker threads so the Tk mainloop never waits on SQLite.
+# Results are handed back on the Tk thread by polling with after(), never by
+# touching widgets from a worker.
+
+import queue
+import threading
+import tkinter as tk
+from tkinter import messagebox
+import database
+
+WORKERS = 2          # leaves pool connections free for writes on the UI thread
+POLL_MS = 15         # how often the UI checks for finished queries
+
+
+class Ticket:
+    """
+    Handle for one submitted query. cancel() drops the result (and skips the
+    query entirely if a worker has not picked it up yet).
+    """
+
+    def __init__(self, owner, fn, callback, on_error, busy):
+        self.owner = owner
+        self.fn = fn
+        self.callback = callback
+        self.on_error = on_error
+        self.busy = busy
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class QueryExecutor:
+    def __init__(self, workers=WORKERS):
+        self.workers = workers
+        self._jobs = queue.Queue()
+        self._done = queue.Queue()
+        self._threads = []
+        self._pending = []            # tickets submitted and not yet delivered
+        self._indicators = {}         # owner path -> (label, in-flight count)
+        self._polling = None          # widget whose interpreter runs the poll loop
+
+    # -----------------------------
+    # Worker side
+    # -----------------------------
+    def _start(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, daemon=True, name="query-executor")
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            ticket = self._jobs.get()
+            if ticket.cancelled:
+                self._done.put((ticket, None, None))
+                continue
+            try:
+                with database.connection() as conn:
+                    result = ticket.fn(conn)
+                self._done.put((ticket, result, None))
+            except Exception as exc:
+                self._done.put((ticket, None, exc))
+
+    # -----------------------------
+    # UI side (call only from the Tk thread)
+    # -----------------------------
+    def submit(self, owner, fn, callback, on_error=None, busy=True):
+        """
+        Run `fn(conn)` on a worker with a pooled connection, then call
+        `callback(result)` on the Tk thread. `owner` is the widget the result is
+        for; it is skipped if the owner has been destroyed or cancelled.
+        """
+        self._start()
+        ticket = Ticket(owner, fn, callback, on_error, busy)
+        self._pending.append(ticket)
+        if busy:
+            self._show_busy(owner)
+        self._jobs.put(ticket)
+        self._schedule_poll(owner)
+        return ticket
+
+    def cancel(self, widget):
+        """
+        Cancel every in-flight query owned by `widget` or any of its children,
+        e.g. when the user navigates away from a page.
+        """
+        path = str(widget)
+        for ticket in self._pending:
+            owner = str(ticket.owner)
+            if owner == path or owner.startswith(path + "."):
+                ticket.cancel()
+
+    def _schedule_poll(self, widget):
+        # A poll scheduled on a window that has since been destroyed never fires
+        if self._polling is not None and self._exists(self._polling):
+            return
+        self._polling = widget.winfo_toplevel()
+        self._polling.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        root, self._polling = self._polling, None
+        try:
+            while True:
+                try:
+                    ticket, result, error = self._done.get_nowait()
+                except queue.Empty:
+                    break
+                self._pending.remove(ticket)
+                self._deliver(ticket, result, error)
+        finally:
+            if self._pending:
+                try:
+                    self._schedule_poll(root)
+                except tk.TclError:
+                    # Window closed (e.g. logout); remaining results are dropped
+                    self._pending.clear()
+
+    def _deliver(self, ticket, result, error):
+        if ticket.busy:
+            self._hide_busy(ticket.owner)
+        if ticket.cancelled or not self._exists(ticket.owner):
+            return
+        if error is None:
+            ticket.callback(result)
+        elif ticket.on_error is not None:
+            ticket.on_error(error)
+        else:
+            messagebox.showerror("Error", f"Could not load data:\n{error}")
+
+    @staticmethod
+    def _exists(widget):
+        try:
+            return bool(widget.winfo_exists())
+        except tk.TclError:
+            return False
+
+    # -----------------------------
+    # Loading indicator
+    # -----------------------------
+    def _show_busy(self, owner):
+        path = str(owner)
+        label, count = self._indicators.get(path, (None, 0))
+        if label is None:
+            label = tk.Label(owner, text="Loading...", bg="#f39c12", fg="white", font=("Arial", 10, "bold"))
+            label.place(relx=1.0, rely=0.0, anchor="ne")
+        self._indicators[path] = (label, count + 1)
+
+    def _hide_busy(self, owner):
+        path = str(owner)
+        label, count = self._indicators.get(path, (None, 0))
+        if count <= 1:
+            self._indicators.pop(path, None)
+            if label is not None and self._exists(label):
+                label.destroy()
+        else:
+            self._indicators[path] = (label, count - 1)
+
+
+_executor = QueryExecutor()
+
+
+def submit(owner, fn, callback, on_error=None, busy=True):
+    return _executor.submit(owner, fn, callback, on_error, busy)
+
+
+def cancel(widget):
+    _executor.cancel(widget)
@@ -0,0 +1,287 @@
+# query_trace.py
+# Optional tracing for every SQL statement the app runs.
+#
+#   HOTEL_SQL_TRACE=1 HOTEL_SLOW_MS=25 python login.py
+#   kill -USR1 <pid>                     # write the histograms now
+#
+# When enabled, database.py opens connections with TracedConnection, which
+# times each statement from execute() until its last row has been fetched,
+# counts the rows, and notes the page function that issued it. Statements slower
+# than the threshold go to the slow-query log; every statement feeds a latency
+# histogram that dump() writes out (also on exit and on SIGUSR1).
+# When disabled, connections are plain sqlite3 connections and cost nothing extra.
+
+import atexit
+import json
+import logging
+import os
+import re
+import signal
+import sqlite3
+import sys
+import threading
+import time
+
+SLOW_MS = 50.0
+SLOW_LOG = "slow_queries.log"
+DUMP_PATH = "query_stats.json"
+# Upper bounds of the histogram buckets, in ms; the last bucket is open-ended
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Frames in these files are plumbing, not the caller we want to report
+_SKIP_FILES = {"query_trace.py", "database.py", "contextlib.py", "query_executor.py", "threading.py"}
+
+log = logging.getLogger("hotel.sql")
+
+_enabled = False
+_slow_ms = SLOW_MS
+_stats = {}                  # normalized sql -> StatementStats
+_lock = threading.Lock()
+
+
+class StatementStats:
+    def __init__(self, sql):
+        self.sql = sql
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.callers = {}
+
+    def add(self, ms, rows, caller):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.rows += rows
+        i = 0
+        while i < len(BUCKETS_MS) and ms > BUCKETS_MS[i]:
+            i += 1
+        self.buckets[i] += 1
+        self.callers[caller] = self.callers.get(caller, 0) + 1
+
+    def as_dict(self):
+        labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "sql": self.sql,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "histogram": {label: n for label, n in zip(labels, self.buckets) if n},
+            "callers": dict(sorted(self.callers.items(), key=lambda kv: -kv[1])),
+        }
+
+
+def _normalize(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def _caller():
+    """
+    "module.function" of the nearest frame outside the database plumbing.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.basename(frame.f_code.co_filename)
+        if filename not in _SKIP_FILES:
+            name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+            return f"{os.path.splitext(filename)[0]}.{name}"
+        frame = frame.f_back
+    return "?"
+
+
+def record(sql, ms, rows, caller):
+    key = _normalize(sql)
+    with _lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = StatementStats(key)
+        stats.add(ms, rows, caller)
+    if ms >= _slow_ms:
+        # Parameters are left out on purpose: they can hold passwords and guest details
+        log.warning("%.1f ms  %d rows  %s  %s", ms, rows, caller, key)
+
+
+# -----------------------------
+# Traced connection
+# -----------------------------
+class TracedCursor(sqlite3.Cursor):
+    """
+    Times a statement from execute() until its rows run out (or the cursor is
+    reused or closed), so lazily fetched SELECTs are measured in full.
+    """
+
+    _sql = None
+
+    def _start(self, sql, caller):
+        self._finish()
+        self._sql = sql
+        self._caller = caller
+        self._rows = 0
+        self._ms = 0.0
+
+    def _finish(self):
+        if self._sql is not None:
+            sql, self._sql = self._sql, None
+            rows = self._rows if self.description is not None or self._rows else max(self.rowcount, 0)
+            record(sql, self._ms, rows, self._caller)
+
+    def _timed(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._ms += (time.perf_counter() - started) * 1000
+
+    def execute(self, sql, parameters=()):
+        self._start(sql, _caller())
+        self._timed(super().execute, sql, parameters)
+        if self.description is None:
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._start(sql, _caller())
+        self._timed(super().executemany, sql, seq_of_parameters)
+        self._finish()
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        elif self._sql is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if self._sql is not None:
+            self._rows += len(rows)
+            if not rows:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._sql is not None:
+            self._rows += len(rows)
+            self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._sql is not None:
+            self._rows += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass  # interpreter shutting down
+
+
+class TracedConnection(sqlite3.Connection):
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    # The C implementations of these bypass cursor(), so route them through it
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def factory():
+    """
+    Connection class for sqlite3.connect(factory=...).
+    """
+    return TracedConnection if _enabled else sqlite3.Connection
+
+
+# -----------------------------
+# Control
+# -----------------------------
+def enable(slow_ms=SLOW_MS, log_path=SLOW_LOG, dump_path=DUMP_PATH):
+    """
+    Trace connections opened from now on. Call before the pool opens any.
+    """
+    global _enabled, _slow_ms
+    _slow_ms = slow_ms
+    if not _enabled:
+        if log_path and not log.handlers:
+            handler = logging.FileHandler(log_path)
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            log.addHandler(handler)
+            log.setLevel(logging.WARNING)
+            log.propagate = False
+        if dump_path:
+            atexit.register(dump, dump_path)
+            if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+                signal.signal(signal.SIGUSR1, lambda signum, frame: dump(dump_path))
+    _enabled = True
+
+
+def enabled():
+    return _enabled
+
+
+def snapshot():
+    """
+    Per-statement stats, slowest total time first.
+    """
+    with _lock:
+        stats = [s.as_dict() for s in _stats.values()]
+    return sorted(stats, key=lambda s: -s["total_ms"])
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def dump(path=DUMP_PATH):
+    with open(path, "w") as f:
+        json.dump({"slow_ms": _slow_ms, "buckets_ms": BUCKETS_MS, "statements": snapshot()}, f, indent=2)
+    return path
+
+
+def summary(statements=None, limit=20):
+    """
+    Plain-text table of the statements with the most total time
+    (from this process, or from a dump's "statements").
+    """
+    lines = [f"{'count':>8} {'total ms':>10} {'mean ms':>9} {'max ms':>9}  caller / sql"]
+    for s in (snapshot() if statements is None else statements)[:limit]:
+        caller = next(iter(s["callers"]), "?")
+        lines.append(f"{s['count']:>8} {s['total_ms']:>10.1f} {s['mean_ms']:>9.3f} {s['max_ms']:>9.3f}  "
+                     f"{caller}: {s['sql'][:100]}")
+    return "\n".join(lines)
+
+
+if os.environ.get("HOTEL_SQL_TRACE"):
+    enable(float(os.environ.get("HOTEL_SLOW_MS", SLOW_MS)))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show the slowest statements from a trace dump")
+    parser.add_argument("path", nargs="?", default=DUMP_PATH)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.path) as f:
+        print(summary(json.load(f)["statements"], args.limit))
@@ -1,39 +1,27 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tkcalendar import DateEntry
-import sqlite3
-from datetime import datetime
-
-DB = "hotel.db"
+from datetime import datetime, date, timedelta
+import api_client
+import availability
+import booking
+import database
+import events
+import query_executor
+import typeahead
+import virtual_table
+from queries import RESERVATIONS_SELECT
 
 # -----------------------------
 # Load Reservations
 # -----------------------------
+def reservations_table(tree):
+    return virtual_table.attach(tree, RESERVATIONS_SELECT, "r.res_id")
+
+
 def load_reservations(tree):
-    for row in tree.get_children():
-        tree.delete(row)
-
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT r.res_id,
-               c.name,
-               ro.room_no,
-               r.check_in,
-               r.check_out,
-               r.total_days,
-               r.total_cost,
-               r.status
-        FROM reservations r
-        JOIN customers c ON r.customer_id = c.customer_id
-        JOIN rooms ro ON r.room_id = ro.room_id
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-
-    for i, r in enumerate(rows):
-        tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-        tree.insert("", "end", values=r, tags=(tag,))
+    # Windowed: fetches the first page now, the rest while scrolling
+    reservations_table(tree).load()
 
 
 # -----------------------------
@@ -43,6 +31,9 @@ def add_reservation(tree, customer_var, room_var, checkin_entry, checkout_entry)
     if not customer_var.get() or not room_var.get():
         messagebox.showerror("Error", "Select customer and room")
         return
+    if customer_var.customer_id is None:
+        messagebox.showerror("Error", "Pick the customer from the list of matches")
+        return
 
     check_in = checkin_entry.get()
     check_out = checkout_entry.get()
@@ -54,51 +45,27 @@ def add_reservation(tree, customer_var, room_var, checkin_entry, checkout_entry)
         messagebox.showerror("Error", "Invalid date format")
         return
 
-    total_days = (co - ci).days
-    if total_days <= 0:
+    if (co - ci).days <= 0:
         messagebox.showerror("Error", "Check-out must be after check-in")
         return
 
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-
-    # Get customer ID
-    cursor.execute("SELECT customer_id FROM customers WHERE name=?", (customer_var.get(),))
-    customer = cursor.fetchone()
-    if not customer:
-        messagebox.showerror("Error", "Customer not found")
-        conn.close()
-        return
-    customer_id = customer[0]
-
-    # Get room ID and price
-    cursor.execute("SELECT room_id, price FROM rooms WHERE room_no=? AND status='Available'", (room_var.get(),))
-    room = cursor.fetchone()
-    if not room:
-        messagebox.showerror("Error", "Room not available")
-        conn.close()
+    # Booked locally, or by the booking service when HOTEL_API_URL is set
+    try:
+        res_id = api_client.book_room(room_var.get(), check_in, check_out, customer_id=customer_var.customer_id)
+    except booking.BookingError as exc:
+        messagebox.showerror("Error", str(exc))
         return
-    room_id, price = room
 
-    total_cost = total_days * price
-
-    # Insert reservation
-    cursor.execute("""
-        INSERT INTO reservations
-        (customer_id, room_id, check_in, check_out, total_days, total_cost, status)
-        VALUES (?, ?, ?, ?, ?, ?, 'Active')
-    """, (customer_id, room_id, check_in, check_out, total_days, total_cost))
-
-    # Update room status
-    cursor.execute("UPDATE rooms SET status='Booked' WHERE room_id=?", (room_id,))
-
-    conn.commit()
-    conn.close()
+    table = reservations_table(tree)
+    with database.connection() as conn:
+        row = table.fetch_row(conn, res_id)
+        room_id = conn.execute("SELECT room_id FROM reservations WHERE res_id=?", (res_id,)).fetchone()[0]
 
+    # Free-room lists, the rooms table and the dashboard update from these
+    events.publish("reservations", res_id)
+    events.publish("rooms", room_id)
     messagebox.showinfo("Success", "Reservation added successfully")
-    load_reservations(tree)
-    # Optionally refresh available rooms in the combobox
-    refresh_rooms(tree, room_var)
+    table.apply(res_id, row)
 
 
 # -----------------------------
@@ -115,44 +82,49 @@ def delete_reservation(tree):
     if not messagebox.askyesno("Confirm", "Delete this reservation?"):
         return
 
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-
-    # Get room id
-    cursor.execute("SELECT room_id FROM reservations WHERE res_id=?", (res_id,))
-    room_id = cursor.fetchone()[0]
-
-    # Free the room
-    cursor.execute("UPDATE rooms SET status='Available' WHERE room_id=?", (room_id,))
+    with database.connection() as conn:
+        room = conn.execute("SELECT room_id FROM reservations WHERE res_id=?", (res_id,)).fetchone()
 
-    # Delete reservation
-    cursor.execute("DELETE FROM reservations WHERE res_id=?", (res_id,))
-    conn.commit()
-    conn.close()
+    try:
+        api_client.cancel_reservation(res_id)
+    except booking.NotFound:
+        pass  # already gone (e.g. cancelled from another desk)
+    except booking.BookingError as exc:
+        messagebox.showerror("Error", str(exc))
+        return
 
+    events.publish("reservations", res_id)
+    if room is not None:
+        events.publish("rooms", room[0])
     messagebox.showinfo("Deleted", "Reservation deleted")
-    load_reservations(tree)
-    # Optionally refresh rooms in combobox
-    refresh_rooms(tree)
+    reservations_table(tree).apply(res_id, None)
 
 
 # -----------------------------
 # Refresh available rooms
 # -----------------------------
-def refresh_rooms(tree=None, room_var=None):
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("SELECT room_no FROM rooms WHERE status='Available'")
-    rooms = [r[0] for r in cursor.fetchall()]
-    conn.close()
-
-    if room_var:
+def refresh_rooms(tree=None, room_var=None, checkin_entry=None, checkout_entry=None):
+    # Defaults to tonight when no dates are given
+    check_in = checkin_entry.get() if checkin_entry else date.today().isoformat()
+    check_out = checkout_entry.get() if checkout_entry else (date.today() + timedelta(days=1)).isoformat()
+
+    if not room_var:
+        return
+
+    def fetch(conn):
+        if check_in >= check_out:
+            return []
+        return api_client.free_rooms(check_in, check_out, conn)
+
+    def fill(rooms):
         room_var['values'] = rooms
         if rooms:
             room_var.set(rooms[0])
         else:
             room_var.set('')
 
+    query_executor.submit(room_var, fetch, fill, busy=False)
+
 # -----------------------------
 # Reservations Page UI
 # -----------------------------
@@ -175,25 +147,18 @@ def reservations_page(frame):
     form_frame = tk.Frame(frame, bg="#ecf0f1")
     form_frame.pack(pady=10, padx=20)
 
-    # Fetch customers & available rooms
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT name FROM customers")
-    customers = [c[0] for c in cursor.fetchall()]
-
-    cursor.execute("SELECT room_no FROM rooms WHERE status='Available'")
-    rooms = [r[0] for r in cursor.fetchall()]
-    conn.close()
+    # Pick up bookings made from other terminals since the index was built
+    availability.invalidate()
 
-    # Customer
+    # Customer (type part of a name or phone number, then pick a match;
+    # rooms follow the selected dates)
     tk.Label(form_frame, text="Customer:", bg="#ecf0f1", font=("Arial", 12)).grid(row=0, column=0, padx=5, pady=5)
-    customer_var = ttk.Combobox(form_frame, values=customers, width=25)
+    customer_var = typeahead.GuestPicker(form_frame, width=28)
     customer_var.grid(row=0, column=1, padx=5, pady=5)
 
     # Room
     tk.Label(form_frame, text="Room:", bg="#ecf0f1", font=("Arial", 12)).grid(row=1, column=0, padx=5, pady=5)
-    room_var = ttk.Combobox(form_frame, values=rooms, width=25)
+    room_var = ttk.Combobox(form_frame, width=25)
     room_var.grid(row=1, column=1, padx=5, pady=5)
 
     # Check-in
@@ -204,8 +169,17 @@ def reservations_page(frame):
     # Check-out
     tk.Label(form_frame, text="Check-out:", bg="#ecf0f1", font=("Arial", 12)).grid(row=3, column=0, padx=5, pady=5)
     checkout_entry = DateEntry(form_frame, date_pattern="yyyy-mm-dd", width=22)
+    checkout_entry.set_date(date.today() + timedelta(days=1))
     checkout_entry.grid(row=3, column=1, padx=5, pady=5)
 
+    # Offer only rooms free for the chosen stay
+    def on_dates_changed(event=None):
+        refresh_rooms(None, room_var, checkin_entry, checkout_entry)
+
+    checkin_entry.bind("<<DateEntrySelected>>", on_dates_changed)
+    checkout_entry.bind("<<DateEntrySelected>>", on_dates_changed)
+    on_dates_changed()
+
     # ---------------------
     # Table (Treeview)
     # ---------------------
@@ -248,3 +222,23 @@ def reservations_page(frame):
 
     # Load data into treeview
     load_reservations(tree)
+
+    def on_change(changes):
+        # Customer names are shown in the table; cascaded deletes have no keys
+        if "customers" in changes or changes.get("reservations", ()) is None:
+            reservations_table(tree).reload()
+        on_dates_changed()
+
+    # Free rooms follow every booking, wherever it was made in this app
+    events.subscribe(tree, ("customers", "rooms", "reservations"), on_change)
+
+    # Called by the page manager when reservations, customers or rooms changed
+    # while the page was hidden
+    def refresh():
+        availability.invalidate()
+        typeahead.invalidate()
+        customer_var.reload()
+        on_dates_changed()
+        reservations_table(tree).reload()
+
+    return refresh
@@ -0,0 +1,241 @@
+# rollup.py
+# Daily rollups of payments and reservations, kept current incrementally.
+#
+#   daily_revenue       (day, method) -> amount, payments
+#   daily_reservations  day -> arrivals, departures, booked
+#
+# rollup_marks holds the highest payment_id / res_id already folded in. New
+# rows are added in one GROUP BY over (mark, MAX(id)]: booking.py does this in
+# the same transaction as each write, and bulk loaders once at the end. Updates
+# and deletes of rows at or below the mark are corrected by triggers (migration
+# 6 in database.py). Reports therefore read one row per day, not every payment.
+#
+#   python rollup.py revenue --from 2025-01-01 --to 2025-12-31 --by method
+#   python rollup.py --verify          # compare with a full scan
+#   python rollup.py --rebuild
+#
+# Arrivals and departures leave out Cancelled stays; `booked` counts stays by
+# the day they were made (reservations.booked_on, unknown for older rows).
+
+import time
+import booking
+import database
+
+# name -> (table, key, statements folding in rows with mark < key <= newest)
+ROLLUPS = {
+    "payments": ("payments", "payment_id", [
+        """
+        INSERT INTO daily_revenue (day, method, amount, payments)
+        SELECT COALESCE(payment_date, ''), COALESCE(method, ''), SUM(COALESCE(amount, 0)), COUNT(*)
+        FROM payments WHERE payment_id > ? AND payment_id <= ?
+        GROUP BY 1, 2
+        ON CONFLICT (day, method) DO UPDATE
+        SET amount = amount + excluded.amount, payments = payments + excluded.payments
+        """,
+    ]),
+    "reservations": ("reservations", "res_id", [
+        """
+        INSERT INTO daily_reservations (day, arrivals)
+        SELECT check_in, SUM(status IS NOT 'Cancelled')
+        FROM reservations WHERE res_id > ? AND res_id <= ?
+        GROUP BY 1
+        ON CONFLICT (day) DO UPDATE SET arrivals = arrivals + excluded.arrivals
+        """,
+        """
+        INSERT INTO daily_reservations (day, departures)
+        SELECT check_out, SUM(status IS NOT 'Cancelled')
+        FROM reservations WHERE res_id > ? AND res_id <= ?
+        GROUP BY 1
+        ON CONFLICT (day) DO UPDATE SET departures = departures + excluded.departures
+        """,
+        """
+        INSERT INTO daily_reservations (day, booked)
+        SELECT booked_on, COUNT(*)
+        FROM reservations WHERE res_id > ? AND res_id <= ? AND booked_on IS NOT NULL
+        GROUP BY 1
+        ON CONFLICT (day) DO UPDATE SET booked = booked + excluded.booked
+        """,
+    ]),
+}
+
+
+def _marks(conn):
+    return dict(conn.execute("SELECT name, last_id FROM rollup_marks"))
+
+
+def advance(conn):
+    """
+    Fold every row past the high-water marks into the rollups. Must run inside
+    a write transaction (BEGIN IMMEDIATE), so no row can slip in between
+    reading MAX(id) and moving the mark. Returns {name: new mark} for the
+    rollups that moved.
+    """
+    marks = _marks(conn)
+    moved = {}
+    for name, (table, key, statements) in ROLLUPS.items():
+        last = marks.get(name, 0)
+        newest = conn.execute(f"SELECT MAX({key}) FROM {table}").fetchone()[0]
+        if newest is None or newest <= last:
+            continue
+        for sql in statements:
+            conn.execute(sql, (last, newest))
+        conn.execute("UPDATE rollup_marks SET last_id = ? WHERE name = ?", (newest, name))
+        moved[name] = newest
+    return moved
+
+
+def _behind(conn):
+    marks = _marks(conn)
+    return any(
+        (conn.execute(f"SELECT MAX({key}) FROM {table}").fetchone()[0] or 0) > marks.get(name, 0)
+        for name, (table, key, _) in ROLLUPS.items()
+    )
+
+
+def catch_up(conn):
+    """
+    advance() in its own transaction; skips the write lock when nothing is new.
+    """
+    if not _behind(conn):
+        return {}
+    return booking.write_transaction(conn, advance)
+
+
+def rebuild(conn):
+    """
+    Empty the rollups and fold in every row again.
+    """
+    def reset(conn):
+        conn.execute("DELETE FROM daily_revenue")
+        conn.execute("DELETE FROM daily_reservations")
+        conn.execute("UPDATE rollup_marks SET last_id = 0")
+        return advance(conn)
+
+    return booking.write_transaction(conn, reset)
+
+
+# -----------------------------
+# Reports
+# -----------------------------
+def revenue_by_day(conn, date_from, date_to):
+    """
+    [(day, amount, payments), ...] for days in [date_from, date_to].
+    """
+    catch_up(conn)
+    return conn.execute("""
+        SELECT day, SUM(amount), SUM(payments) FROM daily_revenue
+        WHERE day BETWEEN ? AND ? GROUP BY day ORDER BY day
+    """, (date_from, date_to)).fetchall()
+
+
+def revenue_by_method(conn, date_from, date_to, fold=True):
+    """
+    [(method, amount, payments), ...] over [date_from, date_to], largest first.
+    With fold=False nothing is written (read-only connections): payments past
+    the mark are added from the payments table instead of folded in.
+    """
+    if fold:
+        catch_up(conn)
+        return conn.execute("""
+            SELECT method, SUM(amount), SUM(payments) FROM daily_revenue
+            WHERE day BETWEEN ? AND ? GROUP BY method ORDER BY 2 DESC
+        """, (date_from, date_to)).fetchall()
+
+    mark = _marks(conn).get("payments", 0)
+    return conn.execute("""
+        SELECT method, SUM(amount), SUM(payments) FROM (
+            SELECT method, amount, payments FROM daily_revenue
+            WHERE day BETWEEN ? AND ?
+            UNION ALL
+            SELECT COALESCE(method, ''), COALESCE(amount, 0), 1 FROM payments
+            WHERE payment_id > ? AND COALESCE(payment_date, '') BETWEEN ? AND ?
+        ) GROUP BY method ORDER BY 2 DESC
+    """, (date_from, date_to, mark, date_from, date_to)).fetchall()
+
+
+def reservation_days(conn, date_from, date_to):
+    """
+    [(day, arrivals, departures, booked), ...] for days in [date_from, date_to].
+    """
+    catch_up(conn)
+    return conn.execute("""
+        SELECT day, arrivals, departures, booked FROM daily_reservations
+        WHERE day BETWEEN ? AND ? ORDER BY day
+    """, (date_from, date_to)).fetchall()
+
+
+# Full scans giving what the rollups should hold, for verify(): (key columns, scan, stored)
+_SCANS = {
+    "daily_revenue": (2, """
+        SELECT COALESCE(payment_date, ''), COALESCE(method, ''), SUM(COALESCE(amount, 0)), COUNT(*)
+        FROM payments GROUP BY 1, 2
+    """, "SELECT day, method, amount, payments FROM daily_revenue"),
+    "daily_reservations": (1, """
+        SELECT day, SUM(arrivals), SUM(departures), SUM(booked) FROM (
+            SELECT check_in AS day, status IS NOT 'Cancelled' AS arrivals, 0 AS departures, 0 AS booked FROM reservations
+            UNION ALL SELECT check_out, 0, status IS NOT 'Cancelled', 0 FROM reservations
+            UNION ALL SELECT booked_on, 0, 0, 1 FROM reservations WHERE booked_on IS NOT NULL
+        ) GROUP BY day
+    """, "SELECT day, arrivals, departures, booked FROM daily_reservations"),
+}
+
+
+def verify(conn):
+    """
+    Compare the rollups with full scans of the base tables.
+    Returns {rollup: number of keys that differ}; empty when they agree.
+    """
+    catch_up(conn)
+    drift = {}
+    for name, (width, scan, stored) in _SCANS.items():
+        def by_key(rows):
+            # Days whose counts went back to zero stay behind as zero rows
+            return {row[:width]: tuple(round(v, 2) for v in row[width:]) for row in rows if any(row[width:])}
+        expected, actual = by_key(conn.execute(scan)), by_key(conn.execute(stored))
+        differ = sum(1 for k in expected.keys() | actual.keys() if expected.get(k) != actual.get(k))
+        if differ:
+            drift[name] = differ
+    return drift
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Daily revenue and reservation rollups")
+    parser.add_argument("report", nargs="?", choices=["revenue", "reservations"])
+    parser.add_argument("--from", dest="date_from", default="0000-00-00")
+    parser.add_argument("--to", dest="date_to", default="9999-99-99")
+    parser.add_argument("--by", choices=["day", "method"], default="day", help="revenue grouping")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the rollups from scratch")
+    parser.add_argument("--verify", action="store_true", help="compare the rollups with a full scan")
+    parser.add_argument("--db", default=database.DB_PATH, help="database file (default: %(default)s)")
+    args = parser.parse_args()
+
+    database.DB_PATH = args.db
+    conn = database.connect()
+    database.migrate(conn)
+
+    started = time.perf_counter()
+    if args.rebuild:
+        rebuild(conn)
+        print(f"Rebuilt in {time.perf_counter() - started:.2f}s")
+    else:
+        moved = catch_up(conn)
+        if moved:
+            print(f"Caught up to {moved} in {time.perf_counter() - started:.2f}s")
+
+    if args.verify:
+        drift = verify(conn)
+        print("Rollups match the base tables" if not drift else f"Rollups differ: {drift}")
+
+    if args.report == "revenue":
+        fn = revenue_by_method if args.by == "method" else revenue_by_day
+        for row in fn(conn, args.date_from, args.date_to):
+            print(*row, sep="\t")
+    elif args.report == "reservations":
+        print("day\tarrivals\tdepartures\tbooked")
+        for row in reservation_days(conn, args.date_from, args.date_to):
+            print(*row, sep="\t")
+    conn.close()
+    if args.verify and drift:
+        raise SystemExit(1)
@@ -1,34 +1,30 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
-
-DB = "hotel.db"
+import availability
+import database
+import events
+import search
+import virtual_table
 
 # -----------------------------
 # Load Rooms
 # -----------------------------
-def load_rooms(tree, filter_type=None, only_available=False):
-    for row in tree.get_children():
-        tree.delete(row)
+def rooms_table(tree):
+    return virtual_table.attach(tree, "SELECT * FROM rooms", "room_id")
 
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
 
-    query = "SELECT * FROM rooms WHERE 1=1"
+def load_rooms(tree, filter_type=None, only_available=False):
+    where = "1=1"
     params = []
 
     if filter_type:
-        query += " AND room_type=?"
+        where += " AND room_type=?"
         params.append(filter_type)
     if only_available:
-        query += " AND status='Available'"
+        where += " AND status='Available'"
 
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-    conn.close()
-
-    for r in rows:
-        tree.insert("", "end", values=r)
+    rooms_table(tree).load(where, params)
 
 
 # -----------------------------
@@ -39,19 +35,22 @@ def add_room(tree, room_no, room_type, bed, price, status):
         messagebox.showerror("Error", "Room No and Price are required")
         return
 
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-
+    table = rooms_table(tree)
     try:
-        cursor.execute("INSERT INTO rooms (room_no, room_type, bed, price, status) VALUES (?, ?, ?, ?, ?)",
-                       (room_no, room_type, bed, price, status))
-        conn.commit()
-        messagebox.showinfo("Success", "Room added successfully")
-        load_rooms(tree)
+        with database.connection() as conn:
+            cursor = conn.execute("INSERT INTO rooms (room_no, room_type, bed, price, status) VALUES (?, ?, ?, ?, ?)",
+                                  (room_no, room_type, bed, price, status))
+            room_id = cursor.lastrowid
+            availability.sync_room_status(conn, room_id)
+            row = table.fetch_row(conn, room_id)
     except sqlite3.IntegrityError:
         messagebox.showerror("Error", "Room No already exists")
-    finally:
-        conn.close()
+        return
+
+    availability.invalidate()
+    events.publish("rooms", room_id)
+    messagebox.showinfo("Success", "Room added successfully")
+    table.apply(room_id, row)
 
 
 # -----------------------------
@@ -62,16 +61,18 @@ def update_room(tree, room_id, room_no, room_type, bed, price, status):
         messagebox.showerror("Error", "Room No and Price are required")
         return
 
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("""UPDATE rooms 
-                      SET room_no=?, room_type=?, bed=?, price=?, status=? 
-                      WHERE room_id=?""",
-                   (room_no, room_type, bed, price, status, room_id))
-    conn.commit()
-    conn.close()
+    table = rooms_table(tree)
+    with database.connection() as conn:
+        conn.execute("""UPDATE rooms 
+                        SET room_no=?, room_type=?, bed=?, price=?, status=? 
+                        WHERE room_id=?""",
+                     (room_no, room_type, bed, price, status, room_id))
+        availability.sync_room_status(conn, room_id)
+        row = table.fetch_row(conn, room_id)
+    availability.invalidate()
+    events.publish("rooms", room_id)
     messagebox.showinfo("Success", "Room updated successfully")
-    load_rooms(tree)
+    table.apply(room_id, row)
 
 
 # -----------------------------
@@ -88,14 +89,14 @@ def delete_room(tree):
     if not messagebox.askyesno("Confirm", "Delete this room?"):
         return
 
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM rooms WHERE room_id=?", (room_id,))
-    conn.commit()
-    conn.close()
+    with database.connection() as conn:
+        conn.execute("DELETE FROM rooms WHERE room_id=?", (room_id,))
 
+    availability.invalidate()
+    events.publish("rooms", room_id)
+    events.publish("reservations")   # its bookings go with it (ON DELETE CASCADE)
     messagebox.showinfo("Deleted", "Room deleted successfully")
-    load_rooms(tree)
+    rooms_table(tree).apply(room_id, None)
 
 
 # -----------------------------
@@ -103,17 +104,12 @@ def delete_room(tree):
 # -----------------------------
 def search_rooms(tree, search_var):
     val = search_var.get()
-    for row in tree.get_children():
-        tree.delete(row)
-
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM rooms WHERE room_no LIKE ? OR room_type LIKE ?", (f"%{val}%", f"%{val}%"))
-    rows = cursor.fetchall()
-    conn.close()
+    if not val.strip():
+        load_rooms(tree)
+        return
 
-    for r in rows:
-        tree.insert("", "end", values=r)
+    # Ranked prefix match on room number/type via FTS5
+    rooms_table(tree).show_query(lambda conn: search.search(conn, "rooms", val))
 
 
 # -----------------------------
@@ -127,13 +123,15 @@ def change_status(tree, new_status):
 
     room_id = tree.item(selected)["values"][0]
 
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE rooms SET status=? WHERE room_id=?", (new_status, room_id))
-    conn.commit()
-    conn.close()
-    messagebox.showinfo("Success", f"Status changed to {new_status}")
-    load_rooms(tree)
+    table = rooms_table(tree)
+    with database.connection() as conn:
+        conn.execute("UPDATE rooms SET status=? WHERE room_id=?", (new_status, room_id))
+        # "Available" and "Booked" follow today's bookings; other statuses stay as set
+        availability.sync_room_status(conn, room_id)
+        row = table.fetch_row(conn, room_id)
+    events.publish("rooms", room_id)
+    messagebox.showinfo("Success", f"Status changed to {row[5] if row else new_status}")
+    table.apply(room_id, row)
 
 
 # -----------------------------
@@ -168,7 +166,8 @@ def rooms_page(frame):
     price_entry.grid(row=3, column=1, padx=5, pady=5)
 
     tk.Label(form_frame, text="Status:", bg="#ecf0f1").grid(row=4, column=0, padx=5, pady=5)
-    status_entry = ttk.Combobox(form_frame, values=["Available", "Booked"])
+    # Booked/Available follow the reservations; Maintenance takes a room out until set back
+    status_entry = ttk.Combobox(form_frame, values=["Available", "Maintenance"])
     status_entry.grid(row=4, column=1, padx=5, pady=5)
     status_entry.current(0)
 
@@ -205,6 +204,7 @@ def rooms_page(frame):
     search_var.grid(row=0, column=1, padx=5)
     tk.Button(search_frame, text="Search", bg="#f39c12", fg="white",
               command=lambda: search_rooms(tree, search_var)).grid(row=0, column=2, padx=5)
+    search.debounce(search_var, lambda: search_rooms(tree, search_var))
     tk.Button(search_frame, text="Show All", bg="#16a085", fg="white",
               command=lambda: load_rooms(tree)).grid(row=0, column=3, padx=5)
     tk.Button(search_frame, text="Available Only", bg="#e67e22", fg="white",
@@ -220,3 +220,16 @@ def rooms_page(frame):
 
     # Load initial data
     load_rooms(tree)
+
+    # Statuses change when bookings are made or cancelled on other pages
+    events.subscribe(tree, ("rooms",), lambda changes: rooms_table(tree).refresh_rows(changes["rooms"]))
+
+    # Called by the page manager when rooms changed while the page was hidden;
+    # keeps the current search or filter
+    def refresh():
+        if search_var.get().strip():
+            search_rooms(tree, search_var)
+        else:
+            rooms_table(tree).reload()
+
+    return refresh
@@ -0,0 +1,64 @@
+# search.py
+# Full-text search over customers, rooms and staff using SQLite FTS5.
+# The *_fts tables are external-content indexes kept in sync by triggers
+# (see migration 3 in database.py), so searching never scans the base tables.
+
+import re
+
+SEARCH_LIMIT = 200     # best-ranked rows returned per search
+DEBOUNCE_MS = 250      # wait this long after the last keystroke before searching
+
+# table -> (fts table, key column)
+FTS_TABLES = {
+    "customers": ("customers_fts", "customer_id"),
+    "rooms": ("rooms_fts", "room_id"),
+    "staff": ("staff_fts", "staff_id"),
+}
+
+
+def fts_query(text):
+    """
+    Turn free text into an FTS5 query where every word is a prefix match,
+    e.g. "ali kh" -> '"ali"* "kh"*'. Returns None when there is nothing to search.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def search(conn, table, text, limit=SEARCH_LIMIT):
+    """
+    Return full rows of `table` matching `text`, best match first.
+    """
+    query = fts_query(text)
+    if query is None:
+        return []
+
+    fts, key = FTS_TABLES[table]
+    return conn.execute(f"""
+        SELECT t.*
+        FROM {fts}
+        JOIN {table} t ON t.{key} = {fts}.rowid
+        WHERE {fts} MATCH ?
+        ORDER BY {fts}.rank
+        LIMIT ?
+    """, (query, limit)).fetchall()
+
+
+def debounce(entry, callback, delay=DEBOUNCE_MS):
+    """
+    Search-as-you-type: run `callback()` once typing in `entry` pauses for `delay` ms.
+    """
+    pending = [None]
+
+    def on_key(event=None):
+        if pending[0] is not None:
+            entry.after_cancel(pending[0])
+        pending[0] = entry.after(delay, fire)
+
+    def fire():
+        pending[0] = None
+        callback()
+
+    entry.bind("<KeyRelease>", on_key)
@@ -1,24 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
-
-DB = "hotel.db"
+import database
+import events
+import search
+import virtual_table
 
 # -----------------------------
 # Load Staff
 # -----------------------------
-def load_staff(tree):
-    for row in tree.get_children():
-        tree.delete(row)
+def staff_table(tree):
+    return virtual_table.attach(tree, "SELECT * FROM staff", "staff_id")
 
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM staff")
-    rows = cursor.fetchall()
-    conn.close()
 
-    for r in rows:
-        tree.insert("", "end", values=r)
+def load_staff(tree, where="", params=()):
+    staff_table(tree).load(where, params)
 
 
 # -----------------------------
@@ -29,14 +24,15 @@ def add_staff(tree, name, phone, role, salary):
         messagebox.showerror("Error", "Name is required")
         return
 
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO staff(name, phone, role, salary) VALUES (?, ?, ?, ?)",
-                   (name, phone, role, salary))
-    conn.commit()
-    conn.close()
+    table = staff_table(tree)
+    with database.connection() as conn:
+        cursor = conn.execute("INSERT INTO staff(name, phone, role, salary) VALUES (?, ?, ?, ?)",
+                              (name, phone, role, salary))
+        staff_id = cursor.lastrowid
+        row = table.fetch_row(conn, staff_id)
+    events.publish("staff", staff_id)
     messagebox.showinfo("Success", "Staff added successfully")
-    load_staff(tree)
+    table.apply(staff_id, row)
 
 
 # -----------------------------
@@ -47,14 +43,14 @@ def update_staff(tree, staff_id, name, phone, role, salary):
         messagebox.showerror("Error", "Name is required")
         return
 
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE staff SET name=?, phone=?, role=?, salary=? WHERE staff_id=?",
-                   (name, phone, role, salary, staff_id))
-    conn.commit()
-    conn.close()
+    table = staff_table(tree)
+    with database.connection() as conn:
+        conn.execute("UPDATE staff SET name=?, phone=?, role=?, salary=? WHERE staff_id=?",
+                     (name, phone, role, salary, staff_id))
+        row = table.fetch_row(conn, staff_id)
+    events.publish("staff", staff_id)
     messagebox.showinfo("Success", "Staff updated successfully")
-    load_staff(tree)
+    table.apply(staff_id, row)
 
 
 # -----------------------------
@@ -71,13 +67,11 @@ def delete_staff(tree):
     if not messagebox.askyesno("Confirm", "Delete this staff member?"):
         return
 
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM staff WHERE staff_id=?", (staff_id,))
-    conn.commit()
-    conn.close()
+    with database.connection() as conn:
+        conn.execute("DELETE FROM staff WHERE staff_id=?", (staff_id,))
+    events.publish("staff", staff_id)
     messagebox.showinfo("Deleted", "Staff member deleted")
-    load_staff(tree)
+    staff_table(tree).apply(staff_id, None)
 
 
 # -----------------------------
@@ -85,17 +79,12 @@ def delete_staff(tree):
 # -----------------------------
 def search_staff(tree, search_var):
     val = search_var.get()
-    for row in tree.get_children():
-        tree.delete(row)
-
-    conn = sqlite3.connect(DB)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM staff WHERE name LIKE ? OR role LIKE ?", (f"%{val}%", f"%{val}%"))
-    rows = cursor.fetchall()
-    conn.close()
+    if not val.strip():
+        load_staff(tree)
+        return
 
-    for r in rows:
-        tree.insert("", "end", values=r)
+    # Ranked prefix match on name/role via FTS5
+    staff_table(tree).show_query(lambda conn: search.search(conn, "staff", val))
 
 
 # -----------------------------
@@ -156,8 +145,12 @@ def staff_page(frame):
     search_var.grid(row=0, column=1, padx=5)
     tk.Button(search_frame, text="Search", bg="#f39c12", fg="white",
               command=lambda: search_staff(tree, search_var)).grid(row=0, column=2, padx=5)
+    search.debounce(search_var, lambda: search_staff(tree, search_var))
     tk.Button(search_frame, text="Show All", bg="#16a085", fg="white",
               command=lambda: load_staff(tree)).grid(row=0, column=3, padx=5)
 
     # Load initial data
     load_staff(tree)
+
+    # Called by the page manager when staff changed while the page was hidden
+    return lambda: search_staff(tree, search_var)
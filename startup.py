@@ -0,0 +1,71 @@
+# startup.py
+# Cold-start timing and background warm-up of heavy modules.
+#
+#   HOTEL_STARTUP_TIMING=1 python login.py
+#
+# login.py imports this first and calls mark() at each step; with the variable
+# set, the timeline is printed to stderr once the login window has painted and
+# again when the dashboard first appears.
+
+import importlib
+import os
+import sys
+import threading
+import time
+
+_started = time.perf_counter()
+_marks = []
+_reported = set()
+
+ENABLED = bool(os.environ.get("HOTEL_STARTUP_TIMING"))
+
+
+def mark(label):
+    """
+    Record that `label` happened now (ms since this module was imported).
+    """
+    _marks.append((label, (time.perf_counter() - _started) * 1000))
+
+
+def report(title):
+    """
+    Print the timeline once per `title` when timing is enabled.
+    """
+    if not ENABLED or title in _reported:
+        return
+    _reported.add(title)
+    print(f"[startup] {title}", file=sys.stderr)
+    previous = 0.0
+    for label, ms in _marks:
+        print(f"[startup] {ms:8.1f} ms  (+{ms - previous:6.1f})  {label}", file=sys.stderr)
+        previous = ms
+
+
+def when_painted(root, label, title=None):
+    """
+    mark(label) once `root` has drawn itself, then report.
+    """
+    def painted():
+        mark(label)
+        report(title or label)
+
+    root.update_idletasks()
+    root.after_idle(painted)
+
+
+def prefetch(*modules):
+    """
+    Import `modules` on a background thread so they are ready by the time a
+    page needs them. Safe to call repeatedly; failures are left for the real
+    import to report.
+    """
+    def load():
+        for name in modules:
+            if name not in sys.modules:
+                try:
+                    importlib.import_module(name)
+                except Exception:
+                    pass
+        mark(f"prefetched {', '.join(modules)}")
+
+    threading.Thread(target=load, daemon=True, name="prefetch").start()
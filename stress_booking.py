@@ -0,0 +1,113 @@
+# stress_booking.py
+# Concurrency stress check for booking.book_room.
+#
+#   python stress_booking.py --writers 8 --seconds 10
+#
+# Starts N writer processes, each with its own connection (like N desks), all
+# booking random stays in a small set of rooms so they collide constantly.
+# Reports bookings/sec and fails if any room ends up double booked.
+# Runs against a scratch database, never hotel.db.
+
+import multiprocessing
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+import booking
+import database
+
+DB_PATH = "stress.db"
+ROOMS = 20
+DAYS = 60          # stays start within this many days of today
+
+
+def setup(path, rooms=ROOMS):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    database.DB_PATH = path
+    conn = database.connect()
+    database.migrate(conn)
+    conn.execute("INSERT INTO customers (name) VALUES ('Stress Guest')")
+    conn.executemany("INSERT INTO rooms (room_no, room_type, bed, price, status) VALUES (?, 'Single', 'Single', 100, 'Available')",
+                     [(str(100 + i),) for i in range(rooms)])
+    conn.commit()
+    conn.close()
+
+
+def writer(path, seed, seconds, rooms, results):
+    database.DB_PATH = path
+    conn = database.connect()
+    rng = random.Random(seed)
+    counts = {"booked": 0, "conflicts": 0, "busy": 0}
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        start = date.today() + timedelta(days=rng.randrange(DAYS))
+        stay = rng.randint(1, 4)
+        try:
+            booking.book_room(conn, str(100 + rng.randrange(rooms)), start.isoformat(),
+                              (start + timedelta(days=stay)).isoformat(), customer_id=1)
+            counts["booked"] += 1
+        except booking.Unavailable:
+            counts["conflicts"] += 1
+        except booking.Busy:
+            counts["busy"] += 1
+
+    conn.close()
+    results.put(counts)
+
+
+def double_bookings(conn):
+    return conn.execute("""
+        SELECT COUNT(*) FROM reservations a
+        JOIN reservations b ON a.room_id = b.room_id AND a.res_id < b.res_id
+        WHERE a.status = 'Active' AND b.status = 'Active'
+          AND a.check_in < b.check_out AND b.check_in < a.check_out
+    """).fetchone()[0]
+
+
+def run(path=DB_PATH, writers=8, seconds=10.0, rooms=ROOMS):
+    setup(path, rooms)
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=writer, args=(path, i, seconds, rooms, results))
+             for i in range(writers)]
+
+    started = time.monotonic()
+    for p in procs:
+        p.start()
+    totals = {"booked": 0, "conflicts": 0, "busy": 0}
+    for _ in procs:
+        for key, value in results.get().items():
+            totals[key] += value
+    for p in procs:
+        p.join()
+    elapsed = time.monotonic() - started
+
+    conn = database.connect()
+    totals["stored"] = conn.execute("SELECT COUNT(*) FROM reservations").fetchone()[0]
+    totals["double_bookings"] = double_bookings(conn)
+    conn.close()
+    totals["bookings_per_second"] = totals["booked"] / elapsed
+    return totals
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stress concurrent bookings")
+    parser.add_argument("--writers", type=int, default=8, help="parallel writer processes")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--rooms", type=int, default=ROOMS, help="fewer rooms means more collisions")
+    parser.add_argument("--db", default=DB_PATH, help="scratch database, recreated (default: %(default)s)")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.db) == os.path.abspath(database.DB_PATH):
+        parser.error("refusing to overwrite the live database")
+
+    r = run(args.db, args.writers, args.seconds, args.rooms)
+    print(f"{args.writers} writers: {r['booked']} booked ({r['bookings_per_second']:,.0f}/sec), "
+          f"{r['conflicts']} conflicts, {r['busy']} gave up busy")
+    print(f"{r['stored']} reservations stored, {r['double_bookings']} double bookings")
+    sys.exit(1 if r["double_bookings"] or r["stored"] != r["booked"] else 0)
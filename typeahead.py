@@ -0,0 +1,355 @@
+# typeahead.py
+# Prefix index over guest names and phone numbers, and the picker that uses it.
+#
+# Name words are kept in one sorted list, each with the ids of the guests who
+# have it, and phone numbers (reduced to digits) in another. Every word or
+# number starting with "kha" or "0300" is then a contiguous run found by
+# bisection: a lookup costs O(log n) plus the matches it returns, whether
+# there are 2,000 guests or 200,000. Customer edits are applied to the shared
+# index as they happen (via events.py) rather than rebuilding it.
+
+import re
+import sys
+import tkinter as tk
+from bisect import bisect_left, insort
+from itertools import chain
+import database
+import events
+import query_executor
+
+TOP_N = 10
+COUNTRY_CODE = "92"    # "+92 300 ..." and "0300 ..." are the same number
+
+# "+" is read as the international prefix "00"; other punctuation is dropped
+_PHONE_CHARS = {ord("+"): "00", **{ord(c): None for c in " -()./"}}
+_non_digits = re.compile(r"\D").sub
+
+
+def normalize(text):
+    return " ".join((text or "").lower().split())
+
+
+def phone_key(text):
+    """
+    A phone number as a search key: digits only, without the international
+    prefix, the country code or leading zeros.
+    """
+    digits = (text or "").translate(_PHONE_CHARS)
+    if not digits.isdigit():
+        digits = _non_digits("", digits)
+    if digits.startswith("00" + COUNTRY_CODE):
+        digits = digits[2 + len(COUNTRY_CODE):]
+    elif digits.startswith(COUNTRY_CODE) and len(digits) > 10:
+        digits = digits[len(COUNTRY_CODE):]
+    return digits.lstrip("0")
+
+
+def _is_phone(text):
+    # "0300-123" or "+92 300" search phone numbers; anything else searches names
+    stripped = (text or "").strip()
+    return bool(stripped) and any(c.isdigit() for c in stripped) and all(c.isdigit() or c in " +-()" for c in stripped)
+
+
+class GuestIndex:
+    """
+    Name words: the distinct words in sorted order, each with the ids of the
+    guests whose name contains it. Guest names share a small vocabulary, so
+    this stays compact. Phones: (key, customer_id) sorted by key, as parallel
+    lists.
+    """
+
+    def __init__(self):
+        self._words = []
+        self._postings = {}       # word -> [customer_id, ...] ascending
+        self._phones = []
+        self._phone_ids = []
+        self.guests = {}          # customer_id -> (name, phone)
+        self._split = {}          # lower-cased name -> its distinct words
+
+    def _name_words(self, name):
+        key = (name or "").lower()
+        words = self._split.get(key)
+        if words is None:
+            words = self._split[key] = [sys.intern(w) for w in dict.fromkeys(key.split())]
+        return words
+
+    def load(self, conn):
+        for customer_id, name, phone in conn.execute("SELECT customer_id, name, phone FROM customers ORDER BY customer_id"):
+            # Common names are shared rather than stored once per guest
+            name = sys.intern(name or "")
+            self.guests[customer_id] = (name, phone or "")
+            for word in self._name_words(name):
+                ids = self._postings.get(word)
+                if ids is None:
+                    ids = self._postings[word] = []
+                ids.append(customer_id)
+        self._words = sorted(self._postings)
+
+        keys = [phone_key(phone) for _, phone in self.guests.values()]
+        ids = list(self.guests)
+        # Stable sort: guests sharing a number stay in customer_id order
+        order = sorted((i for i, key in enumerate(keys) if key), key=keys.__getitem__)
+        self._phones = [keys[i] for i in order]
+        self._phone_ids = [ids[i] for i in order]
+        return self
+
+    def add(self, customer_id, name, phone):
+        """
+        Add a guest, or replace what is indexed for them after an edit.
+        """
+        self.remove(customer_id)
+        name = sys.intern(name or "")
+        self.guests[customer_id] = (name, phone or "")
+        for word in self._name_words(name):
+            ids = self._postings.get(word)
+            if ids is None:
+                ids = self._postings[word] = []
+                insort(self._words, word)
+            insort(ids, customer_id)
+        key = phone_key(phone)
+        if key:
+            i = bisect_left(self._phones, key)
+            while i < len(self._phones) and self._phones[i] == key and self._phone_ids[i] < customer_id:
+                i += 1
+            self._phones.insert(i, key)
+            self._phone_ids.insert(i, customer_id)
+
+    def remove(self, customer_id):
+        guest = self.guests.pop(customer_id, None)
+        if guest is None:
+            return
+        name, phone = guest
+        for word in self._name_words(name):
+            ids = self._postings[word]
+            del ids[bisect_left(ids, customer_id)]
+            if not ids:
+                del self._postings[word]
+                del self._words[bisect_left(self._words, word)]
+        key = phone_key(phone)
+        i = bisect_left(self._phones, key)
+        while key and i < len(self._phones) and self._phones[i] == key:
+            if self._phone_ids[i] == customer_id:
+                del self._phones[i]
+                del self._phone_ids[i]
+                break
+            i += 1
+
+    def search(self, text, limit=TOP_N):
+        """
+        Up to `limit` guests as [(customer_id, name, phone), ...]: those whose
+        phone starts with the digits typed, or whose name has a word starting
+        with each word typed. Ordered by matching word, then customer_id.
+        """
+        if _is_phone(text):
+            key = phone_key(text)
+            if not key:
+                return []
+            i = bisect_left(self._phones, key)
+            results = []
+            while i < len(self._phones) and self._phones[i].startswith(key) and len(results) < limit:
+                customer_id = self._phone_ids[i]
+                results.append((customer_id, *self.guests[customer_id]))
+                i += 1
+            return results
+
+        query = normalize(text).split()
+        if not query:
+            return []
+        # Walk the postings of the word typed that matches the fewest guests;
+        # the other words typed narrow it down to guests who match them too
+        ranges = {typed: self._word_range(typed) for typed in query}
+        sizes = {typed: sum(len(self._postings[self._words[w]]) for w in ranges[typed]) for typed in query}
+        anchor = min(query, key=sizes.__getitem__)
+        allowed = None
+        for typed in query:
+            if typed is not anchor:
+                ids = set(chain.from_iterable(self._postings[self._words[w]] for w in ranges[typed]))
+                allowed = ids if allowed is None else allowed & ids
+
+        results = []
+        seen = set()
+        for w in ranges[anchor]:
+            for customer_id in self._postings[self._words[w]]:
+                if customer_id in seen or (allowed is not None and customer_id not in allowed):
+                    continue
+                seen.add(customer_id)
+                results.append((customer_id, *self.guests[customer_id]))
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def _word_range(self, prefix):
+        # Positions in _words of the words starting with `prefix`
+        first = bisect_left(self._words, prefix)
+        last = first
+        while last < len(self._words) and self._words[last].startswith(prefix):
+            last += 1
+        return range(first, last)
+
+
+# -----------------------------
+# Shared index
+# -----------------------------
+_index = None
+_subscribed = None    # toplevel whose events keep _index current
+
+
+def get_index(conn=None):
+    """
+    Return the shared index, building it from the database on first use.
+    Pass `conn` when calling from a background query.
+    """
+    global _index
+    index = _index
+    if index is None:
+        if conn is None:
+            with database.connection() as conn:
+                index = GuestIndex().load(conn)
+        else:
+            index = GuestIndex().load(conn)
+        _index = index
+    return index
+
+
+def invalidate():
+    """
+    Drop the shared index so the next use rebuilds it (e.g. another desk may
+    have added guests).
+    """
+    global _index
+    _index = None
+
+
+def _follow_changes(owner):
+    """
+    Apply customer edits published on the event bus to the shared index.
+    """
+    global _subscribed
+    toplevel = owner.winfo_toplevel()
+    if _subscribed is toplevel:
+        return
+    _subscribed = toplevel
+
+    def changed(changes):
+        keys = changes["customers"]
+        if keys is None:
+            invalidate()
+            return
+
+        def fetch(conn):
+            marks = ",".join("?" * len(keys))
+            rows = conn.execute(f"SELECT customer_id, name, phone FROM customers WHERE customer_id IN ({marks})",
+                                list(keys)).fetchall()
+            return keys, rows
+
+        def apply(result):
+            keys, rows = result
+            index = _index
+            if index is None:
+                return
+            for customer_id in keys:
+                index.remove(customer_id)
+            for customer_id, name, phone in rows:
+                index.add(customer_id, name, phone)
+
+        query_executor.submit(toplevel, fetch, apply, busy=False)
+
+    events.subscribe(toplevel, ("customers",), changed)
+
+
+# -----------------------------
+# Picker
+# -----------------------------
+class GuestPicker(tk.Frame):
+    """
+    Entry with a drop-down of the best matches as you type. After a pick,
+    `customer_id` holds the chosen guest; typing again clears it.
+    """
+
+    def __init__(self, master, width=25, limit=TOP_N, **kwargs):
+        super().__init__(master, bg=master["bg"], **kwargs)
+        self.limit = limit
+        self.customer_id = None
+        self.index = None
+        self._matches = []
+
+        self.var = tk.StringVar()
+        self.entry = tk.Entry(self, textvariable=self.var, width=width)
+        self.entry.pack(fill="x")
+        # Child of the toplevel so it can float over the widgets below
+        self.listbox = tk.Listbox(self.winfo_toplevel(), height=limit, width=width + 15, activestyle="dotbox")
+
+        self.entry.bind("<KeyRelease>", self._on_key)
+        self.entry.bind("<Down>", self._focus_list)
+        self.entry.bind("<Return>", lambda event: self._pick(0))
+        self.entry.bind("<Escape>", lambda event: self._hide())
+        self.listbox.bind("<Return>", lambda event: self._pick(self._selected()))
+        self.listbox.bind("<Double-Button-1>", lambda event: self._pick(self._selected()))
+        self.listbox.bind("<Escape>", lambda event: (self._hide(), self.entry.focus_set()))
+        self.bind("<Destroy>", lambda event: self.listbox.destroy() if event.widget is self else None, add="+")
+
+        _follow_changes(self)
+        self.reload()
+
+    def reload(self):
+        """
+        (Re)load the shared index in the background; typing before it is
+        ready simply shows nothing yet.
+        """
+        query_executor.submit(self, get_index, self._loaded, busy=False)
+
+    def get(self):
+        return self.var.get()
+
+    def clear(self):
+        self.var.set("")
+        self.customer_id = None
+        self._hide()
+
+    def _loaded(self, index):
+        self.index = index
+        if self.var.get() and self.customer_id is None:
+            self._show_matches()
+
+    def _on_key(self, event):
+        if event.keysym in ("Down", "Return", "Escape", "Tab"):
+            return
+        self.customer_id = None
+        self._show_matches()
+
+    def _show_matches(self):
+        index = _index or self.index
+        self._matches = index.search(self.var.get(), self.limit) if index is not None else []
+        if not self._matches:
+            self._hide()
+            return
+        self.listbox.delete(0, "end")
+        for customer_id, name, phone in self._matches:
+            self.listbox.insert("end", f"{name}   {phone}   #{customer_id}")
+        self.listbox.configure(height=len(self._matches))
+        self.listbox.place(in_=self.entry, relx=0, rely=1, anchor="nw")
+        self.listbox.lift()
+
+    def _hide(self):
+        self.listbox.place_forget()
+
+    def _focus_list(self, event=None):
+        if self._matches:
+            self.listbox.focus_set()
+            self.listbox.selection_clear(0, "end")
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+
+    def _selected(self):
+        selection = self.listbox.curselection()
+        return selection[0] if selection else 0
+
+    def _pick(self, i):
+        if i >= len(self._matches):
+            return
+        customer_id, name, _ = self._matches[i]
+        self.var.set(name)
+        self.customer_id = customer_id
+        self._hide()
+        self.entry.focus_set()
+        self.entry.icursor("end")
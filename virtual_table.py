@@ -0,0 +1,304 @@
+# virtual_table.py
+# Windowed loading for ttk.Treeview tables.
+# Only a bounded window of rows lives in the widget; more rows are paged in
+# with keyset queries as the user scrolls, and rows far off screen are dropped.
+
+from bisect import bisect_left
+from collections import deque
+from itertools import islice
+import query_executor
+from queries import PAGE_SIZE, page_query
+
+MAX_ROWS = 1000        # rows kept in the Treeview at once
+PREFETCH_ROWS = 100    # fetch the next page when this close to either edge
+
+
+class VirtualTable:
+    """
+    Keeps a sliding window of rows in `tree`.
+
+    `select` is a SELECT ... FROM ... statement without WHERE/ORDER BY, whose
+    first column is `key` (a unique, indexed column such as the primary key).
+    Pages are fetched with `key > ?` / `key < ?` seeks, so every page costs the
+    same no matter how far into the table the user has scrolled. Queries run on
+    the background executor; at most one is in flight per table.
+    """
+
+    def __init__(self, tree, select, key, page_size=PAGE_SIZE, max_rows=MAX_ROWS):
+        self.tree = tree
+        self.select = select
+        self.key = key
+        self.page_size = page_size
+        self.max_rows = max(max_rows, page_size * 2)
+        self.where = ""
+        self.params = ()
+
+        self._keys = deque()
+        self._top_index = 0          # absolute position of the first row, for striping
+        self._at_start = True
+        self._at_end = True
+        self._busy = False
+        self._ticket = None
+        self._ranked = False         # showing search results rather than key order
+
+        tree.configure(yscrollcommand=self._on_scroll)
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _query(self, after=None, before=None):
+        sql, params = page_query(self.select, self.key, self.where, self.params,
+                                 after, before, self.page_size)
+
+        # Built here on the Tk thread; the worker only executes it
+        def fetch(conn):
+            rows = conn.execute(sql, params).fetchall()
+            if before is not None:
+                rows.reverse()
+            return rows
+
+        return fetch
+
+    def fetch_row(self, conn, key):
+        """
+        Fetch the single row for `key` as this table displays it, or None if it
+        no longer exists (or no longer matches the current filter).
+        """
+        where = f"{self.key} = ?"
+        params = list(self.params) + [key]
+        if self.where:
+            where = f"({self.where}) AND {where}"
+        return conn.execute(f"{self.select} WHERE {where}", params).fetchone()
+
+    def _submit(self, fn, callback):
+        if self._ticket is not None:
+            self._ticket.cancel()
+
+        def done(rows):
+            self._ticket = None
+            callback(rows)
+
+        self._ticket = query_executor.submit(self.tree, fn, done)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def load(self, where="", params=()):
+        """
+        Reset the window to the start of the (optionally filtered) table.
+        """
+        self.where = where
+        self.params = tuple(params)
+        self._ranked = False
+        self._submit(self._query(), self._loaded)
+
+    def reload(self):
+        self.load(self.where, self.params)
+
+    def show(self, rows):
+        """
+        Replace the window with a fixed, already-ordered list (e.g. ranked
+        search results). Scrolling does not page while it is shown.
+        """
+        if self._ticket is not None:
+            self._ticket.cancel()
+            self._ticket = None
+        self._replace(rows)
+        self._at_end = True
+        self._ranked = True
+
+    def show_query(self, fn):
+        """
+        Run `fn(conn)` in the background and show the rows it returns.
+        """
+        self._submit(fn, self.show)
+
+    def apply(self, key, row):
+        """
+        Reflect a one-row change in place: update or insert `row`, or remove
+        `key` when `row` is None. Rows outside the loaded window are left for
+        paging to pick up; search results only update rows they already show.
+        """
+        self._busy = True
+        try:
+            if row is None:
+                self._remove(key)
+            else:
+                self._upsert(row)
+        finally:
+            self._busy = False
+
+    def refresh_rows(self, keys):
+        """
+        Re-read changed rows in the background and apply them; keys=None
+        (unknown rows) reloads the window. Only rows currently loaded are
+        fetched unless the end of the table is showing, where new rows appear
+        (search results only take updates to rows they already show).
+        """
+        if keys is None:
+            if not self._ranked:
+                self.reload()
+            return
+        keys = [k for k in keys if self.tree.exists(str(k)) or (self._at_end and not self._ranked)]
+        if not keys:
+            return
+
+        def fetch(conn):
+            return [(key, self.fetch_row(conn, key)) for key in keys]
+
+        def done(rows):
+            for key, row in rows:
+                self.apply(key, row)
+
+        query_executor.submit(self.tree, fetch, done, busy=False)
+
+    # -----------------------------
+    # Row updates
+    # -----------------------------
+    def _upsert(self, row):
+        iid = str(row[0])
+        if self.tree.exists(iid):
+            self.tree.item(iid, values=row)
+            return
+
+        key = row[0]
+        if self._ranked:
+            # Search results: a new row may not match the search text
+            return
+        if not self._keys or key > self._keys[-1]:
+            if not self._at_end:
+                return
+            pos = len(self._keys)
+        elif key < self._keys[0]:
+            if not self._at_start:
+                return
+            pos = 0
+        else:
+            pos = bisect_left(self._keys, key)
+
+        self.tree.insert("", pos, iid=iid, values=row, tags=(self._tag(self._top_index + pos),))
+        self._keys.insert(pos, key)
+        self._restripe(pos + 1)
+
+    def _remove(self, key):
+        iid = str(key)
+        if not self.tree.exists(iid):
+            return
+        pos = self.tree.index(iid)
+        self.tree.delete(iid)
+        del self._keys[pos]
+        self._restripe(pos)
+
+    def _restripe(self, start):
+        # Only rows after the change flip parity; appends touch nothing
+        for i, key in enumerate(islice(self._keys, start, None), start):
+            self.tree.item(str(key), tags=(self._tag(self._top_index + i),))
+
+    # -----------------------------
+    # Window management
+    # -----------------------------
+    def _tag(self, index):
+        return "evenrow" if index % 2 == 0 else "oddrow"
+
+    def _replace(self, rows):
+        self._busy = True
+        try:
+            self.tree.delete(*self.tree.get_children())
+            self._keys.clear()
+            self._top_index = 0
+            self._append(rows)
+            self._at_start = True
+        finally:
+            self._busy = False
+
+    def _loaded(self, rows):
+        self._replace(rows)
+        self._at_end = len(rows) < self.page_size
+
+    def _append(self, rows):
+        start = self._top_index + len(self._keys)
+        for i, row in enumerate(rows):
+            self.tree.insert("", "end", iid=str(row[0]), values=row, tags=(self._tag(start + i),))
+            self._keys.append(row[0])
+
+    def _prepend(self, rows):
+        self._top_index -= len(rows)
+        for i, row in enumerate(rows):
+            self.tree.insert("", i, iid=str(row[0]), values=row, tags=(self._tag(self._top_index + i),))
+        self._keys.extendleft(reversed([row[0] for row in rows]))
+
+    def _trim_top(self, count):
+        dropped = [str(self._keys.popleft()) for _ in range(count)]
+        self.tree.delete(*dropped)
+        self._top_index += count
+        self._at_start = False
+
+    def _trim_bottom(self, count):
+        dropped = [str(self._keys.pop()) for _ in range(count)]
+        self.tree.delete(*dropped)
+        self._at_end = False
+
+    def _top_row(self):
+        return int(self.tree.yview()[0] * len(self._keys))
+
+    def _paged_down(self, rows):
+        if len(rows) < self.page_size:
+            self._at_end = True
+        if not rows:
+            return
+
+        self._busy = True
+        try:
+            top_row = self._top_row()
+            self._append(rows)
+            excess = len(self._keys) - self.max_rows
+            if excess > 0:
+                self._trim_top(excess)
+                top_row -= excess
+            self.tree.yview_moveto(max(top_row, 0) / len(self._keys))
+        finally:
+            self._busy = False
+
+    def _paged_up(self, rows):
+        if len(rows) < self.page_size:
+            self._at_start = True
+        if not rows:
+            return
+
+        self._busy = True
+        try:
+            top_row = self._top_row()
+            self._prepend(rows)
+            excess = len(self._keys) - self.max_rows
+            if excess > 0:
+                self._trim_bottom(excess)
+            self.tree.yview_moveto((top_row + len(rows)) / len(self._keys))
+        finally:
+            self._busy = False
+
+    def _on_scroll(self, first, last):
+        if self._busy or self._ticket is not None or not self._keys:
+            return
+
+        total = len(self._keys)
+        top_row = int(float(first) * total)
+        bottom_row = int(float(last) * total)
+
+        if not self._at_end and total - bottom_row <= PREFETCH_ROWS:
+            self._submit(self._query(after=self._keys[-1]), self._paged_down)
+        elif not self._at_start and top_row <= PREFETCH_ROWS:
+            self._submit(self._query(before=self._keys[0]), self._paged_up)
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def attach(tree, select, key, **kwargs):
+    """
+    Return the VirtualTable bound to `tree`, creating it on first use.
+    """
+    table = getattr(tree, "virtual_table", None)
+    if table is None:
+        table = VirtualTable(tree, select, key, **kwargs)
+        tree.virtual_table = table
+    return table